@@ -1,10 +1,273 @@
 # Author: Digital Twin Implementation
 # BOF (Basic Oxygen Furnace) Digital Twin Model
 
+import os
+import runpy
+import sys
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import NamedTuple, Tuple, Union
+
+import numpy as np
+
+# Optional numba support, shared with the other twins (see Digital_Twin/jit_support.py)
+_JIT = runpy.run_path(os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "jit_support.py"))
+njit, prange = _JIT["njit"], _JIT["prange"]
+
+# Interned input/output keys (shared by every call instead of re-hashing literals)
+_K_PIG_IRON = sys.intern("pig_iron [t/h]")
+_K_SCRAP_STEEL = sys.intern("scrap_steel [t/h]")
+_K_OXYGEN = sys.intern("oxygen [Nm³/h]")
+_K_LIME = sys.intern("lime [t/h]")
+_K_POWER = sys.intern("power [kWh/h]")
+_INPUT_KEYS = (_K_PIG_IRON, _K_SCRAP_STEEL, _K_OXYGEN, _K_LIME, _K_POWER)
+
+_K_LIQUID_STEEL = sys.intern("liquid_steel [t/h]")
+_K_BOF_SLAG = sys.intern("bof_slag [t/h]")
+_K_BOF_GAS = sys.intern("bof_gas [Nm³/h]")
+_K_BOF_GAS_CV = sys.intern("bof_gas_calorific_value [MJ/Nm³]")
+_K_CO2 = sys.intern("co2_emissions [t/h]")
+_K_OXYGEN_REQUIRED = sys.intern("oxygen_required [Nm³/h]")
+_K_POWER_REQUIRED = sys.intern("power_required [kWh/h]")
+_K_LIME_REQUIRED = sys.intern("lime_required [t/h]")
+_OUTPUT_KEYS = (_K_LIQUID_STEEL, _K_BOF_SLAG, _K_BOF_GAS, _K_BOF_GAS_CV,
+                _K_CO2, _K_OXYGEN_REQUIRED, _K_POWER_REQUIRED, _K_LIME_REQUIRED)
+
+
+# dataclass(slots=True) needs Python 3.10+; older interpreters get a plain dataclass
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_SLOTS)
+class BOFInputs:
+    """Typed BOF inputs; pass directly to BOFTwin to skip the dict lookups."""
+    pig_iron: float = 80.0              # [t/h] - molten pig iron from blast furnace
+    scrap_steel: float = 20.0           # [t/h] - scrap steel for cooling/dilution
+    oxygen: float = 5000.0              # [Nm³/h] - oxygen for decarburization
+    lime: float = 5.0                   # [t/h] - lime flux for slag formation
+    power: float = 5000.0               # [kWh/h] - electrical power consumption
+    
+    @classmethod
+    def from_dict(cls, inputs: dict) -> "BOFInputs":
+        """Build from a unit-labelled input dict (missing keys use defaults)."""
+        return cls(
+            float(inputs.get(_K_PIG_IRON, 80)),
+            float(inputs.get(_K_SCRAP_STEEL, 20)),
+            float(inputs.get(_K_OXYGEN, 5000)),
+            float(inputs.get(_K_LIME, 5)),
+            float(inputs.get(_K_POWER, 5000)),
+        )
+
+
+class BOFResult(NamedTuple):
+    """BOF outputs as a lightweight tuple (same order as the result dict)."""
+    liquid_steel: float                 # [t/h]
+    bof_slag: float                     # [t/h]
+    bof_gas: float                      # [Nm³/h]
+    bof_gas_calorific_value: float      # [MJ/Nm³]
+    co2_emissions: float                # [t/h]
+    oxygen_required: float              # [Nm³/h]
+    power_required: float               # [kWh/h]
+    lime_required: float                # [t/h]
+
+
+@njit
+def _round(x, scale):
+    """Half-up rounding to 1/scale (scale=100: 2 decimals), for floats and arrays.
+    
+    The scalar kernels and simulate_batch all round with it, so __call__ and
+    the batch API report the same values.
+    """
+    return (x * scale + 0.5) // 1 / scale
+
+
+@njit
+def _simulate_core(pig_iron: float, scrap_steel: float, oxygen: float,
+                   lime: float, power: float) -> Tuple[float, ...]:
+    """Scalar BOF kernel; returns the rounded output values in __call__ order."""
+    
+    # Fixed calculation parameters (per ton of steel)
+    oxygen_tSteel: float = 50.0     # [Nm³/t_steel] - oxygen requirement
+    lime_tSteel: float = 50.0       # [kg/t_steel] - lime requirement
+    power_tSteel: float = 50.0      # [kWh/t_steel] - power requirement
+    slag_ratio: float = 0.15        # [t_slag/t_steel] - slag generation ratio
+    bof_gas_tSteel: float = 60.0    # [Nm³/t_steel] - BOF gas generation
+    co2_factor: float = 0.15        # [t_CO2/t_steel] - CO2 emissions factor
+    lime_t_tSteel: float = lime_tSteel / 1000   # [t/t_steel] - lime requirement in tonnes
+    
+    # Steel production from iron sources (~95% yield) is scaled down by
+    # min(1, available/required) for oxygen, lime and power in turn; the
+    # requirements are linear in steel, so the binding constraint alone sets
+    # the final production.
+    liquid_steel = min((pig_iron + scrap_steel) * 0.95,
+                       oxygen / oxygen_tSteel,
+                       lime / lime_t_tSteel,
+                       power / power_tSteel)
+    
+    # Calculate outputs based on final steel production
+    bof_slag = slag_ratio * liquid_steel
+    bof_gas_volume = bof_gas_tSteel * liquid_steel
+    co2_emissions = co2_factor * liquid_steel
+    
+    # BOF gas calorific value (CO-rich gas, ~8-10 MJ/Nm³)
+    # Varies slightly with production rate
+    bof_gas_calorific_value = 8.0 + 0.01 * liquid_steel
+    
+    # Recalculate actual requirements for output (one multiply each)
+    oxygen_actual = oxygen_tSteel * liquid_steel
+    power_actual = power_tSteel * liquid_steel
+    lime_actual = lime_t_tSteel * liquid_steel
+    
+    return (_round(liquid_steel, 100), _round(bof_slag, 100),
+            _round(bof_gas_volume, 100), _round(bof_gas_calorific_value, 100),
+            _round(co2_emissions, 100), _round(oxygen_actual, 100),
+            _round(power_actual, 100), _round(lime_actual, 100))
+
+
+@njit(parallel=True)
+def _simulate_batch_parallel(pig_iron, scrap_steel, oxygen, lime, power,
+                             coefficients, out):
+    """Multi-threaded batch kernel writing the rounded outputs into out (N, 8).
+    
+    coefficients holds the _DEFAULT_PARAMS values in order; each sample is
+    independent, so the batch axis is split across all cores.
+    """
+    oxygen_tSteel = coefficients[0]
+    lime_t_tSteel = coefficients[1] / 1000
+    power_tSteel = coefficients[2]
+    slag_ratio = coefficients[3]
+    bof_gas_tSteel = coefficients[4]
+    co2_factor = coefficients[5]
+    for i in prange(pig_iron.shape[0]):
+        liquid_steel = min((pig_iron[i] + scrap_steel[i]) * 0.95,
+                           oxygen[i] / oxygen_tSteel,
+                           lime[i] / lime_t_tSteel,
+                           power[i] / power_tSteel)
+        out[i, 0] = _round(liquid_steel, 100)
+        out[i, 1] = _round(slag_ratio * liquid_steel, 100)
+        out[i, 2] = _round(bof_gas_tSteel * liquid_steel, 100)
+        out[i, 3] = _round(8.0 + 0.01 * liquid_steel, 100)
+        out[i, 4] = _round(co2_factor * liquid_steel, 100)
+        out[i, 5] = _round(oxygen_tSteel * liquid_steel, 100)
+        out[i, 6] = _round(power_tSteel * liquid_steel, 100)
+        out[i, 7] = _round(lime_t_tSteel * liquid_steel, 100)
+
+
+# Coefficients that BOFTwin(**params) may override (per ton of steel)
+_DEFAULT_PARAMS = {
+    "oxygen_tSteel": 50.0,      # [Nm³/t_steel] - oxygen requirement
+    "lime_tSteel": 50.0,        # [kg/t_steel] - lime requirement
+    "power_tSteel": 50.0,       # [kWh/t_steel] - power requirement
+    "slag_ratio": 0.15,         # [t_slag/t_steel] - slag generation ratio
+    "bof_gas_tSteel": 60.0,     # [Nm³/t_steel] - BOF gas generation
+    "co2_factor": 0.15,         # [t_CO2/t_steel] - CO2 emissions factor
+}
+
+# Same closed form as _simulate_core with the coefficients substituted as literals
+_SIM_TEMPLATE = """
+def _simulate_core(pig_iron, scrap_steel, oxygen, lime, power):
+    liquid_steel = min((pig_iron + scrap_steel) * 0.95,
+                       oxygen / {oxygen_tSteel!r},
+                       lime / {lime_t_tSteel!r},
+                       power / {power_tSteel!r})
+    return (_round(liquid_steel, 100),
+            _round({slag_ratio!r} * liquid_steel, 100),
+            _round({bof_gas_tSteel!r} * liquid_steel, 100),
+            _round(8.0 + 0.01 * liquid_steel, 100),
+            _round({co2_factor!r} * liquid_steel, 100),
+            _round({oxygen_tSteel!r} * liquid_steel, 100),
+            _round({power_tSteel!r} * liquid_steel, 100),
+            _round({lime_t_tSteel!r} * liquid_steel, 100))
+"""
+
+
+def _specialize_kernel(coefficients: dict):
+    """Compile a _simulate_core variant with the given coefficients baked in."""
+    source = _SIM_TEMPLATE.format(
+        lime_t_tSteel=coefficients["lime_tSteel"] / 1000, **coefficients)
+    namespace = {"_round": _round}
+    exec(compile(source, "<bof_kernel>", "exec"), namespace)
+    return njit(namespace["_simulate_core"])
+
+
+def _make_simulate_tuple(kernel):
+    """Wrap a kernel in an LRU cache returning its (rounded) output tuple.
+    
+    Controllers and optimizers tend to probe the same operating points
+    repeatedly; the cache is keyed on the exact input floats, so cached
+    results equal freshly computed ones. Since the kernel rounds with _round,
+    they also equal simulate_batch's float64 results.
+    """
+    @lru_cache(maxsize=4096)
+    def _simulate_tuple(pig_iron, scrap_steel, oxygen, lime, power):
+        return tuple(kernel(pig_iron, scrap_steel, oxygen, lime, power))
+    return _simulate_tuple
+
+
+@lru_cache(maxsize=32)
+def _simulation_for(coefficients: Tuple[float, ...]):
+    """Return the memoized simulation for a coefficient set (_DEFAULT_PARAMS order)."""
+    params = dict(zip(_DEFAULT_PARAMS, coefficients))
+    if params == _DEFAULT_PARAMS:
+        return _make_simulate_tuple(_simulate_core)
+    return _make_simulate_tuple(_specialize_kernel(params))
+
+
+def simulate(inputs: Union[dict, BOFInputs], *, return_type: str = "dict",
+             oxygen_tSteel: float = 50.0, lime_tSteel: float = 50.0,
+             power_tSteel: float = 50.0, slag_ratio: float = 0.15,
+             bof_gas_tSteel: float = 60.0, co2_factor: float = 0.15):
+    """Run the BOF model once.
+    
+    inputs may be the usual unit-labelled dict or a BOFInputs instance
+    (fast path, no dict lookups). The keyword coefficients are the per-ton
+    parameters of _DEFAULT_PARAMS.
+    return_type="dict" (default) returns the usual output dict;
+    return_type="tuple" returns a BOFResult instead, which is cheaper
+    for callers that unpack the values straight away.
+    """
+    
+    # Extract input parameters with defaults
+    if isinstance(inputs, BOFInputs):
+        pig_iron: float = inputs.pig_iron
+        scrap_steel: float = inputs.scrap_steel
+        oxygen: float = inputs.oxygen
+        lime: float = inputs.lime
+        power: float = inputs.power
+    else:
+        pig_iron = float(inputs.get(_K_PIG_IRON, 80))
+        scrap_steel = float(inputs.get(_K_SCRAP_STEEL, 20))
+        oxygen = float(inputs.get(_K_OXYGEN, 5000))
+        lime = float(inputs.get(_K_LIME, 5))
+        power = float(inputs.get(_K_POWER, 5000))
+    
+    simulate_tuple = _simulation_for((float(oxygen_tSteel), float(lime_tSteel),
+                                      float(power_tSteel), float(slag_ratio),
+                                      float(bof_gas_tSteel), float(co2_factor)))
+    
+    # Run the (memoized) compiled kernel and pack the results; only the
+    # reported quantities are rounded
+    values = simulate_tuple(pig_iron, scrap_steel, oxygen, lime, power)
+    if return_type == "tuple":
+        return BOFResult(*values)
+    
+    # Return output parameters (values are already in _OUTPUT_KEYS order)
+    return dict(zip(_OUTPUT_KEYS, values))
+
+
 class BOFTwin:
+    """Backward-compatible wrapper around simulate() holding fixed params."""
+    
     def __init__(self, **params):
-        """Initialize the BOF twin with user-defined parameters."""
+        """Initialize the BOF twin with user-defined parameters.
+        
+        Any of the _DEFAULT_PARAMS coefficients (e.g. oxygen_tSteel=55) can be
+        overridden; the scalar kernel is then specialized for these values.
+        """
         self.params = params
+        self._coefficients = {key: float(params.get(key, value))
+                              for key, value in _DEFAULT_PARAMS.items()}
     
     def default_inputs(self):
         """Returns default input values for BOF operation."""
@@ -17,77 +280,89 @@ class BOFTwin:
             "power [kWh/h]": 5000,          # Electrical power consumption
         }
     
-    def __call__(self, inputs):
-        return self.simulate(inputs)
+    def __call__(self, inputs: Union[dict, BOFInputs], return_type: str = "dict"):
+        """Callable version with type hints; see simulate()."""
+        return simulate(inputs, return_type=return_type, **self._coefficients)
     
-    def __call__(self, inputs: dict) -> dict:
-        """Callable version with type hints."""
-        
-        # Extract input parameters with defaults
-        pig_iron = inputs.get("pig_iron [t/h]", 80)
-        scrap_steel = inputs.get("scrap_steel [t/h]", 20)
-        oxygen = inputs.get("oxygen [Nm³/h]", 5000)
-        lime = inputs.get("lime [t/h]", 5)
-        power = inputs.get("power [kWh/h]", 5000)
-        
-        # Fixed calculation parameters (per ton of steel)
-        oxygen_tSteel = 50          # [Nm³/t_steel] - oxygen requirement
-        lime_tSteel = 50            # [kg/t_steel] - lime requirement
-        power_tSteel = 50           # [kWh/t_steel] - power requirement
-        slag_ratio = 0.15           # [t_slag/t_steel] - slag generation ratio
-        bof_gas_tSteel = 60         # [Nm³/t_steel] - BOF gas generation
-        co2_factor = 0.15           # [t_CO2/t_steel] - CO2 emissions factor
-        
-        # Calculate theoretical steel production from iron sources
-        # Assume ~95% yield from pig iron and scrap
-        steel_from_iron = round((pig_iron + scrap_steel) * 0.95, 2)
-        
-        # Check oxygen requirement
-        oxygen_required = round(oxygen_tSteel * steel_from_iron, 2)
-        oxygen_used = oxygen if oxygen <= oxygen_required else oxygen_required
-        
-        # Adjust steel production based on oxygen availability
-        steel_after_oxygen = round(steel_from_iron * (oxygen_used / oxygen_required), 2)
-        
-        # Check lime requirement
-        lime_required = round((lime_tSteel * steel_after_oxygen) / 1000, 2)
-        lime_used = lime if lime <= lime_required else lime_required
-        
-        # Adjust steel production based on lime availability
-        steel_after_lime = round(steel_after_oxygen * (lime_used / lime_required), 2)
+    simulate = __call__
+    
+    def simulate_batch(self, inputs: dict, dtype=np.float64, parallel: bool = False) -> dict:
+        """Vectorized version of __call__ for parameter sweeps.
         
-        # Check power requirement
-        power_required = round(power_tSteel * steel_after_lime, 2)
-        power_used = power if power <= power_required else power_required
+        Each input key maps to an array of shape (N,) (scalars are broadcast);
+        every output key maps to an ndarray of shape (N,).
+        dtype=np.float32 halves memory traffic and doubles the SIMD width, but
+        outputs of order 1e3-1e6 may then differ from __call__ in the last
+        reported decimal. With the float64 default, both paths compute the
+        same values and round them half-up with _round, so they agree exactly.
+        parallel=True evaluates the batch with the multi-threaded numba
+        kernel, which pays off for sweeps of many thousands of samples.
+        """
         
-        # Final steel production based on all constraints
-        liquid_steel = round(steel_after_lime * (power_used / power_required), 2)
+        # Extract input arrays with defaults
+        pig_iron = np.asarray(inputs.get(_K_PIG_IRON, 80), dtype=dtype)
+        scrap_steel = np.asarray(inputs.get(_K_SCRAP_STEEL, 20), dtype=dtype)
+        oxygen = np.asarray(inputs.get(_K_OXYGEN, 5000), dtype=dtype)
+        lime = np.asarray(inputs.get(_K_LIME, 5), dtype=dtype)
+        power = np.asarray(inputs.get(_K_POWER, 5000), dtype=dtype)
+        pig_iron, scrap_steel, oxygen, lime, power = np.broadcast_arrays(
+            pig_iron, scrap_steel, oxygen, lime, power)
         
-        # Calculate outputs based on final steel production
-        bof_slag = round(slag_ratio * liquid_steel, 2)
-        bof_gas_volume = round(bof_gas_tSteel * liquid_steel, 2)
-        co2_emissions = round(co2_factor * liquid_steel, 2)
+        if parallel:
+            shape = pig_iron.shape
+            out = np.empty((pig_iron.size, len(_OUTPUT_KEYS)), dtype=dtype)
+            _simulate_batch_parallel(
+                np.ascontiguousarray(pig_iron).ravel(), np.ascontiguousarray(scrap_steel).ravel(),
+                np.ascontiguousarray(oxygen).ravel(), np.ascontiguousarray(lime).ravel(),
+                np.ascontiguousarray(power).ravel(),
+                np.array(list(self._coefficients.values()), dtype=dtype), out)
+            return {key: out[:, i].reshape(shape)
+                    for i, key in enumerate(_OUTPUT_KEYS)}
         
-        # BOF gas calorific value (CO-rich gas, ~8-10 MJ/Nm³)
-        # Varies slightly with production rate
-        bof_gas_calorific_value = round(8.0 + 0.01 * liquid_steel, 2)
+        # Calculation parameters (per ton of steel); Python scalars keep the
+        # arithmetic in the input dtype
+        oxygen_tSteel = self._coefficients["oxygen_tSteel"]
+        lime_tSteel = self._coefficients["lime_tSteel"]
+        power_tSteel = self._coefficients["power_tSteel"]
+        slag_ratio = self._coefficients["slag_ratio"]
+        bof_gas_tSteel = self._coefficients["bof_gas_tSteel"]
+        co2_factor = self._coefficients["co2_factor"]
+        lime_t_tSteel = lime_tSteel / 1000  # [t/t_steel] - lime requirement in tonnes
         
-        # Recalculate actual requirements for output
-        oxygen_actual = round(oxygen_tSteel * liquid_steel, 2)
-        power_actual = round(power_tSteel * liquid_steel, 2)
-        lime_actual = round((lime_tSteel * liquid_steel) / 1000, 2)
+        # Same closed form as the scalar kernel, evaluated elementwise
+        liquid_steel = np.minimum(
+            np.minimum((pig_iron + scrap_steel) * 0.95, oxygen / oxygen_tSteel),
+            np.minimum(lime / lime_t_tSteel, power / power_tSteel))
         
-        # Return output parameters
         return {
-            "liquid_steel [t/h]": round(liquid_steel, 2),
-            "bof_slag [t/h]": bof_slag,
-            "bof_gas [Nm³/h]": bof_gas_volume,
-            "bof_gas_calorific_value [MJ/Nm³]": bof_gas_calorific_value,
-            "co2_emissions [t/h]": co2_emissions,
-            "oxygen_required [Nm³/h]": oxygen_actual,
-            "power_required [kWh/h]": power_actual,
-            "lime_required [t/h]": lime_actual
+            _K_LIQUID_STEEL: _round(liquid_steel, 100),
+            _K_BOF_SLAG: _round(slag_ratio * liquid_steel, 100),
+            _K_BOF_GAS: _round(bof_gas_tSteel * liquid_steel, 100),
+            _K_BOF_GAS_CV: _round(8.0 + 0.01 * liquid_steel, 100),
+            _K_CO2: _round(co2_factor * liquid_steel, 100),
+            _K_OXYGEN_REQUIRED: _round(oxygen_tSteel * liquid_steel, 100),
+            _K_POWER_REQUIRED: _round(power_tSteel * liquid_steel, 100),
+            _K_LIME_REQUIRED: _round(lime_t_tSteel * liquid_steel, 100)
         }
+    
+    # Common batch API of the twins: dict of (N,) arrays in, dict of (N,) arrays out
+    batch = simulate_batch
+    
+    def simulate_grid(self, **axes) -> dict:
+        """Evaluate the Cartesian product of input axes in one vectorized pass.
+        
+        Axes are given by BOFInputs field name, e.g.
+        simulate_grid(pig_iron=np.arange(40, 125, 5), oxygen=np.linspace(3000, 6000, 31));
+        inputs that are not swept keep their defaults. Each output is an
+        ndarray of shape (len(axis_1), len(axis_2), ...) in the given order.
+        """
+        names = dict(zip(BOFInputs.__dataclass_fields__, _INPUT_KEYS))
+        unknown = set(axes) - set(names)
+        if unknown:
+            raise ValueError(f"Unknown BOF input axes: {sorted(unknown)}")
+        grids = np.ix_(*[np.asarray(values, dtype=float).ravel() for values in axes.values()])
+        return self.simulate_batch(
+            {names[name]: grid for name, grid in zip(axes, grids)})
 
 
 # Test execution
@@ -1,9 +1,105 @@
+import matplotlib
+matplotlib.use("Agg")  # Non-interactive, fastest backend for writing PNGs
 import matplotlib.pyplot as plt
 import numpy as np
 from BOF_Twin import BOFTwin
+import argparse
 import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+# Fast PNG encoding: low zlib effort and no optimize pass, files are only slightly larger
+PNG_KWARGS = {"compress_level": 1, "optimize": False}
+PNG_DPI = 100
+
+# Let Agg drop line vertices that move less than a pixel
+plt.rcParams['path.simplify'] = True
+plt.rcParams['path.simplify_threshold'] = 1.0
+
+# Upper bound on the points drawn per dashboard series; longer runs are decimated
+MAX_PLOT_POINTS = 500
+
+def _write_pickled_figure(fig_bytes, path):
+    """Worker: rebuild a pickled figure and encode it to disk."""
+    fig = pickle.loads(fig_bytes)
+    fig.savefig(path, dpi=PNG_DPI, pil_kwargs=PNG_KWARGS)
+    plt.close(fig)
+    return path
+
+def _save_figure(fig, path, executor, pending):
+    """Save inline, or hand a snapshot of the figure to the process pool."""
+    if executor is None:
+        fig.savefig(path, dpi=PNG_DPI, pil_kwargs=PNG_KWARGS)
+        print(f"Saved {path}")
+    else:
+        pending.append(executor.submit(_write_pickled_figure, pickle.dumps(fig), path))
+
+def plot_dashboard(fig, time, series):
+    """Draw the dashboard of the time series (by series name) into fig.
+
+    Series longer than MAX_PLOT_POINTS are decimated before plotting.
+    """
+    stride = max(1, len(time) // MAX_PLOT_POINTS)
+    time = time[::stride]
+    series = {name: values[::stride] for name, values in series.items()}
+
+    axes = fig.subplots(3, 2, sharex=True)
+    fig.suptitle('BOF Digital Twin - Comprehensive Dashboard', fontsize=20)
+
+    # 1. Inputs
+    ax_in = axes[0, 0]
+    ax_in.plot(time, series["pig_iron"], label='Pig Iron [t/h]', color='tab:red')
+    ax_in.plot(time, series["scrap"], label='Scrap [t/h]', color='tab:grey')
+    ax_in.set_title('Linked Input Fluctuations', fontsize=14)
+    ax_in.set_ylabel('Mass Flow [t/h]')
+    ax_in.legend(loc='upper right')
+    ax_in.grid(True, alpha=0.3)
+
+    # 2. Steel Output
+    ax_steel = axes[0, 1]
+    ax_steel.plot(time, series["steel"], color='tab:blue', linewidth=2)
+    ax_steel.set_title('Liquid Steel Production', fontsize=14)
+    ax_steel.set_ylabel('[t/h]')
+    ax_steel.grid(True, alpha=0.3)
+
+    # 3. Slag & Gas
+    ax_sg = axes[1, 0]
+    ax_sg.plot(time, series["slag"], label='Slag', color='tab:brown')
+    ax_sg_twin = ax_sg.twinx()
+    ax_sg_twin.plot(time, series["gas"], label='BOF Gas', color='tab:green', linestyle='--')
+    ax_sg.set_ylabel('Slag [t/h]', color='tab:brown')
+    ax_sg_twin.set_ylabel('BOF Gas [Nm³/h]', color='tab:green')
+    ax_sg.set_title('Slag & BOF Gas Production', fontsize=14)
+    ax_sg.grid(True, alpha=0.3)
+
+    # 4. CO2 Emissions
+    ax_co2 = axes[1, 1]
+    ax_co2.plot(time, series["co2"], color='tab:orange', linestyle='--')
+    ax_co2.set_title('CO2 Emissions', fontsize=14)
+    ax_co2.set_ylabel('[t/h]')
+    ax_co2.grid(True, alpha=0.3)
+
+    # 5. Oxygen Requirement
+    ax_o2 = axes[2, 0]
+    ax_o2.plot(time, series["oxygen_req"], color='tab:cyan')
+    ax_o2.set_title('Oxygen Requirement', fontsize=14)
+    ax_o2.set_ylabel('[Nm³/h]')
+    ax_o2.set_xlabel('Time Steps')
+    ax_o2.grid(True, alpha=0.3)
+
+    # 6. Calorific Value
+    ax_cal = axes[2, 1]
+    ax_cal.plot(time, series["calorific_val"], color='tab:purple')
+    ax_cal.set_title('BOF Gas Calorific Value', fontsize=14)
+    ax_cal.set_ylabel('[MJ/Nm³]')
+    ax_cal.set_xlabel('Time Steps')
+    ax_cal.grid(True, alpha=0.3)
+
+def visualize(singlecore=False):
+    # PNG encoding runs in worker processes (matplotlib is not threadsafe)
+    executor = None if singlecore else ProcessPoolExecutor(max_workers=2)
+    pending = []
 
-def visualize():
     # Initialize model
     model = BOFTwin()
     default_inputs = model.default_inputs()
@@ -11,21 +107,18 @@ def visualize():
     # --- 1. Sensitivity Analysis: Pig Iron vs Steel Output & CO2 ---
     print("Running Sensitivity Analysis...")
     pig_iron_values = np.arange(40, 125, 5)
-    steel_output_values = []
-    co2_values = []
-
-    for pig_iron in pig_iron_values:
-        inputs = default_inputs.copy()
-        inputs["pig_iron [t/h]"] = pig_iron
-        
-        # Run simulation
-        results = model(inputs)
-        
-        steel_output_values.append(results["liquid_steel [t/h]"])
-        co2_values.append(results["co2_emissions [t/h]"])
-
-    # Plotting
-    fig, ax1 = plt.subplots(figsize=(10, 6))
+    inputs = {k: np.full(len(pig_iron_values), v) for k, v in default_inputs.items()}
+    inputs["pig_iron [t/h]"] = pig_iron_values
+    
+    # Run the whole sweep in one vectorized call
+    results = model.simulate_batch(inputs)
+    
+    steel_output_values = results["liquid_steel [t/h]"]
+    co2_values = results["co2_emissions [t/h]"]
+
+    # Plotting: one Figure is reused (cleared and resized) for every section
+    fig = plt.figure(figsize=(10, 6), constrained_layout=True)
+    ax1 = fig.add_subplot()
 
     color = 'tab:blue'
     ax1.set_xlabel('Pig Iron Input [t/h]', fontsize=12)
@@ -41,12 +134,9 @@ def visualize():
     ax2.tick_params(axis='y', labelcolor=color)
 
     plt.title('BOF Sensitivity Analysis: Pig Iron vs Steel & CO2', fontsize=14)
-    fig.tight_layout()
     
     output_path_sensitivity = 'bof_sensitivity_analysis.png'
-    plt.savefig(output_path_sensitivity)
-    print(f"Saved {output_path_sensitivity}")
-    plt.close()
+    _save_figure(fig, output_path_sensitivity, executor, pending)
 
     # --- 2. Material Balance (Pie Chart) ---
     print("Generating Material Balance Chart...")
@@ -64,119 +154,72 @@ def visualize():
         losses
     ]
     
-    fig2, ax3 = plt.subplots(figsize=(8, 8))
+    fig.clear()
+    fig.set_size_inches(8, 8)
+    ax3 = fig.add_subplot()
     colors = ['#66b3ff', '#ff9999', '#ffcc99']
-    ax3.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=140, colors=colors, shadow=True)
+    # Percentages go into the wedge labels: one text layout pass, no shadow patches
+    total = sum(sizes)
+    labels = [f"{label}\n{size / total * 100:.1f}%" for label, size in zip(labels, sizes)]
+    ax3.pie(sizes, labels=labels, startangle=140, colors=colors)
     ax3.axis('equal')
     plt.title('BOF Material Balance (Default Inputs)', fontsize=14)
     
     output_path_balance = 'bof_material_balance.png'
-    plt.savefig(output_path_balance)
-    print(f"Saved {output_path_balance}")
-    plt.close()
+    _save_figure(fig, output_path_balance, executor, pending)
 
     # --- 3. Comprehensive Dashboard with Linked Fluctuations ---
     print("Running Comprehensive Dashboard Simulation...")
-    np.random.seed(42)
+    rng = np.random.default_rng(42)
     time_steps = 100
     time = np.arange(time_steps)
 
     # Production target curve
-    target_curve = 1.0 + 0.15 * np.sin(time / 10) + np.random.normal(0, 0.02, time_steps)
+    target_curve = 1.0 + 0.15 * np.sin(time / 10) + rng.normal(0, 0.02, time_steps)
+    
+    # Linked Inputs: one (4, T) noise draw, scaled by the nominal rates in one broadcast
+    noise = rng.normal(1.0, 0.01, size=(4, time_steps))
+    nominal = np.array([80, 20, 5000, 5])[:, None]
+    pig_iron_linked, scrap_linked, oxygen_linked, lime_linked = nominal * target_curve * noise
+
+    # Run all time steps in one vectorized call
+    inputs = {k: np.full(time_steps, v) for k, v in default_inputs.items()}
+    inputs["pig_iron [t/h]"] = pig_iron_linked
+    inputs["scrap_steel [t/h]"] = scrap_linked
+    inputs["oxygen [Nm³/h]"] = oxygen_linked
+    inputs["lime [t/h]"] = lime_linked
+    
+    res = model.simulate_batch(inputs)
     
-    # Linked Inputs
-    pig_iron_linked = 80 * target_curve * np.random.normal(1.0, 0.01, time_steps)
-    scrap_linked = 20 * target_curve * np.random.normal(1.0, 0.01, time_steps)
-    oxygen_linked = 5000 * target_curve * np.random.normal(1.0, 0.01, time_steps)
-    lime_linked = 5 * target_curve * np.random.normal(1.0, 0.01, time_steps)
-
     # Storage for results
     results_history = {
-        "steel": [],
-        "slag": [],
-        "gas": [],
-        "co2": [],
-        "oxygen_req": [],
-        "power_req": [],
-        "calorific_val": []
+        "steel": res["liquid_steel [t/h]"],
+        "slag": res["bof_slag [t/h]"],
+        "gas": res["bof_gas [Nm³/h]"],
+        "co2": res["co2_emissions [t/h]"],
+        "oxygen_req": res["oxygen_required [Nm³/h]"],
+        "power_req": res["power_required [kWh/h]"],
+        "calorific_val": res["bof_gas_calorific_value [MJ/Nm³]"]
     }
 
-    for t in range(time_steps):
-        inputs = default_inputs.copy()
-        inputs["pig_iron [t/h]"] = pig_iron_linked[t]
-        inputs["scrap_steel [t/h]"] = scrap_linked[t]
-        inputs["oxygen [Nm³/h]"] = oxygen_linked[t]
-        inputs["lime [t/h]"] = lime_linked[t]
-        
-        res = model(inputs)
-        
-        results_history["steel"].append(res["liquid_steel [t/h]"])
-        results_history["slag"].append(res["bof_slag [t/h]"])
-        results_history["gas"].append(res["bof_gas [Nm³/h]"])
-        results_history["co2"].append(res["co2_emissions [t/h]"])
-        results_history["oxygen_req"].append(res["oxygen_required [Nm³/h]"])
-        results_history["power_req"].append(res["power_required [kWh/h]"])
-        results_history["calorific_val"].append(res["bof_gas_calorific_value [MJ/Nm³]"])
-
     # --- Visualization ---
-    fig_dash, axes = plt.subplots(3, 2, figsize=(16, 14), sharex=True)
-    fig_dash.suptitle('BOF Digital Twin - Comprehensive Dashboard', fontsize=20)
-
-    # 1. Inputs
-    ax_in = axes[0, 0]
-    ax_in.plot(time, pig_iron_linked, label='Pig Iron [t/h]', color='tab:red')
-    ax_in.plot(time, scrap_linked, label='Scrap [t/h]', color='tab:grey')
-    ax_in.set_title('Linked Input Fluctuations', fontsize=14)
-    ax_in.set_ylabel('Mass Flow [t/h]')
-    ax_in.legend(loc='upper right')
-    ax_in.grid(True, alpha=0.3)
-
-    # 2. Steel Output
-    ax_steel = axes[0, 1]
-    ax_steel.plot(time, results_history["steel"], color='tab:blue', linewidth=2)
-    ax_steel.set_title('Liquid Steel Production', fontsize=14)
-    ax_steel.set_ylabel('[t/h]')
-    ax_steel.grid(True, alpha=0.3)
-
-    # 3. Slag & Gas
-    ax_sg = axes[1, 0]
-    ax_sg.plot(time, results_history["slag"], label='Slag', color='tab:brown')
-    ax_sg_twin = ax_sg.twinx()
-    ax_sg_twin.plot(time, results_history["gas"], label='BOF Gas', color='tab:green', linestyle='--')
-    ax_sg.set_ylabel('Slag [t/h]', color='tab:brown')
-    ax_sg_twin.set_ylabel('BOF Gas [Nm³/h]', color='tab:green')
-    ax_sg.set_title('Slag & BOF Gas Production', fontsize=14)
-    ax_sg.grid(True, alpha=0.3)
-
-    # 4. CO2 Emissions
-    ax_co2 = axes[1, 1]
-    ax_co2.plot(time, results_history["co2"], color='tab:orange', linestyle='--')
-    ax_co2.set_title('CO2 Emissions', fontsize=14)
-    ax_co2.set_ylabel('[t/h]')
-    ax_co2.grid(True, alpha=0.3)
+    fig.clear()
+    fig.set_size_inches(12, 9)  # 1200x900 px at PNG_DPI
+    plot_dashboard(fig, time, {"pig_iron": pig_iron_linked, "scrap": scrap_linked,
+                               **results_history})
 
-    # 5. Oxygen Requirement
-    ax_o2 = axes[2, 0]
-    ax_o2.plot(time, results_history["oxygen_req"], color='tab:cyan')
-    ax_o2.set_title('Oxygen Requirement', fontsize=14)
-    ax_o2.set_ylabel('[Nm³/h]')
-    ax_o2.set_xlabel('Time Steps')
-    ax_o2.grid(True, alpha=0.3)
-
-    # 6. Calorific Value
-    ax_cal = axes[2, 1]
-    ax_cal.plot(time, results_history["calorific_val"], color='tab:purple')
-    ax_cal.set_title('BOF Gas Calorific Value', fontsize=14)
-    ax_cal.set_ylabel('[MJ/Nm³]')
-    ax_cal.set_xlabel('Time Steps')
-    ax_cal.grid(True, alpha=0.3)
-
-    plt.tight_layout(rect=[0, 0.03, 1, 0.97])
-    
     output_path_dash = 'bof_comprehensive_dashboard.png'
-    plt.savefig(output_path_dash)
-    print(f"Saved {output_path_dash}")
-    plt.close()
+    _save_figure(fig, output_path_dash, executor, pending)
+    plt.close(fig)
+
+    if executor is not None:
+        executor.shutdown(wait=True)
+        for future in pending:
+            print(f"Saved {future.result()}")
 
 if __name__ == "__main__":
-    visualize()
+    parser = argparse.ArgumentParser(description="BOF Digital Twin visualizations")
+    parser.add_argument("--singlecore", action="store_true",
+                        help="save figures on the main thread instead of a process pool")
+    args = parser.parse_args()
+    visualize(singlecore=args.singlecore)
@@ -3,9 +3,273 @@
 
 #Upfront: This script already includes safeguards to ensure that implausible values (too high) do not influence the calculation. The lower limit is 0.
 
+import math
+import os
+import runpy
+import sys
+from dataclasses import dataclass
+
+import numpy as np
+
+#Optional numba support, shared with the other twins (see Digital_Twin/jit_support.py).
+_JIT = runpy.run_path(os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "jit_support.py"))
+njit = _JIT["njit"]
+
+
+#Output labels in the order returned by _simulate_core.
+_OUTPUT_KEYS = (
+    "pig_iron_bf4_steelworks [t/h]",
+    "bf_gas_bf4_power_plant [m³/h]",
+    "bf_gas_bf4_intern [m³/h]",
+    "bf_gas_bf4_slab_heat [m³/h]",
+    "bf_gas_bf4_coke_plant [m³/h]",
+    "bf4_total_co2_mass_flow [t/h]",
+    "bf4_slag_mass_flow [t/h]",
+    "bf4_electricity_own [kW]",
+    "power_required [kWh/h]",
+    "oxygen_required [Nm³/h]",
+    "bf_gas_bf4_calorific_value [MJ/m³]",
+    "bf_gas_bf4_calorific_value_CP [MJ/m³]",
+    "bf_gas_bf4_calorific_value_PP [MJ/m³]",
+    "bf_gas_bf4_calorific_value_SRF [MJ/m³]",
+    "bf_gas_total_flow [m³/h]",
+    "T_hot_metal [°C]",
+    "Si [%]",
+)
+
+#All outputs set to 0, returned when the percentage distribution of the blast furnace gas deviates from 100%.
+_ZERO_VALUES = (0.0,) * len(_OUTPUT_KEYS)
+
+
+@njit
+def _round(x, scale):
+    #Half-up rounding to 1/scale, supported directly inside the compiled core (scale=100 rounds to 2 decimals).
+    return math.floor(x * scale + 0.5) / scale
+
+
+#No fastmath here: it would turn the divisions in _round into an inexact multiplication by 1/scale (0.7 -> 0.7000000000000001).
+@njit
+def _simulate_core(ore, pellets, sinter, coke_coke_plant_bf4, coke_gas_coke_plant_bf4, calorific_value_coke_gas, power,
+                   bf_gas_bf4_percentage_intern, bf_gas_bf4_percentage_power_plant,
+                   bf_gas_bf4_percentage_slab_heat_furnace, bf_gas_bf4_percentage_coke_plant,
+                   wind_volume, oxygen_enrichment):
+    #The calculation of the twin on plain floats (same order as _DEFAULTS), compiled with numba if it is installed.
+    #Returns the output values in the order of _OUTPUT_KEYS, already rounded.
+
+    #Here, a check is performed to see whether the percentage distribution of the blast furnace gas corresponds to 100%.
+    #If the distribution is not equal to 100%, all output parameters are 0, so the calculation is skipped entirely.
+    total_percentage = (bf_gas_bf4_percentage_intern + bf_gas_bf4_percentage_power_plant + bf_gas_bf4_percentage_slab_heat_furnace + bf_gas_bf4_percentage_coke_plant)
+    if total_percentage != 100:
+        return _ZERO_VALUES
+
+    # NEW: Wind-based oxygen calculation
+    wind_volume_hourly = wind_volume * 60  # Convert Nm³/min to Nm³/h
+    # Air contains 21% O2 by volume
+    O2_from_wind = 0.21 * wind_volume_hourly
+    # Oxygen enrichment (if provided separately, otherwise use wind-based O2)
+    # Total oxygen = base O2 from air + enrichment
+    oxygen = O2_from_wind + oxygen_enrichment
+
+    #The fixed calculation parameters are specified here. These have the unit resource per tonne of pig iron.
+    coke_tPI = 500  #[kg/t_pig_iron]
+    coke_gas_tPI = 1000  #[MJ/t_pig_iron]
+    power_tPI = 100  #[kWh/t_pig_iron]
+    oxygen_tPI = 100  #[Nm³/t_pig_iron]
+    #With one small exception here, to get to the masses of CO2.
+    co2_cog = 1 #[kgCO2/m^3 COG]
+
+    #The first step here is to calculate how much pig iron can be produced based on the quantity of ore, pellets and sinter supplied.
+    #Ore, pellets and sinter are each used at 1000 kg/t_pig_iron, so (x * 1000) / 1000 is simply x; the sum is computed once and reused below.
+    pig_iron_bf4_subtotal = ore + pellets + sinter
+
+    #Checking how much coke is needed to produce the calculated amount of pig iron.
+    coke_required = (coke_tPI * pig_iron_bf4_subtotal) / 1000
+
+    #Check whether the actual amount of coke transferred is sufficient to cover the required coke.
+    #If a higher amount than the required amount is fed into the blast furnace twin, only the required amount is used.
+    #If less coke is fed into the blast furnace, this value is used for further calculation.
+    coke_used = coke_coke_plant_bf4 if coke_coke_plant_bf4 <= coke_required else coke_required
+
+
+    #The quantity of pig iron produced is calculated based on the coke used.
+    #Here, the quantity of coke used has a direct influence on the pig iron output parameter.
+    pig_iron_bf4_steelworks_coke = pig_iron_bf4_subtotal * (coke_used / coke_required)
+
+    #Calculation of self-generated electricity based on a calculation formula, which was generated from process data.
+    #The amount of self-generated electricity depends on the amount of pig iron produced.
+    bf4_electricity_own = 10 * pig_iron_bf4_steelworks_coke+5000
+
+    #Calculation of the additional amount of electricity required to operate the blast furnace.
+    power_required = power_tPI * pig_iron_bf4_steelworks_coke - bf4_electricity_own
+
+    #Check whether the quantity supplied is sufficient for pig iron production, otherwise lower value and reduction in production.
+    power_used = power if power <= power_required else power_required
+
+    #The amount of pig iron produced is calculated again based on the amount of electricity supplied.
+    pig_iron_bf4_steelworks_coke_power = pig_iron_bf4_steelworks_coke * (power_used / power_required)
+
+    #Calculation of the required amount of oxygen (O2)
+    oxygen_required = oxygen_tPI * pig_iron_bf4_steelworks_coke_power
+
+    #Check whether the quantity supplied is sufficient for pig iron production, otherwise lower value and reduction in production.
+    oxygen_used = oxygen if oxygen <= oxygen_required else oxygen_required
+
+    #Calculation of the energy flow from coke gas
+    energy_flow_coke_gas_in = coke_gas_coke_plant_bf4 * calorific_value_coke_gas
+
+    #Calculation of how much coke gas is needed for pig iron production
+    energy_flow_coke_gas_required = pig_iron_bf4_steelworks_coke_power * coke_gas_tPI
+
+    # NEW: COG combustion limited by available air (wind)
+    # COG needs air for combustion - stoichiometric constraint
+    max_cog_by_wind = wind_volume_hourly * 5.0  # Empirical factor: max COG per unit wind
+
+    #Check whether the amount of coke gas introduced is sufficient and within wind constraints
+    coke_gas_used = min(energy_flow_coke_gas_in, energy_flow_coke_gas_required, max_cog_by_wind)
+
+    #Recalculation of how much pig iron can be produced based on the parameters coke, power, oxygen and coke gas.
+    # FIXED: Safety check to avoid division by zero
+    if energy_flow_coke_gas_required > 0:
+        cog_factor = coke_gas_used / energy_flow_coke_gas_required
+    else:
+        cog_factor = 1.0  # If no COG required, assume full production capability
+
+    pig_iron_bf4_steelworks = pig_iron_bf4_steelworks_coke_power * (oxygen_used / oxygen_required) * cog_factor
+
+    # NEW: Thermal balance calculation
+    # Heat inputs: wind + COG + coke
+    # Higher heat → higher T_hot_metal → lower Si
+    heat_from_wind = wind_volume * 0.3  # Relative heat contribution from blast air
+    heat_from_cog = coke_gas_used * 0.001  # Heat from COG combustion
+    heat_from_coke = coke_used * 15  # High calorific value from coke
+
+    total_heat_index = heat_from_wind + heat_from_cog + heat_from_coke
+    baseline_heat = 5000  # Nominal operating point
+
+    # Temperature: increases with heat input
+    T_hot_metal = 1450 + (total_heat_index - baseline_heat) * 0.05
+    T_hot_metal = max(1400, min(1550, T_hot_metal))  # Clamp to realistic range
+
+    # Si content: decreases as temperature increases (inverse relationship)
+    si_baseline = 0.5  # % at nominal conditions
+    si_content = si_baseline - (T_hot_metal - 1500) * 0.002
+    si_content = max(0.2, min(0.8, si_content))  # Clamp to realistic range
+
+    # FIXED: Wind-based BFG production with realistic coefficients
+    # BFG is primarily produced from air blown through the furnace
+    # Empirical formula: BFG ∝ wind_volume (not pig_iron)
+    # Realistic coefficients for steel plant scale:
+    #   - Wind = 4000 Nm³/min = 240,000 Nm³/h
+    #   - BFG should be 100,000-200,000 Nm³/h (1:2-1:1 ratio to wind)
+    #   - α=0.4, β=20000 gives ~116,000 Nm³/h at nominal wind
+    total_bf_gas_volume_flow_bf4 = 0.4 * wind_volume_hourly + 20000
+
+    #Calculation of the absolute values of blast furnace gas for internal use, power plant, slab heat and coke plant.
+    #In this version of the twin, the percentage distribution is entered manually (input).
+    bf_gas_bf4_intern = bf_gas_bf4_percentage_intern / 100 * total_bf_gas_volume_flow_bf4
+    bf_gas_bf4_power_plant = bf_gas_bf4_percentage_power_plant / 100 * total_bf_gas_volume_flow_bf4
+    bf_gas_bf4_slab_heat = bf_gas_bf4_percentage_slab_heat_furnace / 100 * total_bf_gas_volume_flow_bf4
+    bf_gas_bf4_coke_plant = bf_gas_bf4_percentage_coke_plant / 100 * total_bf_gas_volume_flow_bf4
+
+    #Calculation of the CO2 mass flow as a function of the quantity of pig iron produced.
+    bf4_total_co2_mass_flow = total_bf_gas_volume_flow_bf4 / 1000 + coke_gas_coke_plant_bf4 * co2_cog
+
+    #Calculation of the calorific value depending on the quantity of pig iron produced or the quantity of blast furnace gas produced.
+    bf_gas_bf4_calorific_value = _round(0.01 * pig_iron_bf4_steelworks, 100)
+
+    #Calculation of the amount of slag depending on the amount of pig iron produced.
+    #Slag equals the pig iron output, so both share the value rounded once for the return.
+    pig_iron_bf4_steelworks = _round(pig_iron_bf4_steelworks, 100)
+    bf4_slag_mass_flow = pig_iron_bf4_steelworks
+
+    #Since blast furnace gas is transferred to three twins, the calorific value must also be transferred in addition to the volume flows.
+    #Therefore, three variables with the same (already rounded) value are defined here.
+    bf_gas_bf4_calorific_value_CP = bf_gas_bf4_calorific_value
+
+    bf_gas_bf4_calorific_value_PP = bf_gas_bf4_calorific_value
+
+    bf_gas_bf4_calorific_value_SRF = bf_gas_bf4_calorific_value
+
+    #Only the returned values are rounded, each distinct value once.
+    return (
+        pig_iron_bf4_steelworks,
+        _round(bf_gas_bf4_power_plant, 100),
+        _round(bf_gas_bf4_intern, 100),
+        _round(bf_gas_bf4_slab_heat, 100),
+        _round(bf_gas_bf4_coke_plant, 100),
+        _round(bf4_total_co2_mass_flow, 100),
+        bf4_slag_mass_flow,
+        _round(bf4_electricity_own, 100),
+        _round(power_required, 100),
+        _round(oxygen_required, 100),
+        bf_gas_bf4_calorific_value,
+        bf_gas_bf4_calorific_value_CP,
+        bf_gas_bf4_calorific_value_PP,
+        bf_gas_bf4_calorific_value_SRF,
+        _round(total_bf_gas_volume_flow_bf4, 100),
+        _round(T_hot_metal, 10),
+        _round(si_content, 1000),
+    )
+
+
+#dataclass(slots=True) needs Python 3.10+; older interpreters get a plain dataclass.
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_SLOTS)
+class BFInputs: #Typed inputs (fields and defaults in BlastFurnaceTwin._DEFAULTS order); pass directly to BlastFurnaceTwin to skip the dict lookups.
+    ore: float = 50.0 #[t/h]
+    pellets: float = 100.0 #[t/h]
+    sinter: float = 100.0 #[t/h]
+    coke_mass_flow: float = 100.0 #[t/h]
+    coke_gas_coke_plant: float = 20000.0 #[m³/h]
+    calorific_value_coke_gas: float = 20.0 #[MJ/m³]
+    power: float = 50000.0 #[kWh/h]
+    bf_gas_percentage_intern: float = 50.0 #[%]
+    bf_gas_percentage_power_plant: float = 20.0 #[%]
+    bf_gas_percentage_slab_heat_furnace: float = 20.0 #[%]
+    bf_gas_percentage_coke_plant: float = 10.0 #[%]
+    wind_volume: float = 4000.0 #[Nm³/min] Blast air volume
+    oxygen_enrichment: float = 0.0 #[Nm³/h] Oxygen enrichment on top of the O2 in the blast air
+
+    def values(self) -> tuple: #The inputs as floats, in the order _simulate_core takes them.
+        return (float(self.ore), float(self.pellets), float(self.sinter), float(self.coke_mass_flow),
+                float(self.coke_gas_coke_plant), float(self.calorific_value_coke_gas), float(self.power),
+                float(self.bf_gas_percentage_intern), float(self.bf_gas_percentage_power_plant),
+                float(self.bf_gas_percentage_slab_heat_furnace), float(self.bf_gas_percentage_coke_plant),
+                float(self.wind_volume), float(self.oxygen_enrichment))
+
+    @classmethod
+    def from_dict(cls, inputs: dict) -> "BFInputs": #Built from a unit-labelled input dict (missing labels use the defaults).
+        return cls(*[float(inputs.get(k, d)) for k, d in BlastFurnaceTwin._DEFAULTS])
+
+    def to_dict(self) -> dict: #The unit-labelled input dict of the dict interface.
+        return dict(zip([k for k, _ in BlastFurnaceTwin._DEFAULTS], self.values()))
+
+
 class BlastFurnaceTwin: #Name of the twin to be called up in the multi-agent system
+    #Input labels with the default values used for the variables in the code, in the order in which they are unpacked in __call__.
+    _DEFAULTS = (
+        ("ore [t/h]", 50),
+        ("pellets [t/h]", 100),
+        ("sinter [t/h]", 100),
+        ("coke_mass_flow_bf4 [t/h]", 100),
+        ("coke_gas_coke_plant_bf4 [m³/h]", 20000),
+        ("calorific_value_coke_gas_bf4 [MJ/m³]", 20),
+        ("power [kWh/h]", 50000),
+        ("intern BF_GAS_PERCENTAGE [%]", 50),
+        ("power plant BF_GAS_PERCENTAGE [%]", 20),
+        ("slab heat furnace BF_GAS_PERCENTAGE [%]", 20),
+        ("coke plant BF_GAS_PERCENTAGE [%]", 10),
+        ("wind_volume [Nm³/min]", 4000),  # Blast air volume
+        ("oxygen_enrichment [Nm³/h]", 0),  # Oxygen enrichment on top of the O2 in the blast air
+    )
+    _ZERO_OUTPUT = dict(zip(_OUTPUT_KEYS, _ZERO_VALUES)) #Result for an invalid percentage distribution of the blast furnace gas.
+
     def __init__(self, **params): #Initialises the class with user-defined parameters.
         self.params = params #All arguments are stored in the 'params' dictionary.
+        self._cache = {} #Results of previous calls, keyed by the float input values (the twin is a pure function of its inputs).
         
 
     def default_inputs(self): #Returns a dictionary containing the default input values, used if no specific inputs are provided by the user in the multi-agent system.
@@ -28,205 +292,122 @@ class BlastFurnaceTwin: #Name of the twin to be called up in the multi-agent sys
             "coke plant BF_GAS_PERCENTAGE [%]": 10
         }
 
-    def __call__(self, inputs):
-        return self.simulate(inputs)  #Makes the class instance callable like a function. When called with an input dictionary, it executes the 'simulate' method in the multi-agent system.
-
-    def __call__(self, inputs: dict) -> dict: #Callable version with type hints. Expects a dictionary as input and returns a dictionary as output.
+    def __call__(self, inputs) -> dict: #Callable version with type hints. Expects a dictionary (or a BFInputs instance) as input and returns a dictionary as output.
 
         #Here, the values entered, e.g. 'ore [t/h]', are defined as variables, e.g. ore.
         #The variable is used for calculations in the rest of the code.
         #The label with the unit is displayed in the current multi-agent system so that the user knows which parameter to specify in which unit.
-        ore = inputs.get("ore [t/h]", 50) #Here, additional default values are specified, only this time for the variables in the code.
-        pellets = inputs.get("pellets [t/h]", 100)
-        sinter = inputs.get("sinter [t/h]", 100)
-        coke_coke_plant_bf4 = inputs.get("coke_mass_flow_bf4 [t/h]", 100)
-        coke_gas_coke_plant_bf4 = inputs.get("coke_gas_coke_plant_bf4 [m³/h]", 20000)
-        calorific_value_coke_gas = inputs.get("calorific_value_coke_gas_bf4 [MJ/m³]", 20)
-        power = inputs.get("power [kWh/h]", 50000)
-        bf_gas_bf4_percentage_intern = inputs.get("intern BF_GAS_PERCENTAGE [%]", 50)
-        bf_gas_bf4_percentage_power_plant = inputs.get("power plant BF_GAS_PERCENTAGE [%]", 20)
-        bf_gas_bf4_percentage_slab_heat_furnace = inputs.get("slab heat furnace BF_GAS_PERCENTAGE [%]", 20)
-        bf_gas_bf4_percentage_coke_plant = inputs.get("coke plant BF_GAS_PERCENTAGE [%]", 10)
-        
-        # NEW: Wind-based oxygen calculation
-        wind_volume = inputs.get("wind_volume [Nm³/min]", 4000)  # Blast air volume
-        # Air contains 21% O2 by volume
-        O2_from_wind = 0.21 * wind_volume * 60  # Convert Nm³/min to Nm³/h
-        # Oxygen enrichment (if provided separately, otherwise use wind-based O2)
-        oxygen_enrichment = inputs.get("oxygen_enrichment [Nm³/h]", 0)
-        # Total oxygen = base O2 from air + enrichment
-        oxygen = O2_from_wind + oxygen_enrichment
-
-        #The fixed calculation parameters are specified here. These have the unit resource per tonne of pig iron.
-        ore_tPI = 1000  #[kg/t_pig_iron]
-        pellets_tPI = 1000  #[kg/t_pig_iron]
-        sinter_tPI = 1000  #[kg/t_pig_iron]
+        #Missing labels fall back to the default values in _DEFAULTS, all read in a single pass and handed to the compiled core as floats.
+        #BFInputs skip the label lookups and provide their float values directly.
+        values = inputs.values() if isinstance(inputs, BFInputs) else tuple([float(inputs.get(k, d)) for k, d in self._DEFAULTS])
+
+        #Repeated calls with identical inputs (sweeps, dashboards, demos) are served from the cache, keyed by the float values read above.
+        #A copy is returned so that callers may modify the result without corrupting the cache.
+        cached = self._cache.get(values)
+        if cached is not None:
+            return dict(cached)
+        if len(self._cache) >= 4096: #Keep the memory bounded for long runs with ever-changing inputs.
+            self._cache.clear()
+
+        #The percentage distribution of the blast furnace gas is checked first; if it deviates from 100%, all outputs are 0 and no calculation is needed.
+        if values[7] + values[8] + values[9] + values[10] != 100:
+            return dict(self._ZERO_OUTPUT)
+
+        #The output parameters in the multi-agent system are output using 'return' (after being stored in the cache).
+        #The calculated variables are passed on to the respective twin. The user is shown the respective text 'pig_iron_bf4_steelworks [t/h]' with the corresponding variable (pig_iron_bf4_steelworks).
+        result = dict(zip(_OUTPUT_KEYS, _simulate_core(*values)))
+        self._cache[values] = result
+        return dict(result)
+
+    def simulate_batch(self, inputs: dict, dtype=np.float64) -> dict: #Vectorized version of __call__ for sweeps and dashboards.
+        #Each input label maps to an array of shape (N,) (scalars are broadcast); every output label maps to an ndarray of shape (N,).
+        #The calculation is the same as in _simulate_core, with the scalar min/max clamps and branches replaced by their elementwise NumPy forms.
+        (ore, pellets, sinter, coke_coke_plant_bf4, coke_gas_coke_plant_bf4, calorific_value_coke_gas, power,
+         bf_gas_bf4_percentage_intern, bf_gas_bf4_percentage_power_plant,
+         bf_gas_bf4_percentage_slab_heat_furnace, bf_gas_bf4_percentage_coke_plant,
+         wind_volume, oxygen_enrichment) = np.broadcast_arrays(
+            *[np.asarray(inputs.get(k, d), dtype=dtype) for k, d in self._DEFAULTS])
+
+        wind_volume_hourly = wind_volume * 60
+        oxygen = 0.21 * wind_volume_hourly + oxygen_enrichment
+
+        #Fixed calculation parameters, same as in _simulate_core.
         coke_tPI = 500  #[kg/t_pig_iron]
         coke_gas_tPI = 1000  #[MJ/t_pig_iron]
         power_tPI = 100  #[kWh/t_pig_iron]
         oxygen_tPI = 100  #[Nm³/t_pig_iron]
-        #With one small exception here, to get to the masses of CO2.
         co2_cog = 1 #[kgCO2/m^3 COG]
 
-        #The first step here is to calculate how much pig iron can be produced based on the quantity of ore, pellets and sinter supplied.
-        pig_iron_bf4_subtotal = round(((ore * 1000) / ore_tPI + (pellets * 1000) / pellets_tPI + (sinter * 1000) / sinter_tPI), 2)
-
-        #Checking how much coke is needed to produce the calculated amount of pig iron.
-        coke_required = round((coke_tPI * pig_iron_bf4_subtotal) / 1000,2)
-
-        #Check whether the actual amount of coke transferred is sufficient to cover the required coke.
-        #If a higher amount than the required amount is fed into the blast furnace twin, only the required amount is used.
-        #If less coke is fed into the blast furnace, this value is used for further calculation.
-        coke_used = coke_coke_plant_bf4 if coke_coke_plant_bf4 <= coke_required else coke_required
-
-
-        #The quantity of pig iron produced is calculated based on the coke used.
-        #Here, the quantity of coke used has a direct influence on the pig iron output parameter.
-        pig_iron_bf4_steelworks_coke = round(((ore * 1000) / ore_tPI + (pellets * 1000) / pellets_tPI + (sinter * 1000) / sinter_tPI) * (coke_used / coke_required), 2)
-
-        #Calculation of self-generated electricity based on a calculation formula, which was generated from process data.
-        #The amount of self-generated electricity depends on the amount of pig iron produced.
-        bf4_electricity_own = round(10 * pig_iron_bf4_steelworks_coke+5000, 2)
-
-        #Calculation of the additional amount of electricity required to operate the blast furnace.
-        power_required = round(power_tPI * pig_iron_bf4_steelworks_coke - bf4_electricity_own,2)
-
-        #Check whether the quantity supplied is sufficient for pig iron production, otherwise lower value and reduction in production.
-        power_used = power if power <= power_required else power_required
-
-        #The amount of pig iron produced is calculated again based on the amount of electricity supplied.
-        pig_iron_bf4_steelworks_coke_power = round(((ore * 1000) / ore_tPI + (pellets * 1000) / pellets_tPI + (sinter * 1000) / sinter_tPI) * (coke_used / coke_required) * (power_used / power_required), 2)
-
-        #Calculation of the required amount of oxygen (O2)
-        oxygen_required = round(oxygen_tPI * pig_iron_bf4_steelworks_coke_power, 2)
-
-        #Check whether the quantity supplied is sufficient for pig iron production, otherwise lower value and reduction in production.
-        oxygen_used = oxygen if oxygen <= oxygen_required else oxygen_required
-
-        #Calculation of the energy flow from coke gas
-        energy_flow_coke_gas_in = coke_gas_coke_plant_bf4 * calorific_value_coke_gas
-
-        #Calculation of how much coke gas is needed for pig iron production
-        energy_flow_coke_gas_required = round(pig_iron_bf4_steelworks_coke_power * coke_gas_tPI, 2)
-
-        # NEW: COG combustion limited by available air (wind)
-        # COG needs air for combustion - stoichiometric constraint
-        wind_volume_hourly = wind_volume * 60  # Convert to Nm³/h
-        max_cog_by_wind = wind_volume_hourly * 5.0  # Empirical factor: max COG per unit wind
-        
-        #Check whether the amount of coke gas introduced is sufficient and within wind constraints
-        coke_gas_used = min(energy_flow_coke_gas_in, energy_flow_coke_gas_required, max_cog_by_wind)
-
-        #Recalculation of how much pig iron can be produced based on the parameters coke, power, oxygen and coke gas.
-        # FIXED: Safety check to avoid division by zero
-        if energy_flow_coke_gas_required > 0:
-            cog_factor = coke_gas_used / energy_flow_coke_gas_required
-        else:
-            cog_factor = 1.0  # If no COG required, assume full production capability
-        
-        pig_iron_bf4_steelworks = round(((ore * 1000) / ore_tPI + (pellets * 1000) / pellets_tPI + (sinter * 1000) / sinter_tPI) * (coke_used / coke_required) * (power_used / power_required) * (oxygen_used / oxygen_required) * cog_factor, 2)
-
-        # NEW: Thermal balance calculation
-        # Heat inputs: wind + COG + coke
-        # Higher heat → higher T_hot_metal → lower Si
-        heat_from_wind = wind_volume * 0.3  # Relative heat contribution from blast air
-        heat_from_cog = coke_gas_used * 0.001  # Heat from COG combustion
-        heat_from_coke = coke_used * 15  # High calorific value from coke
-        
-        total_heat_index = heat_from_wind + heat_from_cog + heat_from_coke
-        baseline_heat = 5000  # Nominal operating point
-        
-        # Temperature: increases with heat input
-        T_hot_metal = round(1450 + (total_heat_index - baseline_heat) * 0.05, 1)
-        T_hot_metal = max(1400, min(1550, T_hot_metal))  # Clamp to realistic range
-        
-        # Si content: decreases as temperature increases (inverse relationship)
-        si_baseline = 0.5  # % at nominal conditions
-        si_content = round(si_baseline - (T_hot_metal - 1500) * 0.002, 3)
-        si_content = max(0.2, min(0.8, si_content))  # Clamp to realistic range
-
-        # FIXED: Wind-based BFG production with realistic coefficients
-        # BFG is primarily produced from air blown through the furnace
-        # Empirical formula: BFG ∝ wind_volume (not pig_iron)
-        # Realistic coefficients for steel plant scale:
-        #   - Wind = 4000 Nm³/min = 240,000 Nm³/h
-        #   - BFG should be 100,000-200,000 Nm³/h (1:2-1:1 ratio to wind)
-        #   - α=0.4, β=20000 gives ~116,000 Nm³/h at nominal wind
-        total_bf_gas_volume_flow_bf4 = round(0.4 * wind_volume_hourly + 20000, 2)
-
-        #Calculation of the absolute values of blast furnace gas for internal use, power plant, slab heat and coke plant.
-        #In this version of the twin, the percentage distribution is entered manually (input).
-        bf_gas_bf4_intern = round(bf_gas_bf4_percentage_intern / 100 * total_bf_gas_volume_flow_bf4, 2)
-        bf_gas_bf4_power_plant = round(bf_gas_bf4_percentage_power_plant / 100 * total_bf_gas_volume_flow_bf4, 2)
-        bf_gas_bf4_slab_heat = round(bf_gas_bf4_percentage_slab_heat_furnace / 100 * total_bf_gas_volume_flow_bf4, 2)
-        bf_gas_bf4_coke_plant = round(bf_gas_bf4_percentage_coke_plant / 100 * total_bf_gas_volume_flow_bf4, 2)
-
-        #Calculation of the CO2 mass flow as a function of the quantity of pig iron produced.
-        bf4_total_co2_mass_flow = round((total_bf_gas_volume_flow_bf4 / 1000 + coke_gas_coke_plant_bf4 * co2_cog),2)
-
-        #Calculation of the amount of slag depending on the amount of pig iron produced.
-        bf4_slag_mass_flow = round(pig_iron_bf4_steelworks, 2)
-
-        #Calculation of the calorific value depending on the quantity of pig iron produced or the quantity of blast furnace gas produced.
-        bf_gas_bf4_calorific_value = round(0.01 * pig_iron_bf4_steelworks, 2)
-
-        #Since blast furnace gas is transferred to three twins, the calorific value must also be transferred in addition to the volume flows.
-        #Therefore, three variables with the same value are defined here.
-        bf_gas_bf4_calorific_value_CP = bf_gas_bf4_calorific_value
-
-        bf_gas_bf4_calorific_value_PP = bf_gas_bf4_calorific_value
-
-        bf_gas_bf4_calorific_value_SRF = bf_gas_bf4_calorific_value
-
-        #Here, a check is performed to see whether the percentage distribution of the blast furnace gas corresponds to 100%.
-        #If the distribution is not equal to 100%, all output parameters are set to 0.
-        total_percentage = (bf_gas_bf4_percentage_intern + bf_gas_bf4_percentage_power_plant + bf_gas_bf4_percentage_slab_heat_furnace + bf_gas_bf4_percentage_coke_plant)
-
-        if total_percentage != 100:
-            pig_iron_bf4_steelworks = 0
-            bf_gas_bf4_power_plant = 0
-            bf_gas_bf4_intern = 0
-            bf_gas_bf4_slab_heat = 0
-            bf_gas_bf4_coke_plant = 0
-            bf4_total_co2_mass_flow = 0
-            bf4_slag_mass_flow = 0
-            bf4_electricity_own = 0
-            power_required = 0
-            oxygen_required = 0
-            bf_gas_bf4_calorific_value = 0
-            bf_gas_bf4_calorific_value_CP = 0
-            bf_gas_bf4_calorific_value_PP = 0
-            bf_gas_bf4_calorific_value_SRF = 0
-            total_bf_gas_volume_flow_bf4 = 0
-            T_hot_metal = 0
-            si_content = 0
-
-        #The output parameters in the multi-agent system are output using 'return'.
-        #The calculated variables are passed on to the respective twin. The user is shown the respective text 'pig_iron_bf4_steelworks [t/h]' with the corresponding variable (pig_iron_bf4_steelworks).
-        return {
-            "pig_iron_bf4_steelworks [t/h]": round(pig_iron_bf4_steelworks,2),
-            "bf_gas_bf4_power_plant [m³/h]": bf_gas_bf4_power_plant,
-            "bf_gas_bf4_intern [m³/h]": bf_gas_bf4_intern,
-            "bf_gas_bf4_slab_heat [m³/h]": bf_gas_bf4_slab_heat,
-            "bf_gas_bf4_coke_plant [m³/h]": bf_gas_bf4_coke_plant,
-            "bf4_total_co2_mass_flow [t/h]": round(bf4_total_co2_mass_flow,2),
-            "bf4_slag_mass_flow [t/h]": bf4_slag_mass_flow,
-            "bf4_electricity_own [kW]": bf4_electricity_own,
-            "power_required [kWh/h]": power_required,
-            "oxygen_required [Nm³/h]": oxygen_required,
-            "bf_gas_bf4_calorific_value [MJ/m³]": bf_gas_bf4_calorific_value,
-            "bf_gas_bf4_calorific_value_CP [MJ/m³]": bf_gas_bf4_calorific_value_CP,
-            "bf_gas_bf4_calorific_value_PP [MJ/m³]": bf_gas_bf4_calorific_value_PP,
-            "bf_gas_bf4_calorific_value_SRF [MJ/m³]": bf_gas_bf4_calorific_value_SRF,
-            "bf_gas_total_flow [m³/h]": round(total_bf_gas_volume_flow_bf4,2),
-            "T_hot_metal [°C]": T_hot_metal,  # NEW: Thermal output
-            "Si [%]": si_content,  # NEW: Silicon content
-        }
+        pig_iron_bf4_subtotal = ore + pellets + sinter
+        coke_required = (coke_tPI * pig_iron_bf4_subtotal) / 1000
+        coke_used = np.where(coke_coke_plant_bf4 <= coke_required, coke_coke_plant_bf4, coke_required)
+
+        #Rows the scalar core never calculates (invalid gas split) may divide by zero here; they are set to 0 at the end.
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pig_iron_bf4_steelworks_coke = pig_iron_bf4_subtotal * (coke_used / coke_required)
+
+            bf4_electricity_own = 10 * pig_iron_bf4_steelworks_coke + 5000
+            power_required = power_tPI * pig_iron_bf4_steelworks_coke - bf4_electricity_own
+            power_used = np.where(power <= power_required, power, power_required)
+            pig_iron_bf4_steelworks_coke_power = pig_iron_bf4_steelworks_coke * (power_used / power_required)
+
+            oxygen_required = oxygen_tPI * pig_iron_bf4_steelworks_coke_power
+            oxygen_used = np.where(oxygen <= oxygen_required, oxygen, oxygen_required)
+
+            energy_flow_coke_gas_in = coke_gas_coke_plant_bf4 * calorific_value_coke_gas
+            energy_flow_coke_gas_required = pig_iron_bf4_steelworks_coke_power * coke_gas_tPI
+            max_cog_by_wind = wind_volume_hourly * 5.0
+            coke_gas_used = np.minimum(np.minimum(energy_flow_coke_gas_in, energy_flow_coke_gas_required), max_cog_by_wind)
+
+            #If no COG is required, full production capability is assumed (cog_factor 1).
+            cog_factor = np.where(energy_flow_coke_gas_required > 0, coke_gas_used / energy_flow_coke_gas_required, 1.0)
+
+            pig_iron_bf4_steelworks = pig_iron_bf4_steelworks_coke_power * (oxygen_used / oxygen_required) * cog_factor
+
+        #Thermal balance with the temperature and Si clamps.
+        total_heat_index = wind_volume * 0.3 + coke_gas_used * 0.001 + coke_used * 15
+        T_hot_metal = np.clip(1450 + (total_heat_index - 5000) * 0.05, 1400, 1550)
+        si_content = np.clip(0.5 - (T_hot_metal - 1500) * 0.002, 0.2, 0.8)
+
+        total_bf_gas_volume_flow_bf4 = 0.4 * wind_volume_hourly + 20000
+        bf4_total_co2_mass_flow = total_bf_gas_volume_flow_bf4 / 1000 + coke_gas_coke_plant_bf4 * co2_cog
+        bf_gas_bf4_calorific_value = 0.01 * pig_iron_bf4_steelworks
+
+        #Rows whose percentage distribution of the blast furnace gas does not add up to 100% are set to 0 (np.where, since NaN * 0 would stay NaN).
+        mask = (bf_gas_bf4_percentage_intern + bf_gas_bf4_percentage_power_plant
+                + bf_gas_bf4_percentage_slab_heat_furnace + bf_gas_bf4_percentage_coke_plant) == 100
+
+        values = (
+            (pig_iron_bf4_steelworks, 100),
+            (bf_gas_bf4_percentage_power_plant / 100 * total_bf_gas_volume_flow_bf4, 100),
+            (bf_gas_bf4_percentage_intern / 100 * total_bf_gas_volume_flow_bf4, 100),
+            (bf_gas_bf4_percentage_slab_heat_furnace / 100 * total_bf_gas_volume_flow_bf4, 100),
+            (bf_gas_bf4_percentage_coke_plant / 100 * total_bf_gas_volume_flow_bf4, 100),
+            (bf4_total_co2_mass_flow, 100),
+            (pig_iron_bf4_steelworks, 100),
+            (bf4_electricity_own, 100),
+            (power_required, 100),
+            (oxygen_required, 100),
+            (bf_gas_bf4_calorific_value, 100),
+            (bf_gas_bf4_calorific_value, 100),
+            (bf_gas_bf4_calorific_value, 100),
+            (bf_gas_bf4_calorific_value, 100),
+            (total_bf_gas_volume_flow_bf4, 100),
+            (T_hot_metal, 10),
+            (si_content, 1000),
+        )
+        #Same half-up rounding as _round in the scalar core.
+        return {key: np.floor(np.where(mask, value, 0.0) * scale + 0.5) / scale
+                for key, (value, scale) in zip(_OUTPUT_KEYS, values)}
+
+    batch = simulate_batch #Common batch API of the twins: dict of (N,) arrays in, dict of (N,) arrays out.
 
 
 #This function allows the script to be executed directly in the python/editor environment. Corresponding input variables are defined.
-model = BlastFurnaceTwin()
-result = model({"ore [t/h]": 50, "pellets [t/h]": 100, "sinter [t/h]": 100,
-                "coke_mass_flow_bf4 [t/h]": 100, "coke_gas_coke_plant_bf4 [m³/h]": 20000,"calorific_value_coke_gas_bf4 [MJ/m³]":20, "power [kWh/h]": 50000, "oxygen [m³/h]": 50000, "wind_volume [Nm³/min]": 4000, "intern BF_GAS_PERCENTAGE [%]":50,"power plant BF_GAS_PERCENTAGE [%]":20, "slab heat furnace BF_GAS_PERCENTAGE [%]":20, "coke plant BF_GAS_PERCENTAGE [%]":10})
-for x, value in result.items():
-    print(f"{x}: {value}")
\ No newline at end of file
+#The demo only runs when the script is executed directly, not when the twin is imported.
+if __name__ == "__main__":
+    model = BlastFurnaceTwin()
+    result = model({"ore [t/h]": 50, "pellets [t/h]": 100, "sinter [t/h]": 100,
+                    "coke_mass_flow_bf4 [t/h]": 100, "coke_gas_coke_plant_bf4 [m³/h]": 20000,"calorific_value_coke_gas_bf4 [MJ/m³]":20, "power [kWh/h]": 50000, "oxygen [m³/h]": 50000, "wind_volume [Nm³/min]": 4000, "intern BF_GAS_PERCENTAGE [%]":50,"power plant BF_GAS_PERCENTAGE [%]":20, "slab heat furnace BF_GAS_PERCENTAGE [%]":20, "coke plant BF_GAS_PERCENTAGE [%]":10})
+    for x, value in result.items():
+        print(f"{x}: {value}")
\ No newline at end of file
@@ -3,6 +3,95 @@ import numpy as np
 from Blast_Furnace_Twin_to_share import BlastFurnaceTwin
 import os
 
+# Fast PNG encoding for the dashboard: low zlib effort and no optimize pass
+PNG_KWARGS = {"compress_level": 1, "optimize": False}
+PNG_DPI = 100
+
+# Let Agg drop line vertices that move less than a pixel
+plt.rcParams['path.simplify'] = True
+plt.rcParams['path.simplify_threshold'] = 1.0
+
+# Upper bound on the points drawn per dashboard series; longer runs are decimated
+MAX_PLOT_POINTS = 500
+
+def plot_dashboard(fig, time, series):
+    """Draw the dashboard of the time series (by series name) into fig.
+
+    Series longer than MAX_PLOT_POINTS are decimated before plotting.
+    """
+    stride = max(1, len(time) // MAX_PLOT_POINTS)
+    time = time[::stride]
+    series = {name: values[::stride] for name, values in series.items()}
+
+    axes = fig.subplots(4, 2, sharex=True)
+    fig.suptitle('Blast Furnace Digital Twin - Comprehensive Dashboard', fontsize=20)
+
+    # 1. Inputs
+    ax_in = axes[0, 0]
+    ax_in.plot(time, series["ore"], label='Ore [t/h]')
+    ax_in.plot(time, series["coke"], label='Coke [t/h]')
+    ax_in.set_title('Linked Input Fluctuations', fontsize=14)
+    ax_in.set_ylabel('Mass Flow [t/h]')
+    ax_in.legend(loc='upper right')
+    ax_in.grid(True, alpha=0.3)
+
+    # 2. Pig Iron Output
+    ax_pi = axes[0, 1]
+    ax_pi.plot(time, series["pig_iron"], color='tab:red', linewidth=2)
+    ax_pi.set_title('Pig Iron Production', fontsize=14)
+    ax_pi.set_ylabel('[t/h]')
+    ax_pi.grid(True, alpha=0.3)
+
+    # 3. BF Gas Total
+    ax_gas = axes[1, 0]
+    ax_gas.plot(time, series["bf_gas_total"], color='tab:green', label='Total Gas')
+    ax_gas.set_title('Total BF Gas Production', fontsize=14)
+    ax_gas.set_ylabel('[m³/h]')
+    ax_gas.grid(True, alpha=0.3)
+
+    # 4. BF Gas Distribution (Stacked)
+    ax_dist = axes[1, 1]
+    ax_dist.stackplot(time, series["bf_gas_intern"], series["bf_gas_power"],
+                      series["bf_gas_slab"], series["bf_gas_coke"],
+                      labels=['Intern', 'Power Plant', 'Slab Heat', 'Coke Plant'],
+                      alpha=0.7)
+    ax_dist.legend(loc='upper left', fontsize='small')
+    ax_dist.set_title('BF Gas Distribution', fontsize=14)
+    ax_dist.set_ylabel('[m³/h]')
+    ax_dist.grid(True, alpha=0.3)
+
+    # 5. CO2 Emissions
+    ax_co2 = axes[2, 0]
+    ax_co2.plot(time, series["co2"], color='tab:grey', linestyle='--')
+    ax_co2.set_title('CO2 Emissions', fontsize=14)
+    ax_co2.set_ylabel('[t/h]')
+    ax_co2.grid(True, alpha=0.3)
+
+    # 6. Power (Required vs Own)
+    ax_pwr = axes[2, 1]
+    ax_pwr.plot(time, series["power_req"], label='Required', color='tab:orange')
+    ax_pwr.plot(time, series["power_own"], label='Own Gen', color='tab:purple')
+    ax_pwr.set_title('Power Balance', fontsize=14)
+    ax_pwr.set_ylabel('[kWh/h] / [kW]')
+    ax_pwr.legend()
+    ax_pwr.grid(True, alpha=0.3)
+
+    # 7. Oxygen Demand
+    ax_o2 = axes[3, 0]
+    ax_o2.plot(time, series["oxygen_req"], color='tab:cyan')
+    ax_o2.set_title('Oxygen Requirement', fontsize=14)
+    ax_o2.set_ylabel('[Nm³/h]')
+    ax_o2.set_xlabel('Time Steps')
+    ax_o2.grid(True, alpha=0.3)
+
+    # 8. Calorific Value
+    ax_cal = axes[3, 1]
+    ax_cal.plot(time, series["calorific_val"], color='tab:brown')
+    ax_cal.set_title('BF Gas Calorific Value', fontsize=14)
+    ax_cal.set_ylabel('[MJ/m³]')
+    ax_cal.set_xlabel('Time Steps')
+    ax_cal.grid(True, alpha=0.3)
+
 def visualize():
     # Initialize model
     model = BlastFurnaceTwin()
@@ -11,18 +100,14 @@ def visualize():
     # --- 1. Sensitivity Analysis: Ore vs Pig Iron & CO2 ---
     print("Running Sensitivity Analysis...")
     ore_values = np.arange(0, 105, 5)
-    pig_iron_values = []
-    co2_values = []
-
-    for ore in ore_values:
-        inputs = default_inputs.copy()
-        inputs["ore [t/h]"] = ore
-        
-        # Run simulation
-        results = model(inputs)
-        
-        pig_iron_values.append(results["pig_iron_bf4_steelworks [t/h]"])
-        co2_values.append(results["bf4_total_co2_mass_flow [t/h]"])
+    inputs = {k: np.full(len(ore_values), v) for k, v in default_inputs.items()}
+    inputs["ore [t/h]"] = ore_values
+
+    # Run the whole sweep in one vectorized call
+    results = model.simulate_batch(inputs)
+
+    pig_iron_values = results["pig_iron_bf4_steelworks [t/h]"]
+    co2_values = results["bf4_total_co2_mass_flow [t/h]"]
 
     # Plotting
     fig, ax1 = plt.subplots(figsize=(10, 6))
@@ -65,7 +150,10 @@ def visualize():
     # Pie Chart
     fig2, ax3 = plt.subplots(figsize=(8, 8))
     colors = ['#ff9999','#66b3ff','#99ff99','#ffcc99']
-    ax3.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=140, colors=colors, shadow=True)
+    # Percentages go into the wedge labels: one text layout pass, no shadow patches
+    total = sum(sizes)
+    labels = [f"{label}\n{size / total * 100:.1f}%" for label, size in zip(labels, sizes)]
+    ax3.pie(sizes, labels=labels, startangle=140, colors=colors)
     ax3.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle.
     plt.title('Blast Furnace Gas Distribution (Default Inputs)', fontsize=14)
     
@@ -74,11 +162,6 @@ def visualize():
     print(f"Saved {output_path_gas}")
     plt.close()
 
-    output_path_gas = 'gas_distribution.png'
-    plt.savefig(output_path_gas)
-    print(f"Saved {output_path_gas}")
-    plt.close()
-
     # --- 3. Comprehensive Dashboard with Linked Fluctuations ---
     print("Running Comprehensive Dashboard Simulation...")
     np.random.seed(42)
@@ -96,119 +179,39 @@ def visualize():
     power_linked = 50000 * target_curve * np.random.normal(1.0, 0.01, time_steps)
     oxygen_linked = 50000 * target_curve * np.random.normal(1.0, 0.01, time_steps)
 
+    # Run all time steps in one vectorized call
+    inputs = {k: np.full(time_steps, v) for k, v in default_inputs.items()}
+    inputs["ore [t/h]"] = ore_linked
+    inputs["coke_mass_flow_bf4 [t/h]"] = coke_linked
+    inputs["power [kWh/h]"] = power_linked
+    inputs["oxygen [m³/h]"] = oxygen_linked
+
+    res = model.simulate_batch(inputs)
+
     # Storage for results
     results_history = {
-        "pig_iron": [],
-        "bf_gas_total": [],
-        "bf_gas_intern": [],
-        "bf_gas_power": [],
-        "bf_gas_slab": [],
-        "bf_gas_coke": [],
-        "co2": [],
-        "power_req": [],
-        "power_own": [],
-        "oxygen_req": [],
-        "calorific_val": []
+        "pig_iron": res["pig_iron_bf4_steelworks [t/h]"],
+        "bf_gas_total": res["bf_gas_total_flow [m³/h]"],
+        "bf_gas_intern": res["bf_gas_bf4_intern [m³/h]"],
+        "bf_gas_power": res["bf_gas_bf4_power_plant [m³/h]"],
+        "bf_gas_slab": res["bf_gas_bf4_slab_heat [m³/h]"],
+        "bf_gas_coke": res["bf_gas_bf4_coke_plant [m³/h]"],
+        "co2": res["bf4_total_co2_mass_flow [t/h]"],
+        "power_req": res["power_required [kWh/h]"],
+        "power_own": res["bf4_electricity_own [kW]"],
+        "oxygen_req": res["oxygen_required [Nm³/h]"],
+        "calorific_val": res["bf_gas_bf4_calorific_value [MJ/m³]"]
     }
 
-    for t in range(time_steps):
-        inputs = default_inputs.copy()
-        inputs["ore [t/h]"] = ore_linked[t]
-        inputs["coke_mass_flow_bf4 [t/h]"] = coke_linked[t]
-        inputs["power [kWh/h]"] = power_linked[t]
-        inputs["oxygen [m³/h]"] = oxygen_linked[t]
-        
-        res = model(inputs)
-        
-        results_history["pig_iron"].append(res["pig_iron_bf4_steelworks [t/h]"])
-        results_history["bf_gas_total"].append(res["bf_gas_total_flow [m³/h]"])
-        results_history["bf_gas_intern"].append(res["bf_gas_bf4_intern [m³/h]"])
-        results_history["bf_gas_power"].append(res["bf_gas_bf4_power_plant [m³/h]"])
-        results_history["bf_gas_slab"].append(res["bf_gas_bf4_slab_heat [m³/h]"])
-        results_history["bf_gas_coke"].append(res["bf_gas_bf4_coke_plant [m³/h]"])
-        results_history["co2"].append(res["bf4_total_co2_mass_flow [t/h]"])
-        results_history["power_req"].append(res["power_required [kWh/h]"])
-        results_history["power_own"].append(res["bf4_electricity_own [kW]"])
-        results_history["oxygen_req"].append(res["oxygen_required [Nm³/h]"])
-        results_history["calorific_val"].append(res["bf_gas_bf4_calorific_value [MJ/m³]"])
-
     # --- Visualization ---
-    fig_dash, axes = plt.subplots(4, 2, figsize=(16, 20), sharex=True)
-    fig_dash.suptitle('Blast Furnace Digital Twin - Comprehensive Dashboard', fontsize=20)
-
-    # 1. Inputs
-    ax_in = axes[0, 0]
-    ax_in.plot(time, ore_linked, label='Ore [t/h]')
-    ax_in.plot(time, coke_linked, label='Coke [t/h]')
-    ax_in.set_title('Linked Input Fluctuations', fontsize=14)
-    ax_in.set_ylabel('Mass Flow [t/h]')
-    ax_in.legend(loc='upper right')
-    ax_in.grid(True, alpha=0.3)
-
-    # 2. Pig Iron Output
-    ax_pi = axes[0, 1]
-    ax_pi.plot(time, results_history["pig_iron"], color='tab:red', linewidth=2)
-    ax_pi.set_title('Pig Iron Production', fontsize=14)
-    ax_pi.set_ylabel('[t/h]')
-    ax_pi.grid(True, alpha=0.3)
-
-    # 3. BF Gas Total
-    ax_gas = axes[1, 0]
-    ax_gas.plot(time, results_history["bf_gas_total"], color='tab:green', label='Total Gas')
-    ax_gas.set_title('Total BF Gas Production', fontsize=14)
-    ax_gas.set_ylabel('[m³/h]')
-    ax_gas.grid(True, alpha=0.3)
-
-    # 4. BF Gas Distribution (Stacked)
-    ax_dist = axes[1, 1]
-    ax_dist.stackplot(time, 
-                      results_history["bf_gas_intern"], 
-                      results_history["bf_gas_power"], 
-                      results_history["bf_gas_slab"], 
-                      results_history["bf_gas_coke"],
-                      labels=['Intern', 'Power Plant', 'Slab Heat', 'Coke Plant'],
-                      alpha=0.7)
-    ax_dist.set_title('BF Gas Distribution', fontsize=14)
-    ax_dist.set_ylabel('[m³/h]')
-    ax_dist.legend(loc='upper left', fontsize='small')
-    ax_dist.grid(True, alpha=0.3)
-
-    # 5. CO2 Emissions
-    ax_co2 = axes[2, 0]
-    ax_co2.plot(time, results_history["co2"], color='tab:grey', linestyle='--')
-    ax_co2.set_title('CO2 Emissions', fontsize=14)
-    ax_co2.set_ylabel('[t/h]')
-    ax_co2.grid(True, alpha=0.3)
-
-    # 6. Power (Required vs Own)
-    ax_pwr = axes[2, 1]
-    ax_pwr.plot(time, results_history["power_req"], label='Required', color='tab:orange')
-    ax_pwr.plot(time, results_history["power_own"], label='Own Gen', color='tab:purple')
-    ax_pwr.set_title('Power Balance', fontsize=14)
-    ax_pwr.set_ylabel('[kWh/h] / [kW]')
-    ax_pwr.legend()
-    ax_pwr.grid(True, alpha=0.3)
-
-    # 7. Oxygen Demand
-    ax_o2 = axes[3, 0]
-    ax_o2.plot(time, results_history["oxygen_req"], color='tab:cyan')
-    ax_o2.set_title('Oxygen Requirement', fontsize=14)
-    ax_o2.set_ylabel('[Nm³/h]')
-    ax_o2.set_xlabel('Time Steps')
-    ax_o2.grid(True, alpha=0.3)
-
-    # 8. Calorific Value
-    ax_cal = axes[3, 1]
-    ax_cal.plot(time, results_history["calorific_val"], color='tab:brown')
-    ax_cal.set_title('BF Gas Calorific Value', fontsize=14)
-    ax_cal.set_ylabel('[MJ/m³]')
-    ax_cal.set_xlabel('Time Steps')
-    ax_cal.grid(True, alpha=0.3)
+    fig_dash = plt.figure(figsize=(12, 15), dpi=PNG_DPI)  # 1200x1500 px
+    plot_dashboard(fig_dash, time, {"ore": ore_linked, "coke": coke_linked,
+                                    **results_history})
 
     plt.tight_layout(rect=[0, 0.03, 1, 0.97]) # Adjust for suptitle
     
     output_path_dash = 'comprehensive_dashboard.png'
-    plt.savefig(output_path_dash)
+    fig_dash.savefig(output_path_dash, dpi=PNG_DPI, pil_kwargs=PNG_KWARGS)
     print(f"Saved {output_path_dash}")
     plt.close()
 
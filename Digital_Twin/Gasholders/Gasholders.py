@@ -3,9 +3,34 @@ GasHolders Digital Twin Models
 State-space models for BFG, BOFG, and COG gasholders
 """
 
+import os
+import runpy
+
 import numpy as np
 from typing import Optional, List
 
+try:
+    from scipy.signal import lfilter
+except ImportError:  # scipy is optional
+    lfilter = None
+
+# Optional numba support, shared with the other twins (see Digital_Twin/jit_support.py)
+_JIT = runpy.run_path(os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "jit_support.py"))
+njit, HAVE_NUMBA = _JIT["njit"], _JIT["HAVE_NUMBA"]
+
+
+# Explicit signature: compiled once at import, not on the first call
+@njit("Tuple((float64[:], float64))(float64[:], float64, float64, float64, float64, float64)")
+def _run_1d_ss(u_arr, A, B, C, D, x0):
+    """Run the 1x1 recurrence over u_arr; returns the outputs y_k and the final state."""
+    y = np.empty(u_arr.size)
+    x = x0
+    for k in range(u_arr.size):
+        y[k] = C * x + D * u_arr[k]
+        x = A * x + B * u_arr[k]
+    return y, x
+
 
 # ==============================================================================
 # BFGH (Blast Furnace Gas Holder) Parameters
@@ -92,27 +117,53 @@ class StateSpaceGasHolder:
             output_names: List of output variable names (p dimensional)
         """
         # Declare state space matrices
-        self.A = np.atleast_2d(np.array(A, dtype=float))
-        self.B = np.atleast_2d(np.array(B, dtype=float))
-        self.C = np.atleast_2d(np.array(C, dtype=float))
-        self.D = np.atleast_2d(np.array(D, dtype=float))
-        self.x = np.array(x0, dtype=float).flatten() if x0 is not None else np.zeros(1)
+        self.A = np.atleast_2d(np.asarray(A, dtype=float))
+        self.B = np.atleast_2d(np.asarray(B, dtype=float))
+        self.C = np.atleast_2d(np.asarray(C, dtype=float))
+        self.D = np.atleast_2d(np.asarray(D, dtype=float))
         
-        # Get dimensions
+        # Get dimensions (cached for the per-step path)
         n, m = self.B.shape
         p, _ = self.C.shape
+        self._n, self._m, self._p = n, m, p
+        
+        # 1x1 systems (all gas holders) step on plain floats instead of 1x1 matmuls
+        self._scalar = n == m == p == 1
+        if self._scalar:
+            self._a = float(self.A[0, 0])
+            self._b = float(self.B[0, 0])
+            self._c = float(self.C[0, 0])
+            self._d = float(self.D[0, 0])
+        self.x = x0 if x0 is not None else np.zeros(n)
         
         # Dimension checks
         assert self.A.shape == (n, n), f"A must be a square matrix {n} x {n}"
         assert self.B.shape == (n, m), f"B must be a matrix {n} x {m}"
         assert self.C.shape == (p, n), f"C must be a matrix {p} x {n}"
         assert self.D.shape == (p, m), f"D must be a matrix {p} x {m}"
+        assert self.x.shape == (n,), f"x0 must be {n} dimensional"
         
         # Set input/output names
         self.input_names = input_names if input_names else [f"u{i}" for i in range(m)]
         self.output_names = output_names if output_names else [f"y{i}" for i in range(p)]
+        
+        # General path: the input vector is filled in place and D @ u is skipped when D = 0
+        self._input_names_tuple = tuple(self.input_names)
+        self._output_names_tuple = tuple(self.output_names)
+        self._u_buf = np.empty(m)
+        self._D_is_zero = not np.any(self.D)
+    
+    @property
+    def x(self) -> np.ndarray:
+        """State vector x_k (n dimensional)"""
+        return np.array([self._x]) if self._scalar else self._x
     
-    def __call__(self, input_dict: dict) -> dict:
+    @x.setter
+    def x(self, value):
+        value = np.array(value, dtype=float).flatten()
+        self._x = float(value[0]) if self._scalar else value
+    
+    def __call__(self, input_dict: dict, out: Optional[dict] = None) -> dict:
         """
         Execute one time step of the state-space model
         
@@ -123,29 +174,125 @@ class StateSpaceGasHolder:
         Args:
             input_dict: Dictionary mapping input names to values
                        {input_name_1: value_1, input_name_2: value_2, ...}
+            out: Optional dictionary to write the outputs into (and return),
+                 so that tight loops can reuse one dict across steps
         
         Returns:
             Dictionary mapping output names to values
             {output_name_1: value_1, output_name_2: value_2, ...}
         """
-        # Get dimensions
-        n, m = self.B.shape
-        p, _ = self.C.shape
+        # Fast path for 1x1 systems: same equations on Python floats
+        if self._scalar:
+            name = self._output_names_tuple[0]
+            u = input_dict[self._input_names_tuple[0]]
+            y = self._c * self._x + self._d * u
+            self._x = self._a * self._x + self._b * u
+            if out is None:
+                return {name: y}
+            out[name] = y
+            return out
         
         # Extract input vector from dictionary
-        u = np.array([input_dict[name] for name in self.input_names], dtype=float)
-        assert u.shape == (m,), f"u must be {m} dimensional"
+        # (shapes are validated once in __init__, there are no per-call checks)
+        u = self._u_buf
+        for i, name in enumerate(self._input_names_tuple):
+            u[i] = input_dict[name]
+        
+        y = self.step_array(u)
+        
+        # Return output dictionary
+        if out is None:
+            out = {}
+        for i, name in enumerate(self._output_names_tuple):
+            out[name] = y[i]
+        return out
+    
+    def step_array(self, u: np.ndarray) -> np.ndarray:
+        """
+        Execute one time step on a positional input vector (no dictionaries)
+        
+        Args:
+            u: Input vector of shape (m,), ordered as input_names
+        
+        Returns:
+            Output vector y_k of shape (p,), ordered as output_names
+        """
+        if self._scalar:
+            u0 = u[0]
+            y = self._c * self._x + self._d * u0
+            self._x = self._a * self._x + self._b * u0
+            return np.array([y])
         
         # Compute output: y_k = C * x_k + D * u_k
-        y = self.C @ self.x + self.D @ u
-        assert y.shape == (p,), f"y must be {p} dimensional"
+        y = self.C @ self._x
+        if not self._D_is_zero:
+            y += self.D @ u
         
         # Update state: x_{k+1} = A * x_k + B * u_k
-        self.x = self.A @ self.x + self.B @ u
-        assert self.x.shape == (n,), f"x must be {n} dimensional"
+        self._x = self.A @ self._x + self.B @ u
+        return y
+    
+    def simulate(self, u_array: np.ndarray) -> np.ndarray:
+        """
+        Run the model over a whole input sequence and advance the state
         
-        # Return output dictionary
-        return {name: y[i] for i, name in enumerate(self.output_names)}
+        Equivalent to calling the model once per sample, but for 1x1 systems
+        the recurrence x_{k+1} = A * x_k + B * u_k runs in one pass: in the
+        compiled _run_1d_ss kernel when numba is available, otherwise in
+        scipy.signal.lfilter (a first-order IIR filter), otherwise in Python.
+        
+        Args:
+            u_array: Inputs, shape (T,) for 1x1 systems or (T, m)
+        
+        Returns:
+            Outputs y_k, shape (T,) for 1x1 systems or (T, p)
+        """
+        if self._scalar:
+            u = np.asarray(u_array, dtype=float).reshape(-1)
+            if u.size == 0:
+                return np.empty(0)
+            if HAVE_NUMBA or lfilter is None:
+                y, x_last = _run_1d_ss(u, self._a, self._b, self._c, self._d, self._x)
+                self._x = float(x_last)
+                return y
+            # w_k = A * w_{k-1} + B * u_k with w_{-1} = x_0, so w_k = x_{k+1}
+            x_next = lfilter([self._b], [1.0, -self._a], u, zi=[self._a * self._x])[0]
+            x_prev = np.concatenate(([self._x], x_next[:-1]))
+            self._x = float(x_next[-1])
+            return self._c * x_prev + self._d * u
+        
+        # General case: only the state recurrence is stepped; the input terms
+        # B * u_k and the outputs are computed for the whole sequence at once
+        u = np.asarray(u_array, dtype=float).reshape(len(u_array), self._m)
+        bu = u @ self.B.T
+        x_hist = np.empty((u.shape[0], self._n))
+        x = self.x
+        for k in range(u.shape[0]):
+            x_hist[k] = x
+            x = self.A @ x + bu[k]
+        self.x = x
+        y = x_hist @ self.C.T
+        if not self._D_is_zero:
+            y += u @ self.D.T
+        return y
+    
+    def batch(self, inputs: dict) -> dict:
+        """
+        Common batch API of the twins: run a whole input sequence
+        
+        Args:
+            inputs: Dictionary mapping input names to sequences of shape (T,)
+                    (scalars are broadcast)
+        
+        Returns:
+            Dictionary mapping output names to arrays of shape (T,)
+        """
+        columns = np.broadcast_arrays(*(np.asarray(inputs[name], dtype=float)
+                                        for name in self._input_names_tuple))
+        if self._scalar:
+            return {self._output_names_tuple[0]: self.simulate(columns[0])}
+        y = self.simulate(np.column_stack(columns))
+        return {name: y[:, i] for i, name in enumerate(self._output_names_tuple)}
     
     def reset(self, x0: Optional[np.ndarray] = None):
         """Reset the state to initial or specified value"""
@@ -1,40 +1,17 @@
 # Import useful libraries
+# (only what the twin needs: importing the former ML/plotting stack took seconds and hundreds of MB)
+import sys
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-import scipy as sp
-import statsmodels.api as sm
-import sklearn
-import datetime
-import yfinance as yf
-import seaborn as sns
-import random
-import math
-from collections import Counter
-import numpy as np
-import matplotlib.pyplot as plt
-from scipy.stats import multivariate_normal
-from scipy.signal import StateSpace
 from typing import Optional, List
-import pandas as pd
-import numpy as np
-import seaborn as sns
-import matplotlib.pyplot as plt
-import sys
-from sklearn.preprocessing import LabelEncoder, OneHotEncoder, OrdinalEncoder
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import mean_absolute_error, r2_score
 
-import pandas as pd
-import numpy as np
-import xgboost as xgb
-import tensorflow as tf
-from tensorflow import keras
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import mean_squared_error
-import matplotlib.pyplot as plt
+try:
+    from scipy.signal import lfilter, ss2tf
+except ImportError:  # scipy is optional; simulate() then steps in Python
+    lfilter = ss2tf = None
+
+# Largest state dimension simulate() runs through lfilter: the transfer-function form
+# from ss2tf loses accuracy quickly with the model order (the bundled plant has n = 2)
+LFILTER_MAX_ORDER = 2
 
 
 # Useful functions
@@ -130,27 +107,46 @@ class PowerPlant :
         """
         
         # Declare state space
-        self.A = np.array(A, dtype = float)
-        self.B = np.array(B, dtype = float)
-        self.C = np.array(C, dtype = float)
-        self.D = np.array(D, dtype = float)
+        # (asarray: no copy for float ndarrays such as the module defaults; the state is
+        # copied since it is rebound every step and x0 may be shared)
+        self.A = np.asarray(A, dtype = float)
+        self.B = np.asarray(B, dtype = float)
+        self.C = np.asarray(C, dtype = float)
+        self.D = np.asarray(D, dtype = float)
         self.x = np.array(x0, dtype = float)
         
-        # declare dimensions
+        # declare dimensions (cached for __call__)
         n, m = self.B.shape
         p, _ = self.C.shape
+        self._n, self._m, self._p = n, m, p
         
         # Check
         assert self.A.shape == (n,n), f" A must be a square matrix {n} x {n}"
         assert self.B.shape == (n,m), f" B must be a matrix {n} x {m}"
         assert self.C.shape == (p,n), f" C must be a matrix {p} x {n}"
         assert self.D.shape == (p,m), f" D must be a matrix {p} x {m}"
+        assert self.x.shape == (n,), f" x0 must be {n} dimensional"
         
         self.input_names = input_names if input_names else [f"u{i}" for i in range(m)]
         self.output_names = output_names if output_names else [f"y{i}" for i in range(p)]
         
+        # Per-call work: the input vector is filled in place and D @ u is skipped when D = 0
+        self._input_names_tuple = tuple(self.input_names)
+        self._output_names_tuple = tuple(self.output_names)
+        self._u_buf = np.empty(m)
+        self._D_is_zero = not np.any(self.D)
+        
+        # simulate(): transfer functions from each column of [I | B] to the state, so that the
+        # initial state and the inputs can all be run through scipy's native lfilter
+        # (low-order models only; larger ones step the state recurrence)
+        self._use_lfilter = lfilter is not None and n <= LFILTER_MAX_ORDER
+        if self._use_lfilter:
+            forcing = np.hstack([np.eye(n), self.B])
+            self._x_num = [ss2tf(self.A, forcing, np.eye(n), np.zeros((n, n + m)), input = j)[0] for j in range(n + m)]
+            self._x_den = np.poly(self.A)
+        
     
-    def __call__(self, input_dict : dict) -> dict:
+    def __call__(self, input_dict : dict, out : Optional[dict] = None) -> dict:
         """
         
         Compute output y_{k} = C * x_{k} + D * u_{k} given current state and input.
@@ -158,25 +154,98 @@ class PowerPlant :
         
         input_dict: {input_name: value} --> {input_name_1 : value_1, input_name_2 : value_2, ..., }
         return: {output_name: value} --> {output_name_1 : value_1, output_name_2 : value_2, ...., }
+        out: optional dict the outputs are written into (and returned), to reuse one dict across steps
         
         """
         
-        # declare dimensions
-        n, m = self.B.shape
-        p, _ = self.C.shape
-        
         # create u vector of m dimension with values in input names
-        u = np.array ( [input_dict[name] for name in self.input_names ], dtype = float )
+        # (shapes are validated once in __init__, there are no per-call checks)
+        u = self._u_buf
+        for i, name in enumerate(self._input_names_tuple):
+            u[i] = input_dict[name]
+        
+        y = self.step_array(u)
+        
+        if out is None:
+            out = {}
+        for i, name in enumerate(self._output_names_tuple):
+            out[name] = y[i]
+        return out
+    
+    def step_array(self, u : np.ndarray) -> np.ndarray:
+        """
+        
+        Same step as __call__ on a positional input vector, without the dict interface.
         
-        assert u.shape == (m,), f"u must be {m} dimensional"
+        u: m dimensional vector (ndarray, dtype = float), ordered as input_names
+        return: p dimensional vector y_{k} (ndarray, dtype = float), ordered as output_names
+        
+        """
+        
+        # output from the current state: y_{k} = C * x_{k} + D * u_{k}
+        y = self.C @ self.x
+        if not self._D_is_zero:
+            y += self.D @ u
         
         # update x_{k+1} = A * x_{k} + B * u_{k}
         self.x = self.A @ self.x + self.B @ u
         
-        assert self.x.shape == (n,), f"x must be {n} dimensional"
+        return y
+    
+    def simulate(self, u_array : np.ndarray) -> np.ndarray:
+        """
+        
+        Run the model over a whole input sequence and advance the state.
+        Equivalent to calling the model once per sample; with scipy and n <= LFILTER_MAX_ORDER
+        the state sequence comes from scipy.signal.lfilter in one native pass per (input, state) pair.
         
-        y = self.C @ self.x + self.D @ u
+        u_array: T x m (ndarray, dtype = float), one input vector per step
+        return: T x p (ndarray, dtype = float), the outputs y_{k}
         
-        assert self.y.shape == (p,), f"y must be {p} dimensional"
+        """
+        
+        n, m = self._n, self._m
+        u = np.asarray(u_array, dtype = float).reshape(len(u_array), m)
+        T = u.shape[0]
+        
+        if self._use_lfilter:
+            # z_{k+1} = A * z_{k} + [I | B] * f_{k} from z_{0} = 0: f_{0} = [x_{0}, 0] and f_{k} = [0, u_{k-1}],
+            # so z_{k+1} = x_{k}; the extra zero row at the end yields the final state x_{T}
+            forcing = np.zeros((T + 2, n + m))
+            forcing[0, :n] = self.x
+            forcing[1:T + 1, n:] = u
+            z = np.zeros((T + 2, n))
+            for j in range(n + m):
+                column = forcing[:, j]
+                if not column.any():
+                    continue
+                for i in range(n):
+                    z[:, i] += lfilter(self._x_num[j][i], self._x_den, column)
+            x_hist = z[1:T + 1]
+            self.x = z[T + 1].copy()
+        else:
+            # Only the state recurrence is stepped; B * u_{k} is computed for all steps at once
+            bu = u @ self.B.T
+            x_hist = np.empty((T, n))
+            x = self.x
+            for k in range(T):
+                x_hist[k] = x
+                x = self.A @ x + bu[k]
+            self.x = x
+        
+        y = x_hist @ self.C.T
+        if not self._D_is_zero:
+            y += u @ self.D.T
+        return y
+    
+    def batch(self, inputs : dict) -> dict:
+        """
+        
+        Common batch API of the twins: {input_name: (T,) sequence} --> {output_name: (T,) array}
+        Scalars are broadcast.
+        
+        """
         
-        return {name: y[i] for i, name in enumerate(self.output_names) }
\ No newline at end of file
+        columns = np.broadcast_arrays(*(np.asarray(inputs[name], dtype = float) for name in self._input_names_tuple))
+        y = self.simulate(np.column_stack(columns))
+        return {name: y[:, i] for i, name in enumerate(self._output_names_tuple)}
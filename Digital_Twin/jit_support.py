@@ -0,0 +1,39 @@
+"""
+Optional numba support, shared by the digital twins and the steel_MAS agents
+
+njit / prange are numba's when it is installed. Without numba, or with the
+environment variable STEEL_MAS_JIT=0 (short-lived worker processes, debugging),
+njit is a no-op decorator and prange is range, so the very same kernels run as
+plain Python.
+
+The twins are standalone files, loaded under different module names (plain
+import, spec_from_file_location), so they and steel_MAS/solvers/rule_based.py
+read this file with runpy.run_path(...) instead of importing it, and nothing
+is put on sys.path.
+For the same reason no kernel uses numba's on-disk cache: it re-imports the
+module name a kernel was compiled under.
+"""
+
+import os
+
+JIT_ENABLED = os.environ.get("STEEL_MAS_JIT", "1") != "0"
+
+numba = None
+if JIT_ENABLED:
+    try:
+        import numba
+    except ImportError:  # numba is optional; fall back to plain Python
+        pass
+
+HAVE_NUMBA = numba is not None
+
+
+def _no_jit(*args, **kwargs):
+    """Stand-in for numba.njit, used bare or with arguments"""
+    if args and callable(args[0]):
+        return args[0]
+    return lambda func: func
+
+
+njit = numba.njit if HAVE_NUMBA else _no_jit
+prange = numba.prange if HAVE_NUMBA else range
@@ -0,0 +1,39 @@
+"""
+Ahead-of-time compiled step kernels
+Builds the agents' step kernels into the extension module agents/steel_kernels,
+so a fresh process does not pay the numba compilation on its first step()
+
+Build (needs numba and a C compiler; run again whenever a kernel changes):
+    cd steel_MAS/agents && python _kernels_aot.py
+
+The agents pick the module up through solvers.rule_based.load_aot_kernels()
+and fall back to the @njit kernels (or plain Python) when it is missing.
+"""
+
+import os
+import sys
+
+# Make the steel_MAS packages importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from numba.pycc import CC
+from agents import bf_agent, bof_agent, coke_oven_agent, gas_holder_agent
+
+
+def _py(kernel):
+    """The Python source function of a step kernel (also under STEEL_MAS_JIT=0)"""
+    return getattr(kernel, 'py_func', kernel)
+
+
+cc = CC('steel_kernels')
+cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+
+cc.export('bf_step_kernel', 'i8(f8[::1], i8, f8[::1], f8[::1])')(_py(bf_agent._bf_step_kernel))
+cc.export('bof_step_kernel', 'void(f8[::1], f8[::1])')(_py(bof_agent._bof_step_kernel))
+cc.export('co_step_kernel', 'void(f8[::1], f8[::1], f8)')(_py(coke_oven_agent._co_step_kernel))
+cc.export('gh_step_kernel', 'void(f8[::1], f8[::1], b1)')(_py(gas_holder_agent._gh_step_kernel))
+
+
+if __name__ == "__main__":
+    cc.compile()
+    print("Built", os.path.join(cc.output_dir, cc.output_file))
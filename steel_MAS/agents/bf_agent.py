@@ -3,14 +3,168 @@ Blast Furnace Agent
 Implements multi-level rule-based control for blast furnace
 """
 
-import sys
-sys.path.append('..')
-
-from typing import Dict, Any, Optional
-from solvers.rule_based import RuleBasedController, SafetyLimits
+import numpy as np
+from typing import Dict, Any, List, Optional
+from solvers.rule_based import SafetyLimits, adjust_down_if, adjust_up_if, StateView, array_field, load_aot_kernels, njit, prange, with_serial_fallback
 from protocols.gas_request import GasRequest, MessageBus
 
 
+# Column layout of the state / observation vectors (step kernel and BF_AgentBatch)
+STATE_KEYS = ("wind_volume", "O2_enrichment", "PCI", "COG_ratio", "Si_target", "T_target")
+WIND, O2, PCI, COG_RATIO, SI_TARGET, T_TARGET = range(len(STATE_KEYS))
+
+OBS_KEYS = ("Si", "T_hot_metal", "SOC_bfg", "P_bfg", "COG_available", "COG_required",
+            "O2_available", "peak_electricity")
+OBS_DEFAULTS = (0.45, 1500, 0.5, 12.0, 10000, 8000, 50000, False)
+(OBS_SI, OBS_T_HOT_METAL, OBS_SOC_BFG, OBS_P_BFG, OBS_COG_AVAILABLE, OBS_COG_REQUIRED,
+ OBS_O2_AVAILABLE, OBS_PEAK_ELECTRICITY) = range(len(OBS_KEYS))
+
+HYSTERESIS_KEYS = ("gh_full_action_active", "gh_empty_action_active",
+                   "si_high_action_active", "si_low_action_active")
+# The hysteresis states are one int bitmask, one bit per HYSTERESIS_KEYS entry
+HYST_GH_FULL, HYST_GH_EMPTY, HYST_SI_HIGH, HYST_SI_LOW = (1 << bit for bit in range(len(HYSTERESIS_KEYS)))
+HYST_BITS = (HYST_GH_FULL, HYST_GH_EMPTY, HYST_SI_HIGH, HYST_SI_LOW)
+
+# Kernel parameter vector: (Si_band, SOC_high, SOC_low, P_high, P_low)
+PARAM_SI_BAND, PARAM_SOC_HIGH, PARAM_SOC_LOW, PARAM_P_HIGH, PARAM_P_LOW = range(5)
+
+# Safety limits as plain module constants (numba freezes them into the kernel)
+_BF_WIND_MIN = SafetyLimits.BF_WIND_MIN
+_BF_WIND_MAX = SafetyLimits.BF_WIND_MAX
+_BF_O2_MAX = SafetyLimits.BF_O2_MAX
+_BF_PCI_MAX = SafetyLimits.BF_PCI_MAX
+_BF_TEMP_MAX = SafetyLimits.BF_TEMP_MAX
+_BF_SI_MAX = SafetyLimits.BF_SI_MAX
+
+
+@njit("int64(float64[::1], int64, float64[::1], float64[::1])", cache=True, boundscheck=False, nogil=True)
+def _bf_step_kernel(state, hyst, obs, params):
+    """
+    One control step of the BF rule hierarchy on plain arrays
+    
+    state (STATE_KEYS order) is updated in place and the new hysteresis
+    bitmask (HYST_* bits) is returned; obs is in OBS_KEYS order, params in PARAM_* order.
+    incremental_adjust(x, "increase", s, max_val=M) under a rule's condition c is
+    written adjust_up_if(c, x, s, M), the "decrease" direction
+    adjust_down_if(c, x, s, min_val); the rules use these branchless forms
+    because their conditions flip unpredictably from agent to agent.
+    """
+    Si = obs[OBS_SI]
+    SOC_bfg = obs[OBS_SOC_BFG]
+    P_bfg = obs[OBS_P_BFG]
+    Si_band = params[PARAM_SI_BAND]
+    
+    wind = state[WIND]
+    o2 = state[O2]
+    pci = state[PCI]
+    
+    # Level 1: Safety (highest priority)
+    # Hard limits on wind volume and O2 enrichment
+    wind = max(_BF_WIND_MIN, min(_BF_WIND_MAX, wind))
+    o2 = max(0.0, min(_BF_O2_MAX, o2))
+    
+    # Temperature protection: reduce heat input (fast response)
+    hot = obs[OBS_T_HOT_METAL] > _BF_TEMP_MAX
+    pci = adjust_down_if(hot, pci, 0.20, 0.0)
+    o2 = adjust_down_if(hot, o2, 0.20, 0.0)
+    
+    # Si protection: reduce PCI
+    pci = adjust_down_if(Si > _BF_SI_MAX, pci, 0.05, 0.0)
+    
+    # Level 2: Process stability
+    Si_target = state[SI_TARGET]
+    
+    # Si too high - increase reduction/decrease heat fluctuation
+    si_high = Si > Si_target + Si_band
+    if si_high:
+        hyst |= HYST_SI_HIGH
+    elif Si < Si_target + Si_band/2:
+        hyst &= ~HYST_SI_HIGH
+    pci = adjust_down_if(si_high, pci, 0.10, 0.0)
+    o2 = adjust_down_if(si_high, o2, 0.10, 0.0)
+    
+    # Si too low - increase PCI or wind
+    si_low = Si < Si_target - Si_band
+    if si_low:
+        hyst |= HYST_SI_LOW
+    elif Si > Si_target - Si_band/2:
+        hyst &= ~HYST_SI_LOW
+    pci = adjust_up_if(si_low, pci, 0.10, _BF_PCI_MAX)
+    wind = adjust_up_if(si_low, wind, 0.10, _BF_WIND_MAX)
+    
+    # Level 3: Energy coordination
+    # (the interval tests use | and & so that they compile to compares, not branches)
+    # Gas holder too full - reduce BFG production (fast response needed!)
+    full = (SOC_bfg > params[PARAM_SOC_HIGH]) | (P_bfg > params[PARAM_P_HIGH])
+    if full:
+        hyst |= HYST_GH_FULL
+    elif (SOC_bfg < 0.75) & (P_bfg < 13.0):
+        hyst &= ~HYST_GH_FULL
+    wind = adjust_down_if(full, wind, 0.15, _BF_WIND_MIN)
+    pci = adjust_down_if(full, pci, 0.12, 0.0)
+    o2 = adjust_down_if(full, o2, 0.15, 0.0)
+    
+    # Gas holder too empty - increase BFG production (fast response needed!)
+    empty = (SOC_bfg < params[PARAM_SOC_LOW]) | (P_bfg < params[PARAM_P_LOW])
+    if empty:
+        hyst |= HYST_GH_EMPTY
+    elif (SOC_bfg > 0.30) & (P_bfg > 10.0):
+        hyst &= ~HYST_GH_EMPTY
+    wind = adjust_up_if(empty, wind, 0.15, _BF_WIND_MAX)
+    pci = adjust_up_if(empty, pci, 0.12, _BF_PCI_MAX)
+    
+    # COG shortage - reduce COG usage, compensate with PCI
+    cog_short = obs[OBS_COG_AVAILABLE] < obs[OBS_COG_REQUIRED]
+    state[COG_RATIO] = adjust_down_if(cog_short, state[COG_RATIO], 0.10, 0.0)
+    pci = adjust_up_if(cog_short, pci, 0.05, _BF_PCI_MAX)
+    
+    # O2 shortage - reduce O2, increase PCI
+    O2_required = o2 * wind / 100
+    o2_short = obs[OBS_O2_AVAILABLE] < O2_required
+    o2 = adjust_down_if(o2_short, o2, 0.10, 0.0)
+    pci = adjust_up_if(o2_short, pci, 0.04, _BF_PCI_MAX)
+    
+    # Level 4: Economic optimization (lowest priority)
+    # During peak electricity hours, reduce wind volume (blower power)
+    wind = adjust_down_if(obs[OBS_PEAK_ELECTRICITY] != 0.0, wind, 0.05, _BF_WIND_MIN)
+    
+    state[WIND] = wind
+    state[O2] = o2
+    state[PCI] = pci
+    return hyst
+
+
+# Multi-agent step: every row is independent, so the agent loop is a prange.
+# The serial twin is compiled alongside, see with_serial_fallback().
+@njit("void(float64[:, ::1], int64[::1], float64[:, ::1], float64[::1])", parallel=True, cache=True, nogil=True)
+def _bf_step_all_parallel(states, hyst, observations, params):
+    """
+    One control step for N BF agents: row i of states / observations and
+    hyst[i] are agent i (same layout as for _bf_step_kernel), params are shared
+    """
+    for i in prange(states.shape[0]):
+        hyst[i] = _bf_step_kernel(states[i], hyst[i], observations[i], params)
+
+
+@njit("void(float64[:, ::1], int64[::1], float64[:, ::1], float64[::1])", cache=True, nogil=True)
+def _bf_step_all_serial(states, hyst, observations, params):
+    """
+    One control step for N BF agents: row i of states / observations and
+    hyst[i] are agent i (same layout as for _bf_step_kernel), params are shared
+    """
+    for i in range(states.shape[0]):
+        hyst[i] = _bf_step_kernel(states[i], hyst[i], observations[i], params)
+
+
+bf_step_all = with_serial_fallback(_bf_step_all_parallel, _bf_step_all_serial)
+
+
+# Single-agent calls from Python use the AOT-built kernel when it is available
+# (no compilation in a fresh process); the @njit kernel above is the fallback
+_aot = load_aot_kernels()
+_bf_step = _aot.bf_step_kernel if _aot is not None else _bf_step_kernel
+
+
 class BF_Agent:
     """
     Blast Furnace Agent with multi-level rule hierarchy:
@@ -18,46 +172,78 @@ class BF_Agent:
     - Level 2: Process stability (Si control, temperature)
     - Level 3: Energy coordination (gas holder, COG, O2 coupling)
     - Level 4: Economic optimization
+    
+    The rules run in the compiled _bf_step_kernel; the agent keeps its state
+    and observation vectors preallocated and only packs/unpacks the dicts.
+    Every state entry and rule parameter is also a typed attribute
+    (agent.wind_volume, agent.Si_band, ...) backed by those vectors.
     """
     
+    __slots__ = ("agent_id", "_state", "_view", "_hyst", "_obs_buf", "_params")
+    
+    wind_volume = array_field("_state", WIND, "Nm³/min")
+    O2_enrichment = array_field("_state", O2, "%")
+    PCI = array_field("_state", PCI, "kg/t HM")
+    COG_ratio = array_field("_state", COG_RATIO, "fraction of heating gas")
+    Si_target = array_field("_state", SI_TARGET, "%")
+    T_target = array_field("_state", T_TARGET, "°C")
+    
+    Si_band = array_field("_params", PARAM_SI_BAND, "hysteresis band")
+    SOC_high = array_field("_params", PARAM_SOC_HIGH)
+    SOC_low = array_field("_params", PARAM_SOC_LOW)
+    P_high = array_field("_params", PARAM_P_HIGH, "kPa")
+    P_low = array_field("_params", PARAM_P_LOW, "kPa")
+    
     def __init__(self, agent_id: str = "BF1"):
         self.agent_id = agent_id
-        self.controller = RuleBasedController()
-        
-        # Internal state
-        self.state = {
-            "wind_volume": 4000,  # Nm³/min
-            "O2_enrichment": 3.5,  # %
-            "PCI": 150,  # kg/t HM
-            "COG_ratio": 0.2,  # fraction of heating gas
-            "Si_target": 0.45,  # %
-            "T_target": 1500,  # °C
-        }
-        
-        # Hysteresis states
-        self.hysteresis_states = {
-            "gh_full_action_active": False,
-            "gh_empty_action_active": False,
-            "si_high_action_active": False,
-            "si_low_action_active": False,
-        }
-        
-        # Parameters
-        self.Si_band = 0.03  # hysteresis band
-        self.SOC_high = 0.85
-        self.SOC_low = 0.25
-        self.P_high = 14.0  # kPa
-        self.P_low = 9.0    # kPa
+        
+        # Internal state (STATE_KEYS order)
+        self._state = np.array([
+            4000,  # wind_volume: Nm³/min
+            3.5,  # O2_enrichment: %
+            150,  # PCI: kg/t HM
+            0.2,  # COG_ratio: fraction of heating gas
+            0.45,  # Si_target: %
+            1500,  # T_target: °C
+        ], dtype=np.float64)
+        
+        # Hysteresis states (bitmask of HYST_* flags)
+        self._hyst = 0
+        
+        # Parameters (PARAM_* order)
+        self._params = np.array([
+            0.03,  # Si_band: hysteresis band
+            0.85,  # SOC_high
+            0.25,  # SOC_low
+            14.0,  # P_high: kPa
+            9.0,  # P_low: kPa
+        ])
+        
+        # Preallocated kernel input
+        self._obs_buf = np.empty(len(OBS_KEYS))
+        
+        # Live read-only view of the state, returned by step()
+        self._view = StateView(self, STATE_KEYS)
+    
+    @property
+    def state(self) -> StateView:
+        """Current state as a live read-only mapping (get_state() takes a snapshot)"""
+        return self._view
+    
+    @property
+    def hysteresis_states(self) -> Dict[str, bool]:
+        """Current hysteresis flags as a dict (rebuilt from the bitmask)"""
+        return {key: bool(self._hyst & bit) for key, bit in zip(HYSTERESIS_KEYS, HYST_BITS)}
         
     def get_state(self) -> Dict[str, Any]:
         """Return current state"""
-        return self.state.copy()
+        return dict(zip(STATE_KEYS, self._state.tolist()))
     
     def step(
         self,
         observations: Dict[str, Any],
         message_bus: Optional[MessageBus] = None
-    ) -> Dict[str, Any]:
+    ) -> StateView:
         """
         Execute one control step
         
@@ -72,165 +258,142 @@ class BF_Agent:
                 - O2_available: O2 available [Nm³/h]
                 - peak_electricity: Boolean, is it peak hours
             
-        Returns: Action dictionary
+        Returns: Action mapping (a live read-only view of the state, see StateView)
         """
         # Extract observations
-        Si = observations.get("Si", 0.45)
-        T_hot_metal = observations.get("T_hot_metal", 1500)
-        SOC_bfg = observations.get("SOC_bfg", 0.5)
-        P_bfg = observations.get("P_bfg", 12.0)
-        COG_available = observations.get("COG_available", 10000)
-        COG_required = observations.get("COG_required", 8000)
-        O2_available = observations.get("O2_available", 50000)
-        peak_electricity = observations.get("peak_electricity", False)
+        # (one C-level map over the module-level key/default tuples)
+        obs = self._obs_buf
+        obs[:] = list(map(observations.get, OBS_KEYS, OBS_DEFAULTS))
         
         # Apply rules in priority order
-        self._apply_safety_rules(Si, T_hot_metal, O2_available)
-        self._apply_process_rules(Si)
-        self._apply_energy_rules(SOC_bfg, P_bfg, COG_available, COG_required, O2_available)
-        self._apply_economic_rules(peak_electricity)
-        
-        return self.get_state()
-    
-    def _apply_safety_rules(self, Si: float, T_hot_metal: float, O2_available: float):
-        """Level 1: Safety rules (highest priority)"""
-        
-        # Hard limits on wind volume
-        self.state["wind_volume"] = self.controller.clamp(
-            self.state["wind_volume"],
-            SafetyLimits.BF_WIND_MIN,
-            SafetyLimits.BF_WIND_MAX
-        )
-        
-        # Hard limits on O2 enrichment
-        self.state["O2_enrichment"] = self.controller.clamp(
-            self.state["O2_enrichment"],
-            0.0,
-            SafetyLimits.BF_O2_MAX
-        )
-        
-        # Temperature protection
-        if T_hot_metal > SafetyLimits.BF_TEMP_MAX:
-            # Emergency: reduce heat input (fast response)
-            self.state["PCI"] = self.controller.incremental_adjust(
-                self.state["PCI"], "decrease", step_size=0.20
-            )
-            self.state["O2_enrichment"] = self.controller.incremental_adjust(
-                self.state["O2_enrichment"], "decrease", step_size=0.20
-            )
-        
-        # Si protection
-        if Si > SafetyLimits.BF_SI_MAX:
-            # High Si: reduce PCI
-            self.state["PCI"] = self.controller.incremental_adjust(
-                self.state["PCI"], "decrease", step_size=0.05
-            )
-    
-    def _apply_process_rules(self, Si: float):
-        """Level 2: Process stability rules"""
-        
-        Si_target = self.state["Si_target"]
-        
-        # Si too high - increase reduction/decrease heat fluctuation
-        if Si > Si_target + self.Si_band:
-            self.hysteresis_states["si_high_action_active"] = True
-            self.state["PCI"] = self.controller.incremental_adjust(
-                self.state["PCI"], "decrease", step_size=0.10  # Increased from 0.02
-            )
-            self.state["O2_enrichment"] = self.controller.incremental_adjust(
-                self.state["O2_enrichment"], "decrease", step_size=0.10  # Increased from 0.02
-            )
-        elif Si < Si_target + self.Si_band/2:
-            self.hysteresis_states["si_high_action_active"] = False
-        
-        # Si too low - increase PCI or wind
-        if Si < Si_target - self.Si_band:
-            self.hysteresis_states["si_low_action_active"] = True
-            self.state["PCI"] = self.controller.incremental_adjust(
-                self.state["PCI"], "increase", step_size=0.10,  # Increased from 0.02
-                max_val=SafetyLimits.BF_PCI_MAX
-            )
-            self.state["wind_volume"] = self.controller.incremental_adjust(
-                self.state["wind_volume"], "increase", step_size=0.10,  # Increased from 0.01
-                max_val=SafetyLimits.BF_WIND_MAX
-            )
-        elif Si > Si_target - self.Si_band/2:
-            self.hysteresis_states["si_low_action_active"] = False
-    
-    def _apply_energy_rules(
+        self._hyst = _bf_step(self._state, self._hyst, obs, self._params)
+        
+        return self._view
+    
+    def step_array(
         self,
-        SOC_bfg: float,
-        P_bfg: float,
-        COG_available: float,
-        COG_required: float,
-        O2_available: float
-    ):
-        """Level 3: Energy coordination rules"""
-        
-        # Gas holder too full - reduce BFG production (fast response needed!)
-        if SOC_bfg > self.SOC_high or P_bfg > self.P_high:
-            self.hysteresis_states["gh_full_action_active"] = True
-            self.state["wind_volume"] = self.controller.incremental_adjust(
-                self.state["wind_volume"], "decrease", step_size=0.15,  # Increased from 0.05
-                min_val=SafetyLimits.BF_WIND_MIN
-            )
-            self.state["PCI"] = self.controller.incremental_adjust(
-                self.state["PCI"], "decrease", step_size=0.12  # Increased from 0.03
-            )
-            self.state["O2_enrichment"] = self.controller.incremental_adjust(
-                self.state["O2_enrichment"], "decrease", step_size=0.15  # Increased from 0.05
-            )
-        elif SOC_bfg < 0.75 and P_bfg < 13.0:
-            self.hysteresis_states["gh_full_action_active"] = False
-        
-        # Gas holder too empty - increase BFG production (fast response needed!)
-        if SOC_bfg < self.SOC_low or P_bfg < self.P_low:
-            self.hysteresis_states["gh_empty_action_active"] = True
-            self.state["wind_volume"] = self.controller.incremental_adjust(
-                self.state["wind_volume"], "increase", step_size=0.15,  # Increased from 0.05
-                max_val=SafetyLimits.BF_WIND_MAX
-            )
-            self.state["PCI"] = self.controller.incremental_adjust(
-                self.state["PCI"], "increase", step_size=0.12,  # Increased from 0.03
-                max_val=SafetyLimits.BF_PCI_MAX
-            )
-        elif SOC_bfg > 0.30 and P_bfg > 10.0:
-            self.hysteresis_states["gh_empty_action_active"] = False
-        
-        # COG shortage - reduce COG usage, compensate with PCI
-        if COG_available < COG_required:
-            self.state["COG_ratio"] = self.controller.incremental_adjust(
-                self.state["COG_ratio"], "decrease", step_size=0.10,
-                min_val=0.0
-            )
-            self.state["PCI"] = self.controller.incremental_adjust(
-                self.state["PCI"], "increase", step_size=0.05,
-                max_val=SafetyLimits.BF_PCI_MAX
-            )
-        
-        # O2 shortage - reduce O2, increase PCI
-        O2_required = self.state["O2_enrichment"] * self.state["wind_volume"] / 100
-        if O2_available < O2_required:
-            self.state["O2_enrichment"] = self.controller.incremental_adjust(
-                self.state["O2_enrichment"], "decrease", step_size=0.10
-            )
-            self.state["PCI"] = self.controller.incremental_adjust(
-                self.state["PCI"], "increase", step_size=0.04,
-                max_val=SafetyLimits.BF_PCI_MAX
-            )
-    
-    def _apply_economic_rules(self, peak_electricity: bool):
-        """Level 4: Economic optimization (lowest priority)"""
-        
-        # During peak electricity hours, reduce wind volume (blower power)
-        if peak_electricity:
-            self.state["wind_volume"] = self.controller.incremental_adjust(
-                self.state["wind_volume"], "decrease", step_size=0.05,
-                min_val=SafetyLimits.BF_WIND_MIN
-            )
+        obs: np.ndarray,
+        message_bus: Optional[MessageBus] = None
+    ) -> np.ndarray:
+        """
+        Same step as step() on a positional observation vector, without the dict interface
+        
+        obs: len(OBS_KEYS) vector (ndarray, dtype = float), ordered as OBS_KEYS
+        return: the new state as a vector ordered as STATE_KEYS (a copy)
+        """
+        obs = np.ascontiguousarray(obs, dtype=np.float64)
+        self._hyst = _bf_step(self._state, self._hyst, obs, self._params)
+        return self._state.copy()
+
+
+def _adjust_where(mask: np.ndarray, values: np.ndarray, factor: float,
+                  min_val: float = 0.0, max_val: float = float('inf')) -> np.ndarray:
+    """incremental_adjust() applied only where mask is set (same clamp order)"""
+    return np.where(mask, np.maximum(min_val, np.minimum(max_val, values * factor)), values)
+
+
+def _update_bit(hyst: np.ndarray, bit: int, set_mask: np.ndarray, clear_mask: np.ndarray) -> np.ndarray:
+    """Set bit where set_mask, else clear it where clear_mask (the kernel's if/elif)"""
+    return (hyst & ~(clear_mask * bit)) | (set_mask * bit)
+
+
+class BF_AgentBatch:
+    """
+    N Blast Furnace Agents stepped together.
+    
+    Same rule hierarchy as BF_Agent, evaluated for all agents at once: the state
+    is a struct-of-arrays (one row per agent, columns in STATE_KEYS order) and
+    each if-rule becomes a masked whole-column update. Rules are still applied
+    one after another, so every rule sees the values left by the previous ones.
+    """
+    
+    def __init__(self, n_agents: int, agent_ids: Optional[List[str]] = None,
+                 dtype=np.float64):
+        self.agent_ids = agent_ids if agent_ids else [f"BF{i + 1}" for i in range(n_agents)]
+        
+        # Internal state, initialized to the BF_Agent defaults
+        defaults = BF_Agent().state
+        self.state_arr = np.empty((n_agents, len(STATE_KEYS)), dtype=dtype)
+        self.state_arr[:] = [defaults[key] for key in STATE_KEYS]
+        
+        # Hysteresis states (one bitmask of HYST_* flags per agent)
+        self.hyst_arr = np.zeros(n_agents, dtype=np.int64)
+        
+        # Parameters (shared by all agents)
+        self.Si_band = 0.03
+        self.SOC_high = 0.85
+        self.SOC_low = 0.25
+        self.P_high = 14.0
+        self.P_low = 9.0
+    
+    def pack_observations(self, observations: List[Dict[str, Any]]) -> np.ndarray:
+        """Collect one observation dict per agent into an (N, len(OBS_KEYS)) array"""
+        return np.array([list(map(obs.get, OBS_KEYS, OBS_DEFAULTS)) for obs in observations],
+                        dtype=self.state_arr.dtype)
+    
+    def get_state(self, i: int) -> Dict[str, Any]:
+        """Return the current state of agent i (same form as BF_Agent.get_state)"""
+        return {key: float(value) for key, value in zip(STATE_KEYS, self.state_arr[i])}
+    
+    def step(self, obs_arr: np.ndarray) -> np.ndarray:
+        """
+        Execute one control step for all agents
+        
+        Args:
+            obs_arr: (N, len(OBS_KEYS)) observations, see pack_observations()
+        
+        Returns: The (N, len(STATE_KEYS)) state array (updated in place)
+        """
+        s, h = self.state_arr, self.hyst_arr
+        Si = obs_arr[:, OBS_SI]
+        SOC_bfg = obs_arr[:, OBS_SOC_BFG]
+        P_bfg = obs_arr[:, OBS_P_BFG]
+        
+        # Level 1: Safety
+        s[:, WIND] = np.maximum(_BF_WIND_MIN, np.minimum(_BF_WIND_MAX, s[:, WIND]))
+        s[:, O2] = np.maximum(0.0, np.minimum(_BF_O2_MAX, s[:, O2]))
+        hot = obs_arr[:, OBS_T_HOT_METAL] > _BF_TEMP_MAX
+        s[:, PCI] = _adjust_where(hot, s[:, PCI], 1 - 0.20)
+        s[:, O2] = _adjust_where(hot, s[:, O2], 1 - 0.20)
+        s[:, PCI] = _adjust_where(Si > _BF_SI_MAX, s[:, PCI], 1 - 0.05)
+        
+        # Level 2: Process stability
+        Si_target = s[:, SI_TARGET]
+        si_high = Si > Si_target + self.Si_band
+        h[:] = _update_bit(h, HYST_SI_HIGH, si_high, Si < Si_target + self.Si_band/2)
+        s[:, PCI] = _adjust_where(si_high, s[:, PCI], 1 - 0.10)
+        s[:, O2] = _adjust_where(si_high, s[:, O2], 1 - 0.10)
+        si_low = Si < Si_target - self.Si_band
+        h[:] = _update_bit(h, HYST_SI_LOW, si_low, Si > Si_target - self.Si_band/2)
+        s[:, PCI] = _adjust_where(si_low, s[:, PCI], 1 + 0.10, max_val=_BF_PCI_MAX)
+        s[:, WIND] = _adjust_where(si_low, s[:, WIND], 1 + 0.10, max_val=_BF_WIND_MAX)
+        
+        # Level 3: Energy coordination
+        full = (SOC_bfg > self.SOC_high) | (P_bfg > self.P_high)
+        h[:] = _update_bit(h, HYST_GH_FULL, full, (SOC_bfg < 0.75) & (P_bfg < 13.0))
+        s[:, WIND] = _adjust_where(full, s[:, WIND], 1 - 0.15, min_val=_BF_WIND_MIN)
+        s[:, PCI] = _adjust_where(full, s[:, PCI], 1 - 0.12)
+        s[:, O2] = _adjust_where(full, s[:, O2], 1 - 0.15)
+        empty = (SOC_bfg < self.SOC_low) | (P_bfg < self.P_low)
+        h[:] = _update_bit(h, HYST_GH_EMPTY, empty, (SOC_bfg > 0.30) & (P_bfg > 10.0))
+        s[:, WIND] = _adjust_where(empty, s[:, WIND], 1 + 0.15, max_val=_BF_WIND_MAX)
+        s[:, PCI] = _adjust_where(empty, s[:, PCI], 1 + 0.12, max_val=_BF_PCI_MAX)
+        cog_short = obs_arr[:, OBS_COG_AVAILABLE] < obs_arr[:, OBS_COG_REQUIRED]
+        s[:, COG_RATIO] = _adjust_where(cog_short, s[:, COG_RATIO], 1 - 0.10)
+        s[:, PCI] = _adjust_where(cog_short, s[:, PCI], 1 + 0.05, max_val=_BF_PCI_MAX)
+        o2_short = obs_arr[:, OBS_O2_AVAILABLE] < s[:, O2] * s[:, WIND] / 100
+        s[:, O2] = _adjust_where(o2_short, s[:, O2], 1 - 0.10)
+        s[:, PCI] = _adjust_where(o2_short, s[:, PCI], 1 + 0.04, max_val=_BF_PCI_MAX)
+        
+        # Level 4: Economic optimization
+        peak = obs_arr[:, OBS_PEAK_ELECTRICITY] != 0
+        s[:, WIND] = _adjust_where(peak, s[:, WIND], 1 - 0.05, min_val=_BF_WIND_MIN)
+        
+        return s
 
 
 if __name__ == "__main__":
+    # Run from steel_MAS/: python -m agents.bf_agent
     # Simple test
     agent = BF_Agent("BF1")
     
@@ -3,47 +3,162 @@ BOF (Basic Oxygen Furnace) Agent
 Implements rule-based control for BOF with surge warning capability
 """
 
-import sys
-sys.path.append('..')
-
+import numpy as np
 from typing import Dict, Any, Optional
-from solvers.rule_based import RuleBasedController, SafetyLimits
+from solvers.rule_based import SafetyLimits, adjust_down, adjust_up, StateView, array_field, load_aot_kernels, njit, prange, with_serial_fallback
 from protocols.gas_request import BOFGSurgeWarning, MessageBus
 
 
+# Column layout of the state / observation vectors used by the step kernel;
+# the state vector carries the blow cycle clock after the public STATE_KEYS
+STATE_KEYS = ("oxygen", "scrap_steel", "T_target", "blow_time", "blow_duration")
+OXYGEN, SCRAP_STEEL, T_TARGET, BLOW_TIME, BLOW_DURATION, TIME_TO_NEXT_BLOW = range(len(STATE_KEYS) + 1)
+
+OBS_KEYS = ("T_steel", "P_bof_gas", "bof_gas_current", "SOC_bofg", "P_bofg")
+OBS_DEFAULTS = (1650, 12.0, 30000, 0.5, 12.0)
+OBS_T_STEEL, OBS_P_BOF_GAS, OBS_BOF_GAS_CURRENT, OBS_SOC_BOFG, OBS_P_BOFG = range(len(OBS_KEYS))
+
+# Safety limits as plain module constants (numba freezes them into the kernel)
+_BOF_O2_MAX = SafetyLimits.BOF_O2_MAX
+_BOF_P_MAX = SafetyLimits.BOF_P_MAX
+
+
+@njit("void(float64[::1], float64[::1])", cache=True, boundscheck=False, nogil=True)
+def _bof_step_kernel(state, obs):
+    """
+    One control step of the BOF rules on plain arrays (state is updated in place)
+    
+    The surge warning is a message, so it is sent by BOF_Agent.step itself.
+    """
+    oxygen = state[OXYGEN]
+    
+    # Level 1: Safety rules
+    # O2 hard limit
+    oxygen = max(0.0, min(_BOF_O2_MAX, oxygen))
+    
+    # Pressure protection
+    if obs[OBS_P_BOF_GAS] > _BOF_P_MAX:
+        oxygen = adjust_down(oxygen, 0.10, 0.0)
+    
+    # Level 2: Process stability
+    T_steel = obs[OBS_T_STEEL]
+    T_target = state[T_TARGET]
+    
+    # Temperature too high
+    if T_steel > T_target + 20:
+        # Reduce oxygen or increase scrap
+        oxygen = adjust_down(oxygen, 0.03, 0.0)
+        state[SCRAP_STEEL] = adjust_up(state[SCRAP_STEEL], 0.02, 30)  # Maximum scrap ratio
+    
+    # Temperature too low
+    elif T_steel < T_target - 20:
+        oxygen = adjust_up(oxygen, 0.03, _BOF_O2_MAX)
+    
+    # Level 3: Energy coordination
+    # If already producing high BOFG and GH is pressurized
+    bof_gas_design = 50000  # Design BOFG rate
+    if obs[OBS_BOF_GAS_CURRENT] > bof_gas_design * 1.3 and obs[OBS_P_BOFG] > 14:
+        oxygen = adjust_down(oxygen, 0.10, 0.0)
+    
+    state[OXYGEN] = oxygen
+    
+    # Update time to next blow
+    state[TIME_TO_NEXT_BLOW] = max(0.0, state[TIME_TO_NEXT_BLOW] - 1.0)  # Assume 1 min timestep
+
+
+# Multi-agent step: every row is independent, so the agent loop is a prange.
+# The serial twin is compiled alongside, see with_serial_fallback().
+@njit("void(float64[:, ::1], float64[:, ::1])", parallel=True, cache=True, nogil=True)
+def _bof_step_all_parallel(states, observations):
+    """
+    One control step for N BOF agents: row i of states / observations is
+    agent i (same layout as the _bof_step_kernel vectors)
+    """
+    for i in prange(states.shape[0]):
+        _bof_step_kernel(states[i], observations[i])
+
+
+@njit("void(float64[:, ::1], float64[:, ::1])", cache=True, nogil=True)
+def _bof_step_all_serial(states, observations):
+    """
+    One control step for N BOF agents: row i of states / observations is
+    agent i (same layout as the _bof_step_kernel vectors)
+    """
+    for i in range(states.shape[0]):
+        _bof_step_kernel(states[i], observations[i])
+
+
+bof_step_all = with_serial_fallback(_bof_step_all_parallel, _bof_step_all_serial)
+
+
+# Single-agent calls from Python use the AOT-built kernel when it is available
+# (no compilation in a fresh process); the @njit kernel above is the fallback
+_aot = load_aot_kernels()
+_bof_step = _aot.bof_step_kernel if _aot is not None else _bof_step_kernel
+
+
 class BOF_Agent:
     """
     BOF Agent with multi-level rules:
     - Level 1: Safety (O2 limits, pressure)
     - Level 2: Process (temperature control)
     - Level 3: Energy coordination (BOFG surge management)
+    
+    The rules run in the compiled _bof_step_kernel; every state entry is also
+    a typed attribute (agent.oxygen, ...) backed by the state vector.
     """
     
+    __slots__ = ("agent_id", "_state", "_view", "_obs_buf", "_surge_warning_buf")
+    
+    oxygen = array_field("_state", OXYGEN, "Nm³/h")
+    scrap_steel = array_field("_state", SCRAP_STEEL, "t/batch")
+    T_target = array_field("_state", T_TARGET, "°C")
+    blow_time = array_field("_state", BLOW_TIME, "minutes into blow")
+    blow_duration = array_field("_state", BLOW_DURATION, "typical blow duration")
+    # Blow cycle tracking
+    time_to_next_blow = array_field("_state", TIME_TO_NEXT_BLOW, "minutes to the next blow")
+    
     def __init__(self, agent_id: str = "BOF1"):
         self.agent_id = agent_id
-        self.controller = RuleBasedController()
         
-        # Internal state
-        self.state = {
-            "oxygen": 45000,  # Nm³/h
-            "scrap_steel": 20,  # t/batch
-            "T_target": 1650,  # °C
-            "blow_time": 0,  # minutes into blow
-            "blow_duration": 18,  # typical blow duration
-        }
+        # Internal state (STATE_KEYS order, then the blow cycle clock)
+        self._state = np.array([
+            45000,  # oxygen: Nm³/h
+            20,  # scrap_steel: t/batch
+            1650,  # T_target: °C
+            0,  # blow_time: minutes into blow
+            18,  # blow_duration: typical blow duration
+            30.0,  # time_to_next_blow: minutes
+        ], dtype=np.float64)
+        
+        # Preallocated kernel input
+        self._obs_buf = np.empty(len(OBS_KEYS))
         
-        # Blow cycle tracking
-        self.time_to_next_blow = 30.0  # minutes
+        # Reused surge warning (to_message copies its fields into each message)
+        self._surge_warning_buf = BOFGSurgeWarning(
+            time_to_blow=0.0,
+            expected_peak=60000,  # Typical BOFG peak
+            duration=18.0,
+            current_gh_soc=0.0
+        )
         
+        # Live read-only view of the state, returned by step()
+        self._view = StateView(self, STATE_KEYS)
+    
+    @property
+    def state(self) -> StateView:
+        """Current state as a live read-only mapping (get_state() takes a snapshot)"""
+        return self._view
+    
     def get_state(self) -> Dict[str, Any]:
         """Return current state"""
-        return self.state.copy()
+        return dict(zip(STATE_KEYS, self._state[:len(STATE_KEYS)].tolist()))
     
     def step(
         self,
         observations: Dict[str, Any],
         message_bus: Optional[MessageBus] = None
-    ) -> Dict[str, Any]:
+    ) -> StateView:
         """
         Execute one control step
         
@@ -55,89 +170,46 @@ class BOF_Agent:
                 - SOC_bofg: BOFG gas holder SOC
                 - P_bofg: BOFG pressure [kPa]
         """
-        T_steel = observations.get("T_steel", 1650)
-        P_bof_gas = observations.get("P_bof_gas", 12.0)
-        bof_gas_current = observations.get("bof_gas_current", 30000)
-        SOC_bofg = observations.get("SOC_bofg", 0.5)
-        P_bofg = observations.get("P_bofg", 12.0)
-        
-        # Apply rules
-        self._apply_safety_rules(P_bof_gas)
-        self._apply_process_rules(T_steel)
-        self._apply_energy_rules(bof_gas_current, SOC_bofg, P_bofg, message_bus)
+        # (one C-level map over the module-level key/default tuples)
+        obs = self._obs_buf
+        obs[:] = list(map(observations.get, OBS_KEYS, OBS_DEFAULTS))
         
-        # Update time to next blow
-        self.time_to_next_blow = max(0, self.time_to_next_blow - 1.0)  # Assume 1 min timestep
+        self._apply(obs, message_bus)
         
-        return self.get_state()
-        
-    def _apply_safety_rules(self, P_bof_gas: float):
-        """Level 1: Safety rules"""
-        
-        # O2 hard limit
-        self.state["oxygen"] = self.controller.clamp(
-            self.state["oxygen"],
-            0.0,
-            SafetyLimits.BOF_O2_MAX
-        )
-        
-        # Pressure protection
-        if P_bof_gas > SafetyLimits.BOF_P_MAX:
-            self.state["oxygen"] = self.controller.incremental_adjust(
-                self.state["oxygen"], "decrease", step_size=0.10
-            )
-    
-    def _apply_process_rules(self, T_steel: float):
-        """Level 2: Process stability"""
-        
-        T_target = self.state["T_target"]
-        
-        # Temperature too high
-        if T_steel > T_target + 20:
-            # Reduce oxygen or increase scrap
-            self.state["oxygen"] = self.controller.incremental_adjust(
-                self.state["oxygen"], "decrease", step_size=0.03
-            )
-            self.state["scrap_steel"] = self.controller.incremental_adjust(
-                self.state["scrap_steel"], "increase", step_size=0.02,
-                max_val=30  # Maximum scrap ratio
-            )
-        
-        # Temperature too low
-        elif T_steel < T_target - 20:
-            self.state["oxygen"] = self.controller.incremental_adjust(
-                self.state["oxygen"], "increase", step_size=0.03,
-                max_val=SafetyLimits.BOF_O2_MAX
-            )
-    
-    def _apply_energy_rules(
+        return self._view
+    
+    def step_array(
         self,
-        bof_gas_current: float,
-        SOC_bofg: float,
-        P_bofg: float,
-        message_bus: Optional[MessageBus]
-    ):
-        """Level 3: Energy coordination"""
+        obs: np.ndarray,
+        message_bus: Optional[MessageBus] = None
+    ) -> np.ndarray:
+        """
+        Same step as step() on a positional observation vector, without the dict interface
         
-        # Send surge warning if approaching blow time
-        if self.time_to_next_blow <= 2.0 and message_bus is not None:
-            warning = BOFGSurgeWarning(
-                time_to_blow=self.time_to_next_blow,
-                expected_peak=60000,  # Typical BOFG peak
-                duration=self.state["blow_duration"],
-                current_gh_soc=SOC_bofg
-            )
+        obs: len(OBS_KEYS) vector (ndarray, dtype = float), ordered as OBS_KEYS
+        return: the new state as a vector ordered as STATE_KEYS (a copy)
+        """
+        obs = np.ascontiguousarray(obs, dtype=np.float64)
+        self._apply(obs, message_bus)
+        return self._state[:len(STATE_KEYS)].copy()
+    
+    def _apply(self, obs: np.ndarray, message_bus: Optional[MessageBus]):
+        """Surge warning and rules for one packed observation vector"""
+        # Level 3: Send surge warning if approaching blow time
+        time_to_next_blow = self._state[TIME_TO_NEXT_BLOW]
+        if time_to_next_blow <= 2.0 and message_bus is not None:
+            warning = self._surge_warning_buf
+            warning.time_to_blow = float(time_to_next_blow)
+            warning.duration = float(self._state[BLOW_DURATION])
+            warning.current_gh_soc = float(obs[OBS_SOC_BOFG])
             message_bus.send(warning.to_message(message_bus.time))
         
-        # If already producing high BOFG and GH is pressurized
-        bof_gas_design = 50000  # Design BOFG rate
-        if bof_gas_current > bof_gas_design * 1.3 and P_bofg > 14:
-            self.state["oxygen"] = self.controller.incremental_adjust(
-                self.state["oxygen"], "decrease", step_size=0.10
-            )
+        # Apply rules (and advance the blow clock)
+        _bof_step(self._state, obs)
 
 
 if __name__ == "__main__":
+    # Run from steel_MAS/: python -m agents.bof_agent
     # Simple test
     agent = BOF_Agent("BOF1")
     
@@ -3,45 +3,153 @@ Coke Oven Agent
 Implements rule-based control for coke oven temperature and pushing rate
 """
 
-import sys
-sys.path.append('..')
-
+import numpy as np
 from typing import Dict, Any, Optional
-from solvers.rule_based import RuleBasedController, SafetyLimits
+from solvers.rule_based import SafetyLimits, adjust_down, adjust_up, StateView, array_field, load_aot_kernels, njit, prange, with_serial_fallback
 from protocols.gas_request import MessageBus
 
 
+# Column layout of the state / observation vectors used by the step kernel
+STATE_KEYS = ("heating_gas_input", "pushing_rate", "T_target")
+HEATING_GAS_INPUT, PUSHING_RATE, T_TARGET = range(len(STATE_KEYS))
+
+OBS_KEYS = ("T_furnace", "SOC_cog", "COG_demand")
+OBS_DEFAULTS = (1200, 0.5, 10000)
+OBS_T_FURNACE, OBS_SOC_COG, OBS_COG_DEMAND = range(len(OBS_KEYS))
+
+# Safety limits as plain module constants (numba freezes them into the kernel)
+_CO_TEMP_MAX = SafetyLimits.CO_TEMP_MAX
+_CO_TEMP_MIN = SafetyLimits.CO_TEMP_MIN
+
+
+@njit("void(float64[::1], float64[::1], float64)", cache=True, boundscheck=False, nogil=True)
+def _co_step_kernel(state, obs, T_band):
+    """One control step of the coke oven rules on plain arrays (state is updated in place)"""
+    T_furnace = obs[OBS_T_FURNACE]
+    SOC_cog = obs[OBS_SOC_COG]
+    heating_gas = state[HEATING_GAS_INPUT]
+    pushing_rate = state[PUSHING_RATE]
+    
+    # Level 1: Safety rules
+    # Emergency temperature protection
+    if T_furnace > _CO_TEMP_MAX:
+        heating_gas = adjust_down(heating_gas, 0.10, 5000)
+    
+    if T_furnace < _CO_TEMP_MIN:
+        heating_gas = adjust_up(heating_gas, 0.10, 25000)
+    
+    # Level 2: Process stability
+    T_target = state[T_TARGET]
+    
+    # Temperature control with hysteresis
+    if T_furnace < T_target - T_band:
+        # Too cold: increase heating gas
+        heating_gas = adjust_up(heating_gas, 0.03, 25000)
+    elif T_furnace > T_target + T_band:
+        # Too hot: decrease heating gas
+        heating_gas = adjust_down(heating_gas, 0.03, 5000)
+    
+    # Level 3: Energy coordination
+    # COG holder too full - slow down pushing
+    if SOC_cog > 0.85:
+        pushing_rate = adjust_down(pushing_rate, 0.05, 0.7)  # Don't go below 70% rate
+    elif SOC_cog < 0.75:
+        # Normal operation
+        pushing_rate = min(1.0, pushing_rate * 1.02)
+    
+    # COG holder too empty - speed up pushing
+    if SOC_cog < 0.25:
+        pushing_rate = adjust_up(pushing_rate, 0.03, 1.2)  # Don't exceed 120% rate
+    elif SOC_cog > 0.35:
+        # Return to normal
+        if pushing_rate > 1.0:
+            pushing_rate = max(1.0, pushing_rate * 0.98)
+    
+    state[HEATING_GAS_INPUT] = heating_gas
+    state[PUSHING_RATE] = pushing_rate
+
+
+# Multi-agent step: every row is independent, so the agent loop is a prange.
+# The serial twin is compiled alongside, see with_serial_fallback().
+@njit("void(float64[:, ::1], float64[:, ::1], float64)", parallel=True, cache=True, nogil=True)
+def _co_step_all_parallel(states, observations, T_band):
+    """
+    One control step for N coke oven agents: row i of states / observations
+    is agent i (same layout as the _co_step_kernel vectors)
+    """
+    for i in prange(states.shape[0]):
+        _co_step_kernel(states[i], observations[i], T_band)
+
+
+@njit("void(float64[:, ::1], float64[:, ::1], float64)", cache=True, nogil=True)
+def _co_step_all_serial(states, observations, T_band):
+    """
+    One control step for N coke oven agents: row i of states / observations
+    is agent i (same layout as the _co_step_kernel vectors)
+    """
+    for i in range(states.shape[0]):
+        _co_step_kernel(states[i], observations[i], T_band)
+
+
+co_step_all = with_serial_fallback(_co_step_all_parallel, _co_step_all_serial)
+
+
+# Single-agent calls from Python use the AOT-built kernel when it is available
+# (no compilation in a fresh process); the @njit kernel above is the fallback
+_aot = load_aot_kernels()
+_co_step = _aot.co_step_kernel if _aot is not None else _co_step_kernel
+
+
 class CokeOven_Agent:
     """
     Coke Oven Agent with multi-level rules:
     - Level 1: Safety (temperature limits)
     - Level 2: Process (temperature control, pushing rate)
     - Level 3: Energy coordination (COG production vs demand)
+    
+    The rules run in the compiled _co_step_kernel; every state entry is also
+    a typed attribute (agent.pushing_rate, ...) backed by the state vector.
     """
     
+    __slots__ = ("agent_id", "_state", "_view", "_obs_buf", "T_band")
+    
+    heating_gas_input = array_field("_state", HEATING_GAS_INPUT, "Nm³/h")
+    pushing_rate = array_field("_state", PUSHING_RATE, "relative to nominal")
+    T_target = array_field("_state", T_TARGET, "°C")
+    
     def __init__(self, agent_id: str = "CO1"):
         self.agent_id = agent_id
-        self.controller = RuleBasedController()
         
-        # Internal state
-        self.state = {
-            "heating_gas_input": 15000,  # Nm³/h
-            "pushing_rate": 1.0,  # Relative to nominal
-            "T_target": 1200,  # °C
-        }
+        # Internal state (STATE_KEYS order)
+        self._state = np.array([
+            15000,  # heating_gas_input: Nm³/h
+            1.0,  # pushing_rate: relative to nominal
+            1200,  # T_target: °C
+        ], dtype=np.float64)
         
         # Parameters
         self.T_band = 20  # °C hysteresis band
         
+        # Preallocated kernel input
+        self._obs_buf = np.empty(len(OBS_KEYS))
+        
+        # Live read-only view of the state, returned by step()
+        self._view = StateView(self, STATE_KEYS)
+    
+    @property
+    def state(self) -> StateView:
+        """Current state as a live read-only mapping (get_state() takes a snapshot)"""
+        return self._view
+        
     def get_state(self) -> Dict[str, Any]:
         """Return current state"""
-        return self.state.copy()
+        return dict(zip(STATE_KEYS, self._state.tolist()))
     
     def step(
         self,
         observations: Dict[str, Any],
         message_bus: Optional[MessageBus] = None
-    ) -> Dict[str, Any]:
+    ) -> StateView:
         """
         Execute one control step
         
@@ -51,78 +159,33 @@ class CokeOven_Agent:
                 - SOC_cog: COG gas holder SOC
                 - COG_demand: COG demand [Nm³/h]
         """
-        T_furnace = observations.get("T_furnace", 1200)
-        SOC_cog = observations.get("SOC_cog", 0.5)
-        COG_demand = observations.get("COG_demand", 10000)
+        # (one C-level map over the module-level key/default tuples)
+        obs = self._obs_buf
+        obs[:] = list(map(observations.get, OBS_KEYS, OBS_DEFAULTS))
         
         # Apply rules
-        self._apply_safety_rules(T_furnace)
-        self._apply_process_rules(T_furnace)
-        self._apply_energy_rules(SOC_cog)
+        _co_step(self._state, obs, float(self.T_band))
         
-        return self.get_state()
+        return self._view
     
-    def _apply_safety_rules(self, T_furnace: float):
-        """Level 1: Safety rules"""
-        
-        # Emergency temperature protection
-        if T_furnace > SafetyLimits.CO_TEMP_MAX:
-            self.state["heating_gas_input"] = self.controller.incremental_adjust(
-                self.state["heating_gas_input"], "decrease", step_size=0.10,
-                min_val=5000
-            )
-        
-        if T_furnace < SafetyLimits.CO_TEMP_MIN:
-            self.state["heating_gas_input"] = self.controller.incremental_adjust(
-                self.state["heating_gas_input"], "increase", step_size=0.10,
-                max_val=25000
-            )
-    
-    def _apply_process_rules(self, T_furnace: float):
-        """Level 2: Process stability"""
-        
-        T_target = self.state["T_target"]
-        
-        # Temperature control with hysteresis
-        if T_furnace < T_target - self.T_band:
-            # Too cold: increase heating gas
-            self.state["heating_gas_input"] = self.controller.incremental_adjust(
-                self.state["heating_gas_input"], "increase", step_size=0.03,
-                max_val=25000
-            )
-        elif T_furnace > T_target + self.T_band:
-            # Too hot: decrease heating gas
-            self.state["heating_gas_input"] = self.controller.incremental_adjust(
-                self.state["heating_gas_input"], "decrease", step_size=0.03,
-                min_val=5000
-            )
-    
-    def _apply_energy_rules(self, SOC_cog: float):
-        """Level 3: Energy coordination"""
-        
-        # COG holder too full - slow down pushing
-        if SOC_cog > 0.85:
-            self.state["pushing_rate"] = self.controller.incremental_adjust(
-                self.state["pushing_rate"], "decrease", step_size=0.05,
-                min_val=0.7  # Don't go below 70% rate
-            )
-        elif SOC_cog < 0.75:
-            # Normal operation
-            self.state["pushing_rate"] = min(1.0, self.state["pushing_rate"] * 1.02)
+    def step_array(
+        self,
+        obs: np.ndarray,
+        message_bus: Optional[MessageBus] = None
+    ) -> np.ndarray:
+        """
+        Same step as step() on a positional observation vector, without the dict interface
         
-        # COG holder too empty - speed up pushing
-        if SOC_cog < 0.25:
-            self.state["pushing_rate"] = self.controller.incremental_adjust(
-                self.state["pushing_rate"], "increase", step_size=0.03,
-                max_val=1.2  # Don't exceed 120% rate
-            )
-        elif SOC_cog > 0.35:
-            # Return to normal
-            if self.state["pushing_rate"] > 1.0:
-                self.state["pushing_rate"] = max(1.0, self.state["pushing_rate"] * 0.98)
+        obs: len(OBS_KEYS) vector (ndarray, dtype = float), ordered as OBS_KEYS
+        return: the new state as a vector ordered as STATE_KEYS (a copy)
+        """
+        obs = np.ascontiguousarray(obs, dtype=np.float64)
+        _co_step(self._state, obs, float(self.T_band))
+        return self._state.copy()
 
 
 if __name__ == "__main__":
+    # Run from steel_MAS/: python -m agents.coke_oven_agent
     # Simple test
     agent = CokeOven_Agent("CO1")
     
@@ -3,14 +3,157 @@ Gas Holder Agent
 Manages BFG, BOFG, and COG gasholders with priority-based allocation
 """
 
-import sys
-sys.path.append('..')
-
+import numpy as np
 from typing import Dict, Any, Optional
-from solvers.rule_based import RuleBasedController, SafetyLimits
+from solvers.rule_based import SafetyLimits, StateView, array_field, load_aot_kernels, njit, prange, with_serial_fallback
 from protocols.gas_request import MessageBus, MessageType
 
 
+# Column layout of the state / observation vectors used by the step kernel
+STATE_KEYS = ("bfg_to_pp", "bfg_to_heating", "bofg_to_pp", "bofg_to_heating", "cog_to_heating", "cog_to_bf")
+BFG_TO_PP, BFG_TO_HEATING, BOFG_TO_PP, BOFG_TO_HEATING, COG_TO_HEATING, COG_TO_BF = range(len(STATE_KEYS))
+
+OBS_KEYS = ("soc_bfg", "p_bfg", "soc_bofg", "p_bofg", "soc_cog", "p_cog")
+OBS_DEFAULTS = (0.5, 12.0, 0.5, 12.0, 0.5, 12.0)
+OBS_SOC_BFG, OBS_P_BFG, OBS_SOC_BOFG, OBS_P_BOFG, OBS_SOC_COG, OBS_P_COG = range(len(OBS_KEYS))
+
+# Safety limits as plain module constants (numba freezes them into the kernels)
+_GH_P_EMERGENCY = SafetyLimits.GH_P_EMERGENCY
+_GH_SOC_MIN = SafetyLimits.GH_SOC_MIN
+
+
+# Gas holder decision tables.
+# The rule trees of the three holders only depend on the surge flag and on a few
+# interval tests on (soc, p), so each tree is written down once as a
+# priority-ordered rule list and resolved ahead of time for all 64 combinations
+# of those outcomes. Row [holder, code, flow] holds (factor above nominal,
+# factor below nominal, factor at nominal, lower clamp, upper clamp) for the
+# holder's two flows, and a step is one table lookup plus x = clamp(x * factor).
+GH_SURGE, GH_EMERGENCY, GH_EMPTY_SAFETY, GH_FULL, GH_EMPTY, GH_NORMAL = (1 << bit for bit in range(6))
+HOLDER_BFG, HOLDER_BOFG, HOLDER_COG = range(3)
+F_ABOVE, F_BELOW, F_AT, F_LO, F_HI = range(5)
+
+
+def _up(step: float, hi: float) -> tuple:
+    """Table entry of incremental_adjust(x, "increase", step, max_val=hi)"""
+    return (1 + step,) * 3 + (0.0, hi)
+
+
+def _down(step: float, lo: float) -> tuple:
+    """Table entry of incremental_adjust(x, "decrease", step, min_val=lo)"""
+    return (1 - step,) * 3 + (lo, np.inf)
+
+
+_KEEP = (1.0, 1.0, 1.0, 0.0, np.inf)
+_TREND = (0.98, 1.02, 1.0, 0.0, np.inf)  # slowly trend back to the nominal value
+
+# (condition bit, (action on the first flow, action on the second flow)), highest priority first
+_GH_RULES = {
+    HOLDER_BFG: (  # bfg_to_pp, bfg_to_heating
+        (GH_EMERGENCY, (_up(0.20, 80000), _up(0.10, 50000))),  # Level 1: Emergency over-pressure, maximize outflow
+        (GH_EMPTY_SAFETY, (_down(0.20, 10000), _down(0.20, 5000))),  # Level 1: Prevent empty, reduce all outflows
+        (GH_FULL, (_up(0.10, 80000), _up(0.05, 50000))),  # Level 2: Too full
+        (GH_EMPTY, (_down(0.10, 10000), _down(0.08, 5000))),  # Level 2: Too empty
+        (GH_NORMAL, (_TREND, _TREND)),  # Normal range: slowly return to nominal
+    ),
+    HOLDER_BOFG: (  # bofg_to_pp, bofg_to_heating
+        (GH_SURGE, (_down(0.20, 5000), _down(0.15, 3000))),  # Level 3: Pre-emptively make room for surge
+        (GH_EMERGENCY, (_up(0.20, 40000), _KEEP)),  # Level 1: Safety
+        (GH_EMPTY_SAFETY, (_down(0.20, 5000), _KEEP)),
+        (GH_FULL, (_up(0.10, 40000), _KEEP)),  # Level 2: SOC/Pressure control (similar to BFG)
+        (GH_EMPTY, (_down(0.10, 5000), _KEEP)),
+    ),
+    HOLDER_COG: (  # cog_to_heating, cog_to_bf
+        (GH_EMERGENCY, (_up(0.20, 15000), _KEEP)),  # Level 1: Safety
+        (GH_EMPTY_SAFETY, (_down(0.20, 2000), _down(0.20, 1000))),
+        (GH_FULL, (_up(0.10, 15000), _up(0.05, 10000))),  # Level 2: SOC/Pressure control
+        (GH_EMPTY, (_down(0.10, 2000), _down(0.08, 1000))),
+    ),
+}
+_GH_FIRST_FLOW = (BFG_TO_PP, BOFG_TO_PP, COG_TO_HEATING)  # state column of each holder's first flow
+_GH_NOMINAL = np.array([
+    [50000.0, 30000.0],  # bfg_to_pp, bfg_to_heating [Nm³/h]
+    [0.0, 0.0],  # (BOFG and COG rules do not trend to a nominal value)
+    [0.0, 0.0],
+])
+
+
+def _build_gh_tables() -> np.ndarray:
+    """Evaluate every holder's rule priorities once per condition code"""
+    tables = np.empty((len(_GH_RULES), 64, 2, 5))
+    for holder, rules in _GH_RULES.items():
+        for code in range(64):
+            tables[holder, code] = next((actions for bit, actions in rules if code & bit), (_KEEP, _KEEP))
+    return tables
+
+
+_GH_TABLES = _build_gh_tables()
+
+
+@njit("void(float64[::1], int64, float64, float64, boolean)", cache=True, boundscheck=False, nogil=True)
+def _control_holder(state, holder, soc, p, surge_warning):
+    """Control one gas holder (table driven, see _GH_RULES for the rules)"""
+    code = (surge_warning * GH_SURGE
+            | (p > _GH_P_EMERGENCY) * GH_EMERGENCY
+            | (soc < _GH_SOC_MIN) * GH_EMPTY_SAFETY
+            | (soc > 0.85 or p > 14) * GH_FULL
+            | (soc < 0.25 or p < 9) * GH_EMPTY
+            | (0.35 < soc < 0.75 and 10 < p < 13) * GH_NORMAL)
+    first = _GH_FIRST_FLOW[holder]
+    for flow in range(2):
+        row = _GH_TABLES[holder, code, flow]
+        nominal = _GH_NOMINAL[holder, flow]
+        x = state[first + flow]
+        if x > nominal:
+            factor = row[F_ABOVE]
+        elif x < nominal:
+            factor = row[F_BELOW]
+        else:
+            factor = row[F_AT]
+        state[first + flow] = max(min(x * factor, row[F_HI]), row[F_LO])
+
+
+@njit("void(float64[::1], float64[::1], boolean)", cache=True, boundscheck=False, nogil=True)
+def _gh_step_kernel(state, obs, surge_warning):
+    """One control step of all three holders on plain arrays (state is updated in place)"""
+    _control_holder(state, HOLDER_BFG, obs[OBS_SOC_BFG], obs[OBS_P_BFG], False)
+    _control_holder(state, HOLDER_BOFG, obs[OBS_SOC_BOFG], obs[OBS_P_BOFG], surge_warning)
+    _control_holder(state, HOLDER_COG, obs[OBS_SOC_COG], obs[OBS_P_COG], False)
+
+
+# Multi-agent step: every row is independent, so the agent loop is a prange.
+# The serial twin is compiled alongside, see with_serial_fallback().
+@njit("void(float64[:, ::1], float64[:, ::1], boolean[::1])", parallel=True, cache=True, nogil=True)
+def _gh_step_all_parallel(states, observations, surge_warnings):
+    """
+    One control step for N gas holder agents: row i of states / observations
+    is agent i (same layout as the _gh_step_kernel vectors), surge_warnings[i]
+    its surge flag
+    """
+    for i in prange(states.shape[0]):
+        _gh_step_kernel(states[i], observations[i], surge_warnings[i])
+
+
+@njit("void(float64[:, ::1], float64[:, ::1], boolean[::1])", cache=True, nogil=True)
+def _gh_step_all_serial(states, observations, surge_warnings):
+    """
+    One control step for N gas holder agents: row i of states / observations
+    is agent i (same layout as the _gh_step_kernel vectors), surge_warnings[i]
+    its surge flag
+    """
+    for i in range(states.shape[0]):
+        _gh_step_kernel(states[i], observations[i], surge_warnings[i])
+
+
+gh_step_all = with_serial_fallback(_gh_step_all_parallel, _gh_step_all_serial)
+
+
+# Single-agent calls from Python use the AOT-built kernel when it is available
+# (no compilation in a fresh process); the @njit kernel above is the fallback
+_aot = load_aot_kernels()
+_gh_step = _aot.gh_step_kernel if _aot is not None else _gh_step_kernel
+
+
 class GasHolder_Agent:
     """
     Gas Holder Agent managing three types of gas holders:
@@ -23,39 +166,61 @@ class GasHolder_Agent:
     - Level 2: SOC/Pressure control
     - Level 3: Surge coordination
     - Level 4: Priority allocation
+    
+    The rules run in the compiled _gh_step_kernel; every state entry is also
+    a typed attribute (agent.bfg_to_pp, ...) backed by the state vector.
     """
     
+    __slots__ = ("agent_id", "_state", "_view", "_obs_buf", "surge_warning_active")
+    
+    bfg_to_pp = array_field("_state", BFG_TO_PP, "to power plant [Nm³/h]")
+    bfg_to_heating = array_field("_state", BFG_TO_HEATING, "to heating [Nm³/h]")
+    bofg_to_pp = array_field("_state", BOFG_TO_PP, "[Nm³/h]")
+    bofg_to_heating = array_field("_state", BOFG_TO_HEATING, "[Nm³/h]")
+    cog_to_heating = array_field("_state", COG_TO_HEATING, "[Nm³/h]")
+    cog_to_bf = array_field("_state", COG_TO_BF, "to BF for injection [Nm³/h]")
+    
     def __init__(self, agent_id: str = "GH1"):
         self.agent_id = agent_id
-        self.controller = RuleBasedController()
         
-        # State for each gas holder
-        self.state = {
+        # State for each gas holder (STATE_KEYS order)
+        self._state = np.array([
             # BFG
-            "bfg_to_pp": 50000,  # to power plant [Nm³/h]
-            "bfg_to_heating": 30000,  # to heating [Nm³/h]
+            50000,  # bfg_to_pp: to power plant [Nm³/h]
+            30000,  # bfg_to_heating: to heating [Nm³/h]
             
-            # BOFG  
-            "bofg_to_pp": 20000,
-            "bofg_to_heating": 10000,
+            # BOFG
+            20000,  # bofg_to_pp
+            10000,  # bofg_to_heating
             
             # COG
-            "cog_to_heating": 8000,
-            "cog_to_bf": 5000,  # to BF for injection
-        }
+            8000,  # cog_to_heating
+            5000,  # cog_to_bf: to BF for injection
+        ], dtype=np.float64)
         
         # Hysteresis states
         self.surge_warning_active = False
         
+        # Preallocated kernel input
+        self._obs_buf = np.empty(len(OBS_KEYS))
+        
+        # Live read-only view of the state, returned by step()
+        self._view = StateView(self, STATE_KEYS)
+    
+    @property
+    def state(self) -> StateView:
+        """Current state as a live read-only mapping (get_state() takes a snapshot)"""
+        return self._view
+        
     def get_state(self) -> Dict[str, Any]:
         """Return current state"""
-        return self.state.copy()
+        return dict(zip(STATE_KEYS, self._state.tolist()))
     
     def step(
         self,
         observations: Dict[str, Any],
         message_bus: Optional[MessageBus] = None
-    ) -> Dict[str, Any]:
+    ) -> StateView:
         """
         Execute one control step
         
@@ -68,187 +233,46 @@ class GasHolder_Agent:
                 - pp_demand, heating_demand: Demand from consumers
         """
         # Extract observations
-        soc_bfg = observations.get("soc_bfg", 0.5)
-        p_bfg = observations.get("p_bfg", 12.0)
-        soc_bofg = observations.get("soc_bofg", 0.5)
-        p_bofg = observations.get("p_bofg", 12.0)
-        soc_cog = observations.get("soc_cog", 0.5)
-        p_cog = observations.get("p_cog", 12.0)
-        
-        # Check for surge warnings
-        if message_bus:
-            surge_warnings = message_bus.get_messages(
-                self.agent_id,
-                MessageType.BOFG_SURGE_WARNING
-            )
-            if surge_warnings:
-                self.surge_warning_active = True
-        
-        # Apply rules to each gas holder
-        self._control_bfgh(soc_bfg, p_bfg)
-        self._control_bofgh(soc_bofg, p_bofg, self.surge_warning_active)
-        self._control_cogh(soc_cog, p_cog)
-        
-        # Reset surge warning after handling
-        self.surge_warning_active = False
-        
-        return self.get_state()
-    
-    def _control_bfgh(self, soc: float, p: float):
-        """Control BFG holder"""
+        # (one C-level map over the module-level key/default tuples)
+        obs = self._obs_buf
+        obs[:] = list(map(observations.get, OBS_KEYS, OBS_DEFAULTS))
         
-        # Level 1: Safety - Emergency over-pressure
-        if p > SafetyLimits.GH_P_EMERGENCY:
-            # Emergency: maximize outflow
-            self.state["bfg_to_pp"] = self.controller.incremental_adjust(
-                self.state["bfg_to_pp"], "increase", step_size=0.20,
-                max_val=80000
-            )
-            self.state["bfg_to_heating"] = self.controller.incremental_adjust(
-                self.state["bfg_to_heating"], "increase", step_size=0.10,
-                max_val=50000
-            )
-            return  # Skip other rules
+        self._apply(obs, message_bus)
         
-        # Level 1: Safety - Prevent empty
-        if soc < SafetyLimits.GH_SOC_MIN:
-            # Reduce all outflows
-            self.state["bfg_to_pp"] = self.controller.incremental_adjust(
-                self.state["bfg_to_pp"], "decrease", step_size=0.20,
-                min_val=10000
-            )
-            self.state["bfg_to_heating"] = self.controller.incremental_adjust(
-                self.state["bfg_to_heating"], "decrease", step_size=0.20,
-                min_val=5000
-            )
-            return
-        
-        # Level 2: SOC/Pressure control
-        # Too full
-        if soc > 0.85 or p > 14:
-            self.state["bfg_to_pp"] = self.controller.incremental_adjust(
-                self.state["bfg_to_pp"], "increase", step_size=0.10,
-                max_val=80000
-            )
-            self.state["bfg_to_heating"] = self.controller.incremental_adjust(
-                self.state["bfg_to_heating"], "increase", step_size=0.05,
-                max_val=50000
-            )
-        
-        # Too empty
-        elif soc < 0.25 or p < 9:
-            self.state["bfg_to_pp"] = self.controller.incremental_adjust(
-                self.state["bfg_to_pp"], "decrease", step_size=0.10,
-                min_val=10000
-            )
-            self.state["bfg_to_heating"] = self.controller.incremental_adjust(
-                self.state["bfg_to_heating"], "decrease", step_size=0.08,
-                min_val=5000
-            )
-        
-        # Normal range: slowly return to nominal
-        elif 0.35 < soc < 0.75 and 10 < p < 13:
-            # Trend back to nominal values
-            nominal_pp = 50000
-            nominal_heating = 30000
-            
-            if self.state["bfg_to_pp"] > nominal_pp:
-                self.state["bfg_to_pp"] *= 0.98
-            elif self.state["bfg_to_pp"] < nominal_pp:
-                self.state["bfg_to_pp"] *= 1.02
-            
-            if self.state["bfg_to_heating"] > nominal_heating:
-                self.state["bfg_to_heating"] *= 0.98
-            elif self.state["bfg_to_heating"] < nominal_heating:
-                self.state["bfg_to_heating"] *= 1.02
+        return self._view
     
-    def _control_bofgh(self, soc: float, p: float, surge_warning: bool):
-        """Control BOFG holder"""
-        
-        # Level 3: Surge preparation
-        if surge_warning:
-            # Pre-emptively make room for surge
-            self.state["bofg_to_pp"] = self.controller.incremental_adjust(
-                self.state["bofg_to_pp"], "decrease", step_size=0.20,
-                min_val=5000
-            )
-            self.state["bofg_to_heating"] = self.controller.incremental_adjust(
-                self.state["bofg_to_heating"], "decrease", step_size=0.15,
-                min_val=3000
-            )
-            return
-        
-        # Level 1: Safety
-        if p > SafetyLimits.GH_P_EMERGENCY:
-            self.state["bofg_to_pp"] = self.controller.incremental_adjust(
-                self.state["bofg_to_pp"], "increase", step_size=0.20,
-                max_val=40000
-            )
-            return
-        
-        if soc < SafetyLimits.GH_SOC_MIN:
-            self.state["bofg_to_pp"] = self.controller.incremental_adjust(
-                self.state["bofg_to_pp"], "decrease", step_size=0.20,
-                min_val=5000
-            )
-            return
+    def step_array(
+        self,
+        obs: np.ndarray,
+        message_bus: Optional[MessageBus] = None
+    ) -> np.ndarray:
+        """
+        Same step as step() on a positional observation vector, without the dict interface
         
-        # Level 2: SOC/Pressure control (similar to BFG)
-        if soc > 0.85 or p > 14:
-            self.state["bofg_to_pp"] = self.controller.incremental_adjust(
-                self.state["bofg_to_pp"], "increase", step_size=0.10,
-                max_val=40000
-            )
-        elif soc < 0.25 or p < 9:
-            self.state["bofg_to_pp"] = self.controller.incremental_adjust(
-                self.state["bofg_to_pp"], "decrease", step_size=0.10,
-                min_val=5000
-            )
+        obs: len(OBS_KEYS) vector (ndarray, dtype = float), ordered as OBS_KEYS
+        return: the new state as a vector ordered as STATE_KEYS (a copy)
+        """
+        obs = np.ascontiguousarray(obs, dtype=np.float64)
+        self._apply(obs, message_bus)
+        return self._state.copy()
     
-    def _control_cogh(self, soc: float, p: float):
-        """Control COG holder"""
+    def _apply(self, obs: np.ndarray, message_bus: Optional[MessageBus]):
+        """Surge check and rules for one packed observation vector"""
+        # Check for surge warnings (while one is on the bus, i.e. until it is cleared)
+        if message_bus is not None and message_bus.has_messages(
+            self.agent_id, MessageType.BOFG_SURGE_WARNING
+        ):
+            self.surge_warning_active = True
         
-        # Level 1: Safety
-        if p > SafetyLimits.GH_P_EMERGENCY:
-            self.state["cog_to_heating"] = self.controller.incremental_adjust(
-                self.state["cog_to_heating"], "increase", step_size=0.20,
-                max_val=15000
-            )
-            return
-        
-        if soc < SafetyLimits.GH_SOC_MIN:
-            self.state["cog_to_heating"] = self.controller.incremental_adjust(
-                self.state["cog_to_heating"], "decrease", step_size=0.20,
-                min_val=2000
-            )
-            self.state["cog_to_bf"] = self.controller.incremental_adjust(
-                self.state["cog_to_bf"], "decrease", step_size=0.20,
-                min_val=1000
-            )
-            return
+        # Apply rules to each gas holder
+        _gh_step(self._state, obs, self.surge_warning_active)
         
-        # Level 2: SOC/Pressure control
-        if soc > 0.85 or p > 14:
-            self.state["cog_to_heating"] = self.controller.incremental_adjust(
-                self.state["cog_to_heating"], "increase", step_size=0.10,
-                max_val=15000
-            )
-            self.state["cog_to_bf"] = self.controller.incremental_adjust(
-                self.state["cog_to_bf"], "increase", step_size=0.05,
-                max_val=10000
-            )
-        elif soc < 0.25 or p < 9:
-            self.state["cog_to_heating"] = self.controller.incremental_adjust(
-                self.state["cog_to_heating"], "decrease", step_size=0.10,
-                min_val=2000
-            )
-            self.state["cog_to_bf"] = self.controller.incremental_adjust(
-                self.state["cog_to_bf"], "decrease", step_size=0.08,
-                min_val=1000
-            )
+        # Reset surge warning after handling
+        self.surge_warning_active = False
 
 
 if __name__ == "__main__":
+    # Run from steel_MAS/: python -m agents.gas_holder_agent
     # Simple test
     agent = GasHolder_Agent("GH1")
     
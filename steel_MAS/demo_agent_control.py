@@ -3,6 +3,7 @@ Agent Control Demonstration
 Shows detailed step-by-step process of how agents control digital twins
 """
 
+import dataclasses
 import sys
 import os
 # Add current directory and parent directory to path
@@ -18,29 +19,40 @@ from agents.gas_holder_agent import GasHolder_Agent
 
 # Import twins - using importlib due to spaces in directory names
 import importlib.util
+
+# (module name, file below Digital_Twin/)
+_TWIN_MODULES = (
+    ("BlastFurnaceTwin", os.path.join("Blast Furnace", "Blast_Furnace_Twin_to_share.py")),
+    ("BOFTwin", os.path.join("BOF", "BOF_Twin.py")),
+    ("CokeOvenTwin", os.path.join("Coke Oven", "Coke_Oven_Twin.py")),
+)
+
+
+def _load_twin(name, path):
+    """Load a twin module from its file once; later loads reuse the sys.modules entry"""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[name]
+        raise
+    return module
+
+
 try:
     # Get the parent directory path
     digital_twin_dir = os.path.join(parent_dir, "Digital_Twin")
     
-    # Import BlastFurnaceTwin
-    bf_path = os.path.join(digital_twin_dir, "Blast Furnace", "Blast_Furnace_Twin_to_share.py")
-    spec = importlib.util.spec_from_file_location("BlastFurnaceTwin", bf_path)
-    bf_module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(bf_module)
-    BlastFurnaceTwin = bf_module.BlastFurnaceTwin
-    
-    # Import BOFTwin
-    bof_path = os.path.join(digital_twin_dir, "BOF", "BOF_Twin.py")
-    spec = importlib.util.spec_from_file_location("BOFTwin", bof_path)
-    bof_module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(bof_module)
-    BOFTwin = bof_module.BOFTwin
-    
-    # Import CokeOvenTwin
-    co_path = os.path.join(digital_twin_dir, "Coke Oven", "Coke_Oven_Twin.py")
-    spec = importlib.util.spec_from_file_location("CokeOvenTwin", co_path)
-    co_module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(co_module)
+    bf_module, bof_module, co_module = (
+        _load_twin(name, os.path.join(digital_twin_dir, path)) for name, path in _TWIN_MODULES
+    )
+    BlastFurnaceTwin, BFInputs = bf_module.BlastFurnaceTwin, bf_module.BFInputs
+    BOFTwin, BOFInputs = bof_module.BOFTwin, bof_module.BOFInputs
     CokeOvenTwin = co_module.CokeOvenTwin
     
     TWINS_AVAILABLE = True
@@ -58,12 +70,24 @@ def print_section(title):
 
 
 def print_dict(data, indent=2):
-    """Print dictionary in a formatted way"""
-    for key, value in data.items():
-        if isinstance(value, float):
-            print(f"{' '*indent}{key}: {value:.2f}")
-        else:
-            print(f"{' '*indent}{key}: {value}")
+    """Print dictionary in a formatted way (one print call for all lines)"""
+    pad = ' ' * indent
+    lines = [f"{pad}{key}: {value:.2f}" if isinstance(value, float) else f"{pad}{key}: {value}"
+             for key, value in data.items()]
+    if lines:
+        print("\n".join(lines))
+
+
+def bf_agent_to_twin(wind_volume, o2_enrichment_pct, pci):
+    """
+    Map BF agent settings to twin quantities (wind-based oxygen physics)
+    
+    Returns: (total O2 flow [Nm³/h], coke mass flow [t/h]); works elementwise on
+    NumPy arrays as well, e.g. for a batch of agent states
+    """
+    O2_from_wind = 0.21 * wind_volume * 60  # 21% O2 in air, convert to Nm³/h
+    O2_enrichment_flow = O2_from_wind * (o2_enrichment_pct / 100)  # Additional O2
+    return O2_from_wind + O2_enrichment_flow, pci / 1.5
 
 
 def demonstrate_bf_control():
@@ -94,31 +118,33 @@ def demonstrate_bf_control():
     # Twin inputs for normal operation
     # NEW: Wind-based oxygen physics
     wind_volume = initial_agent_state["wind_volume"]  # Nm³/min
-    O2_from_wind = 0.21 * wind_volume * 60  # 21% O2 in air, convert to Nm³/h
-    O2_enrichment_pct = initial_agent_state["O2_enrichment"]  # %
-    O2_enrichment_flow = O2_from_wind * (O2_enrichment_pct / 100)  # Additional O2
-    total_oxygen = O2_from_wind + O2_enrichment_flow
-    
-    initial_twin_inputs = {
-        "ore [t/h]": 50,
-        "pellets [t/h]": 100,
-        "sinter [t/h]": 100,
-        "coke_mass_flow_bf4 [t/h]": 100,
-        "coke_gas_coke_plant_bf4 [m³/h]": 20000,
-        "calorific_value_coke_gas_bf4 [MJ/m³]": 20,
-        "power [kWh/h]": 50000,
-        "wind_volume [Nm³/min]": wind_volume,  # NEW: Wind volume
-        "oxygen [m³/h]": total_oxygen,  # Wind-based oxygen
-        "intern BF_GAS_PERCENTAGE [%]": 50,
-        "power plant BF_GAS_PERCENTAGE [%]": 20,
-        "slab heat furnace BF_GAS_PERCENTAGE [%]": 20,
-        "coke plant BF_GAS_PERCENTAGE [%]": 10
-    }
+    total_oxygen, coke_mass_flow = bf_agent_to_twin(
+        wind_volume, initial_agent_state["O2_enrichment"], initial_agent_state["PCI"])
+    
+    # (typed twin inputs; the twin derives its oxygen from the wind volume)
+    initial_twin_inputs = BFInputs(
+        ore=50,
+        pellets=100,
+        sinter=100,
+        coke_mass_flow=coke_mass_flow,
+        coke_gas_coke_plant=20000,
+        calorific_value_coke_gas=20,
+        power=50000,
+        wind_volume=wind_volume,  # NEW: Wind volume
+        bf_gas_percentage_intern=50,
+        bf_gas_percentage_power_plant=20,
+        bf_gas_percentage_slab_heat_furnace=20,
+        bf_gas_percentage_coke_plant=10
+    )
     
     print("\n📥 Twin 输入参数:")
-    key_inputs = ["oxygen [m³/h]", "coke_mass_flow_bf4 [t/h]", "power [kWh/h]"]
-    for key in key_inputs:
-        print(f"  {key}: {initial_twin_inputs[key]:.2f}")
+    key_inputs = [
+        ("oxygen [m³/h]", total_oxygen),  # Wind-based oxygen
+        ("coke_mass_flow_bf4 [t/h]", initial_twin_inputs.coke_mass_flow),
+        ("power [kWh/h]", initial_twin_inputs.power),
+    ]
+    for key, value in key_inputs:
+        print(f"  {key}: {value:.2f}")
     
     # Calculate initial outputs
     initial_outputs = bf_twin(initial_twin_inputs)
@@ -131,9 +157,10 @@ def demonstrate_bf_control():
         "Si [%]",  # NEW: Silicon content
         "bf4_total_co2_mass_flow [t/h]"
     ]
-    for key in key_outputs:
-        if key in initial_outputs:
-            print(f"  {key}: {initial_outputs[key]:.2f}")
+    # (key, value) of the key outputs the twin returned, reused for the comparison in step 4
+    key_items = [(key, initial_outputs[key]) for key in key_outputs if key in initial_outputs]
+    if key_items:
+        print("\n".join(f"  {key}: {value:.2f}" for key, value in key_items))
     
     # =========================================================================
     # STEP 2: Problem Detected - Gas Holder Full
@@ -188,27 +215,25 @@ def demonstrate_bf_control():
     # Map adjusted agent state to twin inputs
     # NEW: Recalculate oxygen based on adjusted wind
     wind_adj = adjusted_agent_state["wind_volume"]
-    O2_wind_adj = 0.21 * wind_adj * 60
-    O2_enrich_pct_adj = adjusted_agent_state["O2_enrichment"]
-    O2_enrich_adj = O2_wind_adj * (O2_enrich_pct_adj / 100)
-    total_oxygen_adj = O2_wind_adj + O2_enrich_adj
+    total_oxygen_adj, coke_mass_flow_adj = bf_agent_to_twin(
+        wind_adj, adjusted_agent_state["O2_enrichment"], adjusted_agent_state["PCI"])
     
-    adjusted_twin_inputs = initial_twin_inputs.copy()
-    adjusted_twin_inputs["wind_volume [Nm³/min]"] = wind_adj
-    adjusted_twin_inputs["oxygen [m³/h]"] = total_oxygen_adj
-    adjusted_twin_inputs["coke_mass_flow_bf4 [t/h]"] = adjusted_agent_state["PCI"] / 1.5
+    adjusted_twin_inputs = dataclasses.replace(
+        initial_twin_inputs,
+        wind_volume=wind_adj,
+        coke_mass_flow=coke_mass_flow_adj
+    )
     
     print("\n📥 Twin 新输入参数:")
-    print(f"  oxygen [m³/h]: {initial_twin_inputs['oxygen [m³/h]']:.0f} → {adjusted_twin_inputs['oxygen [m³/h]']:.0f}")
-    print(f"  coke_mass_flow_bf4 [t/h]: {initial_twin_inputs['coke_mass_flow_bf4 [t/h]']:.1f} → {adjusted_twin_inputs['coke_mass_flow_bf4 [t/h]']:.1f}")
+    print(f"  oxygen [m³/h]: {total_oxygen:.0f} → {total_oxygen_adj:.0f}")
+    print(f"  coke_mass_flow_bf4 [t/h]: {initial_twin_inputs.coke_mass_flow:.1f} → {adjusted_twin_inputs.coke_mass_flow:.1f}")
     
     # Calculate new outputs
     adjusted_outputs = bf_twin(adjusted_twin_inputs)
     
     print("\n📤 Twin 新输出结果:")
-    for key in key_outputs:
-        if key in adjusted_outputs and key in initial_outputs:
-            old_val = initial_outputs[key]
+    for key, old_val in key_items:
+        if key in adjusted_outputs:
             new_val = adjusted_outputs[key]
             change = ((new_val - old_val) / old_val * 100) if old_val != 0 else 0
             arrow = "↓" if change < 0 else "↑"
@@ -267,13 +292,13 @@ def demonstrate_bof_control():
     print(f"   初始废钢量: {initial_state['scrap_steel']:.1f} t/batch")
     
     # Initial twin calculation
-    initial_inputs = {
-        "pig_iron [t/h]": 80,
-        "scrap_steel [t/h]": initial_state['scrap_steel'],
-        "oxygen [Nm³/h]": initial_state['oxygen'],
-        "lime [t/h]": 5,
-        "power [kWh/h]": 5000
-    }
+    initial_inputs = BOFInputs(
+        pig_iron=80,
+        scrap_steel=initial_state['scrap_steel'],
+        oxygen=initial_state['oxygen'],
+        lime=5,
+        power=5000
+    )
     
     initial_outputs = bof_twin(initial_inputs)
     print(f"\n📤 初始钢水产量: {initial_outputs['liquid_steel [t/h]']:.2f} t/h")
@@ -297,9 +322,11 @@ def demonstrate_bof_control():
     print(f"  废钢量: {initial_state['scrap_steel']:.1f} → {adjusted_state['scrap_steel']:.1f} t/batch")
     
     # New twin calculation
-    adjusted_inputs = initial_inputs.copy()
-    adjusted_inputs['oxygen [Nm³/h]'] = adjusted_state['oxygen']
-    adjusted_inputs['scrap_steel [t/h]'] = adjusted_state['scrap_steel']
+    adjusted_inputs = dataclasses.replace(
+        initial_inputs,
+        oxygen=adjusted_state['oxygen'],
+        scrap_steel=adjusted_state['scrap_steel']
+    )
     
     adjusted_outputs = bof_twin(adjusted_inputs)
     
@@ -12,17 +12,28 @@ This demo runs without full Twin integration for quick testing.
 
 import sys
 import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from models.standard_interfaces import (
     StandardState, StandardAction,
     GasHolderState, ProductionState, DemandState,
-    GasAllocation, ProductionControl,
+    GasAllocation, ProductionControl, Transition,
     create_default_state, create_default_action
 )
 from models.reward_calculation import calculate_reward, calculate_episode_metrics
 from models.enhanced_recorder import EnhancedDataRecorder
 import numpy as np
+from typing import List, Optional, Tuple, Union
+
+# Seed of the demo generator; the Demo 7 workers get generators spawned from it
+SEED = 0xC0FFEE
+
+# Independent episodes of Demo 7 (one worker process each, up to the CPU count)
+NUM_EPISODES = 4
+
+BFG_CAPACITY = 400000  # Nm³, BFG holder of the simplified demo dynamics
 
 
 def demo_standard_interfaces():
@@ -66,6 +77,7 @@ def demo_standard_interfaces():
     
     # Simulate a few state transitions
     recorder = EnhancedDataRecorder()
+    rng = np.random.default_rng(SEED)  # shared by the sequential demos
     
     current_state = create_default_state(time=0)
     
@@ -76,11 +88,11 @@ def demo_standard_interfaces():
         action = create_default_action()
         
         # Add some variation to actions
-        action.production_control.bf_wind_volume = 4000 + np.random.normal(0, 100)
-        action.production_control.bf_pci = 150 + np.random.normal(0, 10)
+        action.production_control.bf_wind_volume = 4000 + rng.normal(0, 100)
+        action.production_control.bf_pci = 150 + rng.normal(0, 10)
         
         # Simulate next state (simplified physics)
-        next_state = simulate_next_state(current_state, action, step + 1)
+        next_state = simulate_next_state(current_state, action, step + 1, rng)
         
         # Calculate reward
         reward = calculate_reward(current_state, action, next_state)
@@ -120,33 +132,110 @@ def demo_standard_interfaces():
     print("Demo 5: Analyzing Reward Components")
     print("=" * 70)
     
-    # Analyze reward components
-    rewards = recorder.get_reward_history()
-    
-    production_scores = [r.production_score for r in rewards]
-    stability_scores = [r.stability_score for r in rewards]
-    efficiency_scores = [r.efficiency_score for r in rewards]
+    # Analyze reward components (one column scan per statistic)
+    components = recorder.get_reward_components_matrix()[:, :3]
+    means = components.mean(axis=0)
+    stds = components.std(axis=0)
     
     print(f"\nReward Component Analysis:")
-    print(f"  Production: Mean={np.mean(production_scores):.3f}, Std={np.std(production_scores):.3f}")
-    print(f"  Stability:  Mean={np.mean(stability_scores):.3f}, Std={np.std(stability_scores):.3f}")
-    print(f"  Efficiency: Mean={np.mean(efficiency_scores):.3f}, Std={np.std(efficiency_scores):.3f}")
+    print(f"  Production: Mean={means[0]:.3f}, Std={stds[0]:.3f}")
+    print(f"  Stability:  Mean={means[1]:.3f}, Std={stds[1]:.3f}")
+    print(f"  Efficiency: Mean={means[2]:.3f}, Std={stds[2]:.3f}")
+    
+    print("\n" + "=" * 70)
+    print("Demo 6: Batched Monte-Carlo Episodes")
+    print("=" * 70)
+    
+    # Same dynamics for many episodes at once; only the arrays are stepped
+    n_episodes = 1000
+    soc_bfg = np.full(n_episodes, 0.5)
+    soc_bofg = np.full(n_episodes, 0.5)
+    soc_cog = np.full(n_episodes, 0.5)
+    for step in range(10):
+        wind = 4000 + rng.normal(0, 100, size=n_episodes)
+        soc_bfg, soc_bofg, soc_cog, _, _ = simulate_next_states_batch(
+            soc_bfg, soc_bofg, soc_cog, wind, np.full(n_episodes, 50000.0), rng)
+    
+    print(f"\n{n_episodes} episodes x 10 steps:")
+    print(f"  SOC_BFG:  Mean={soc_bfg.mean():.3f}, Std={soc_bfg.std():.4f}")
+    print(f"  SOC_BOFG: Mean={soc_bofg.mean():.3f}, Std={soc_bofg.std():.4f}")
+    
+    print("\n" + "=" * 70)
+    print("Demo 7: Independent Episodes in Parallel")
+    print("=" * 70)
+    
+    # Episodes run in worker processes; the transitions are recorded here
+    episode_recorder = EnhancedDataRecorder()
+    episode_rngs = rng.spawn(NUM_EPISODES)  # independent child streams
+    if NUM_EPISODES == 1:
+        episodes = [run_episode(episode_rngs[0])]
+    else:
+        # "spawn" behaves the same on Linux, macOS and Windows
+        with ProcessPoolExecutor(max_workers=min(NUM_EPISODES, os.cpu_count() or 1),
+                                 mp_context=multiprocessing.get_context("spawn")) as executor:
+            episodes = list(executor.map(run_episode, episode_rngs))
+    for transitions in episodes:
+        for t in transitions:
+            episode_recorder.record_transition(t.state, t.action, t.next_state, t.reward, t.done)
+    
+    print(f"\n{episode_recorder.get_summary()}")
     
     print("\n" + "=" * 70)
     print("[OK] All demos completed successfully!")
     print("=" * 70)
 
 
+def run_episode(
+    seed: Union[int, np.random.Generator],
+    n_steps: int = 10
+) -> List[Transition]:
+    """
+    One episode of the Demo 3 loop with its own random generator
+    (a seed, or a generator spawned from the parent one).
+    
+    Episodes are independent of each other, so they can run in separate
+    worker processes; recording the transitions is left to the caller.
+    """
+    rng = np.random.default_rng(seed)
+    transitions = []
+    
+    current_state = create_default_state(time=0)
+    for step in range(n_steps):
+        action = create_default_action()
+        action.production_control.bf_wind_volume = 4000 + rng.normal(0, 100)
+        action.production_control.bf_pci = 150 + rng.normal(0, 10)
+        
+        next_state = simulate_next_state(current_state, action, step + 1, rng)
+        reward = calculate_reward(current_state, action, next_state)
+        transitions.append(Transition(
+            state=current_state,
+            action=action,
+            next_state=next_state,
+            reward=reward,
+            step=step,
+            done=(step == n_steps - 1)
+        ))
+        
+        current_state = next_state
+    
+    return transitions
+
+
 def simulate_next_state(
     current_state: StandardState,
     action: StandardAction,
-    next_time: int
+    next_time: int,
+    rng: Optional[np.random.Generator] = None
 ) -> StandardState:
     """
     Simple physics simulation for demo (not using real Twins).
     
     In real system, this would be replaced by Twin execution.
+    Same dynamics as simulate_next_states_batch(), on Python floats for one episode.
     """
+    if rng is None:
+        rng = np.random
+    
     # Extract current values
     soc_bfg = current_state.gas_holder.soc_bfg
     soc_bofg = current_state.gas_holder.soc_bofg
@@ -164,13 +253,15 @@ def simulate_next_state(
     
     # Update SOC (simplified dynamics)
     # delta_soc = (supply - consumption) / capacity
-    BFG_CAPACITY = 400000  # Nm³
+    # (scalars are clipped with min/max, np.clip would go through array dispatch)
     delta_soc_bfg = (bf_bfg_supply - total_consumption) / BFG_CAPACITY
-    new_soc_bfg = np.clip(soc_bfg + delta_soc_bfg * 0.01, 0, 1)  # Scale down
+    new_soc_bfg = min(max(soc_bfg + delta_soc_bfg * 0.01, 0.0), 1.0)  # Scale down
     
-    # Other SOCs have slower dynamics
-    new_soc_bofg = np.clip(soc_bofg + np.random.normal(0, 0.01), 0, 1)
-    new_soc_cog = np.clip(soc_cog + np.random.normal(0, 0.01), 0, 1)
+    # Other SOCs have slower dynamics (one draw for both, BOFG first)
+    noise_bofg, noise_cog = (rng.standard_normal(2) * 0.01).tolist()
+    new_soc_bofg = min(max(soc_bofg + noise_bofg, 0.0), 1.0)
+    new_soc_cog = min(max(soc_cog + noise_cog, 0.0), 1.0)
+    p_bfg = 12.0 + (new_soc_bfg - 0.5) * 4  # Pressure correlates with SOC
     
     # Create next state
     return StandardState(
@@ -179,7 +270,7 @@ def simulate_next_state(
             soc_bfg=new_soc_bfg,
             soc_bofg=new_soc_bofg,
             soc_cog=new_soc_cog,
-            p_bfg=12.0 + (new_soc_bfg - 0.5) * 4,  # Pressure correlates with SOC
+            p_bfg=p_bfg,
             p_bofg=12.0,
             p_cog=12.0
         ),
@@ -198,5 +289,44 @@ def simulate_next_state(
     )
 
 
+def simulate_next_states_batch(
+    soc_bfg: np.ndarray,
+    soc_bofg: np.ndarray,
+    soc_cog: np.ndarray,
+    wind: np.ndarray,
+    total_consumption: np.ndarray,
+    rng: Optional[np.random.Generator] = None
+) -> Tuple[np.ndarray, ...]:
+    """
+    simulate_next_state() for N independent episodes at once (Monte-Carlo runs).
+    
+    Args:
+        soc_bfg, soc_bofg, soc_cog: (N,) gas holder SOCs
+        wind: (N,) BF wind volume [Nm³/min]
+        total_consumption: (N,) BFG to power plant + heating [Nm³/h]
+        rng: Random generator for the SOC noise (default: the global np.random state)
+    
+    Returns: (soc_bfg, soc_bofg, soc_cog, p_bfg, bf_bfg_supply) of the next step, each (N,)
+    """
+    if rng is None:
+        rng = np.random
+    
+    # Simplified production (depends on wind)
+    bf_bfg_supply = 0.4 * wind * 60 + 20000  # Same formula as real Twin
+    
+    # Update SOC (simplified dynamics)
+    # delta_soc = (supply - consumption) / capacity
+    delta_soc_bfg = (bf_bfg_supply - total_consumption) / BFG_CAPACITY
+    new_soc_bfg = np.clip(soc_bfg + delta_soc_bfg * 0.01, 0, 1)  # Scale down
+    
+    # Other SOCs have slower dynamics (one draw for both, BOFG row first)
+    noise = rng.standard_normal((2, len(soc_bfg))) * 0.01
+    new_soc_bofg = np.clip(soc_bofg + noise[0], 0, 1)
+    new_soc_cog = np.clip(soc_cog + noise[1], 0, 1)
+    
+    p_bfg = 12.0 + (new_soc_bfg - 0.5) * 4  # Pressure correlates with SOC
+    return new_soc_bfg, new_soc_bofg, new_soc_cog, p_bfg, bf_bfg_supply
+
+
 if __name__ == "__main__":
     demo_standard_interfaces()
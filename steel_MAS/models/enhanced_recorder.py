@@ -7,13 +7,41 @@ Extends the base DataRecorder class to support:
 3. RL-ready data storage
 """
 
-from typing import List, Optional
+import json
+from typing import Any, List, Optional
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard json module
+    orjson = None
+
 from models.standard_interfaces import (
     StandardState, StandardAction, Reward, Transition
 )
 from models.reward_calculation import calculate_reward, calculate_episode_metrics
 
 
+def _json_default(obj: Any) -> Any:
+    """json fallback for NumPy arrays and scalars (orjson handles them natively)"""
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _dumps(obj: Any, indent: bool = False) -> bytes:
+    """Serialize obj to JSON bytes, with orjson when it is installed"""
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, option=option)
+    return json.dumps(obj, indent=2 if indent else None, default=_json_default).encode("utf-8")
+
+
+# Columns of get_reward_components_matrix()
+REWARD_COLUMNS = ("production_score", "stability_score", "efficiency_score", "total")
+
+
 class EnhancedDataRecorder:
     """
     Enhanced data recorder with full transition support.
@@ -22,18 +50,30 @@ class EnhancedDataRecorder:
     - Complete (s, a, s', r) transitions for RL training
     - Backward compatible with legacy dict-based recording
     - Episode-level metrics
+    
+    With stream_path set, every transition is also appended to that file as
+    one JSON line when it is recorded (JSONL), so long runs are saved as they
+    go; call close() when done.
     """
     
-    def __init__(self):
+    def __init__(self, stream_path: Optional[str] = None):
         # Standard interface data
         self.transitions: List[Transition] = []
         self.rewards: List[Reward] = []
         self.states: List[StandardState] = []
         self.actions: List[StandardAction] = []
         
+        # Reward components as columns (REWARD_COLUMNS order), grown by doubling
+        self._reward_arr = np.empty((64, len(REWARD_COLUMNS)))
+        self._n_rewards = 0
+        
         # Episode tracking
         self.episode_count: int = 0
         self.current_episode_steps: int = 0
+        
+        # JSONL stream (opened on the first transition)
+        self.stream_path = stream_path
+        self._stream = None
     
     def record_transition(
         self,
@@ -73,6 +113,19 @@ class EnhancedDataRecorder:
         self.states.append(state)
         self.actions.append(action)
         
+        if self._n_rewards == len(self._reward_arr):
+            grown = np.empty((2 * len(self._reward_arr), len(REWARD_COLUMNS)))
+            grown[:self._n_rewards] = self._reward_arr
+            self._reward_arr = grown
+        self._reward_arr[self._n_rewards] = (
+            reward.production_score, reward.stability_score, reward.efficiency_score, reward.total)
+        self._n_rewards += 1
+        
+        if self.stream_path is not None:
+            if self._stream is None:
+                self._stream = open(self.stream_path, "ab")
+            self._stream.write(_dumps(transition.to_dict()) + b"\n")
+        
         self.current_episode_steps += 1
         
         if done:
@@ -113,8 +166,6 @@ class EnhancedDataRecorder:
         Args:
             filepath: Output JSON file path
         """
-        import json
-        
         data = {
             "transitions": [t.to_dict() for t in self.transitions],
             "metrics": self.get_episode_metrics(),
@@ -124,11 +175,17 @@ class EnhancedDataRecorder:
             }
         }
         
-        with open(filepath, 'w') as f:
-            json.dump(data, f, indent=2)
+        with open(filepath, 'wb') as f:
+            f.write(_dumps(data, indent=True))
         
         print(f"[OK] Exported {len(self.transitions)} transitions to {filepath}")
     
+    def close(self):
+        """Flush and close the JSONL stream (recording reopens it for appending)"""
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+    
     def get_last_n_transitions(self, n: int = 10) -> List[Transition]:
         """Get last n transitions"""
         return self.transitions[-n:]
@@ -144,3 +201,13 @@ class EnhancedDataRecorder:
     def get_reward_history(self) -> List[Reward]:
         """Get all recorded rewards"""
         return self.rewards
+    
+    def get_reward_components_matrix(self) -> np.ndarray:
+        """
+        All recorded reward components as one (n_transitions, len(REWARD_COLUMNS))
+        array, for column statistics without walking the Reward objects.
+        The result is a read-only view; it is not updated by later recordings.
+        """
+        matrix = self._reward_arr[:self._n_rewards]
+        matrix.flags.writeable = False
+        return matrix
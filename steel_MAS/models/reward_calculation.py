@@ -5,7 +5,8 @@ Calculates multi-objective rewards for MAS performance evaluation.
 This module supports both Rule-based agent evaluation and future RL training.
 """
 
-from typing import Dict
+from functools import lru_cache
+from typing import Dict, Tuple
 from models.standard_interfaces import StandardState, StandardAction, Reward
 
 
@@ -30,19 +31,70 @@ def calculate_reward(
     Returns:
         Reward object with detailed breakdown
     """
+    bf_bfg = next_state.production.bf_bfg_supply
+    soc_bfg = next_state.gas_holder.soc_bfg
+    soc_bofg = next_state.gas_holder.soc_bofg
+    soc_cog = next_state.gas_holder.soc_cog
+    
+    total_consumption = (
+        action.gas_allocation.bfg_to_power_plant +
+        action.gas_allocation.bfg_to_heating +
+        action.gas_allocation.bofg_to_power_plant +
+        action.gas_allocation.cog_to_bf +
+        action.gas_allocation.cog_to_heating
+    )
+    
+    (production_score, stability_score, efficiency_score, total,
+     total_soc_penalty, utilization, total_supply) = _reward_terms(
+        bf_bfg, next_state.production.bof_bofg_supply, next_state.production.coke_cog_supply,
+        soc_bfg, soc_bofg, soc_cog, total_consumption)
+    
+    # Detailed breakdown for debugging
+    breakdown = {
+        "bf_bfg_supply": bf_bfg,
+        "soc_penalty_total": total_soc_penalty,
+        "soc_bfg": soc_bfg,
+        "soc_bofg": soc_bofg,
+        "soc_cog": soc_cog,
+        "utilization": utilization,
+        "total_supply": total_supply,
+        "total_consumption": total_consumption,
+    }
+    
+    return Reward(
+        production_score=production_score,
+        stability_score=stability_score,
+        efficiency_score=efficiency_score,
+        total=total,
+        breakdown=breakdown
+    )
+
+
+@lru_cache(maxsize=65536)
+def _reward_terms(
+    bf_bfg: float,
+    bof_bofg: float,
+    coke_cog: float,
+    soc_bfg: float,
+    soc_bofg: float,
+    soc_cog: float,
+    total_consumption: float
+) -> Tuple[float, ...]:
+    """
+    Reward math of calculate_reward(), memoized on the exact inputs
+    (recurring state-action pairs are not recomputed)
+    
+    Returns: (production_score, stability_score, efficiency_score, total,
+        total_soc_penalty, utilization, total_supply)
+    """
     
     # === 1. Production Score ===
     # Normalize BFG production to [0, 1]
     # Nominal: 116,000 Nm³/h, max: ~140,000
-    bf_bfg = next_state.production.bf_bfg_supply
     production_score = min(bf_bfg / 140000.0, 1.0)
     
     # === 2. Stability Score ===
     # Penalize SOC out of bounds [0.25, 0.85]
-    soc_bfg = next_state.gas_holder.soc_bfg
-    soc_bofg = next_state.gas_holder.soc_bofg
-    soc_cog = next_state.gas_holder.soc_cog
-    
     soc_penalties = []
     for soc in [soc_bfg, soc_bofg, soc_cog]:
         if soc < 0.25:
@@ -57,19 +109,7 @@ def calculate_reward(
     # Gas utilization = consumption / (supply + 1e-6)
     # Higher = better utilization
     
-    total_supply = (
-        next_state.production.bf_bfg_supply +
-        next_state.production.bof_bofg_supply +
-        next_state.production.coke_cog_supply
-    )
-    
-    total_consumption = (
-        action.gas_allocation.bfg_to_power_plant +
-        action.gas_allocation.bfg_to_heating +
-        action.gas_allocation.bofg_to_power_plant +
-        action.gas_allocation.cog_to_bf +
-        action.gas_allocation.cog_to_heating
-    )
+    total_supply = bf_bfg + bof_bofg + coke_cog
     
     # Target utilization ~0.8 (allow 20% reserve)
     utilization = total_consumption / (total_supply + 1e-6)
@@ -93,25 +133,8 @@ def calculate_reward(
         weights["efficiency"] * efficiency_score
     )
     
-    # Detailed breakdown for debugging
-    breakdown = {
-        "bf_bfg_supply": bf_bfg,
-        "soc_penalty_total": total_soc_penalty,
-        "soc_bfg": soc_bfg,
-        "soc_bofg": soc_bofg,
-        "soc_cog": soc_cog,
-        "utilization": utilization,
-        "total_supply": total_supply,
-        "total_consumption": total_consumption,
-    }
-    
-    return Reward(
-        production_score=production_score,
-        stability_score=stability_score,
-        efficiency_score=efficiency_score,
-        total=total,
-        breakdown=breakdown
-    )
+    return (production_score, stability_score, efficiency_score, total,
+            total_soc_penalty, utilization, total_supply)
 
 
 def calculate_episode_metrics(rewards: list) -> Dict[str, float]:
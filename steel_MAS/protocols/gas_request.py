@@ -114,15 +114,21 @@ class StateBroadcast:
 class MessageBus:
     """
     Simple message bus for agent communication
+    
+    Messages are kept until clear() for get_messages() / has_messages().
+    Messages are added with send() only (has_messages() counts them there).
     """
     
     def __init__(self):
         self.messages = []
         self.time = 0.0
+        self._held = {}  # (receiver, msg_type) -> number of such messages in self.messages
     
     def send(self, message: Message):
         """Send a message"""
         self.messages.append(message)
+        key = (message.receiver, message.msg_type)
+        self._held[key] = self._held.get(key, 0) + 1
     
     def get_messages(self, receiver: str, msg_type: Optional[MessageType] = None):
         """Get messages for a specific receiver"""
@@ -136,9 +142,15 @@ class MessageBus:
         
         return filtered
     
+    def has_messages(self, receiver: str, msg_type: MessageType) -> bool:
+        """Whether get_messages(receiver, msg_type) is non-empty, without scanning the messages"""
+        held = self._held
+        return bool(held) and (held.get((receiver, msg_type), 0) + held.get(("all", msg_type), 0)) > 0
+    
     def clear(self):
         """Clear all messages"""
         self.messages = []
+        self._held = {}
     
     def update_time(self, time: float):
         """Update simulation time"""
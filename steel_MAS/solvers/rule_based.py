@@ -3,8 +3,135 @@ Rule-Based Control Utilities
 Provides base classes and utilities for rule-based agent control
 """
 
+import math
+import os
+import runpy
+from collections.abc import Mapping
+
 import numpy as np
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, Optional, Tuple
+
+# The agents' step kernels are compiled with numba when it is installed, using the
+# optional-numba support of the twins (read by path, nothing is put on sys.path)
+_JIT = runpy.run_path(os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "Digital_Twin", "jit_support.py"))
+JIT_ENABLED, njit, prange = _JIT["JIT_ENABLED"], _JIT["njit"], _JIT["prange"]
+
+# njit / prange are re-exported for the agents' kernels
+__all__ = [
+    'StateView', 'RuleBasedController', 'SafetyLimits',
+    'load_aot_kernels', 'with_serial_fallback', 'array_field',
+    'adjust_up', 'adjust_down', 'adjust_up_if', 'adjust_down_if',
+    'njit', 'prange'
+]
+
+
+class StateView(Mapping):
+    """
+    Read-only live mapping {state key: value} over an agent's state vector
+    
+    Returned by the agents' step(): it reads owner._state on every access, so
+    it always shows the current state and costs no allocation per step.
+    Callers that keep a snapshot across steps use dict(view) or get_state().
+    """
+    
+    __slots__ = ("_owner", "_keys", "_index")
+    
+    def __init__(self, owner, keys: Tuple[str, ...]):
+        self._owner = owner
+        self._keys = keys
+        self._index = {key: i for i, key in enumerate(keys)}
+    
+    def __getitem__(self, key: str) -> float:
+        return self._owner._state.item(self._index[key])
+    
+    def __iter__(self):
+        return iter(self._keys)
+    
+    def __len__(self) -> int:
+        return len(self._keys)
+    
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+def load_aot_kernels():
+    """
+    The ahead-of-time compiled step kernels (agents/steel_kernels, built by
+    agents/_kernels_aot.py), or None when they are not built or STEEL_MAS_JIT=0
+    """
+    if not JIT_ENABLED:
+        return None
+    try:
+        from agents import steel_kernels
+    except ImportError:
+        return None
+    return steel_kernels
+
+
+# incremental_adjust(x, "increase" / "decrease", step, ...) without the string
+# dispatch, for the step kernels (inlined into them by numba)
+@njit("float64(float64, float64, float64)", inline="always")
+def adjust_up(x, step, hi):
+    """Increase x by the factor (1 + step), clamped to hi"""
+    return min(x * (1 + step), hi)
+
+
+@njit("float64(float64, float64, float64)", inline="always")
+def adjust_down(x, step, lo):
+    """Decrease x by the factor (1 - step), clamped to lo"""
+    return max(x * (1 - step), lo)
+
+
+# Branchless forms for rules on unpredictable conditions: when cond is False the
+# factor is 1.0 and the clamp infinite, so x is returned unchanged (exactly)
+@njit("float64(boolean, float64, float64, float64)", inline="always")
+def adjust_up_if(cond, x, step, hi):
+    """adjust_up(x, step, hi) if cond else x, without a branch"""
+    return min(x * (1 + step if cond else 1.0), hi if cond else math.inf)
+
+
+@njit("float64(boolean, float64, float64, float64)", inline="always")
+def adjust_down_if(cond, x, step, lo):
+    """adjust_down(x, step, lo) if cond else x, without a branch"""
+    return max(x * (1 - step if cond else 1.0), lo if cond else -math.inf)
+
+
+def with_serial_fallback(parallel_kernel, serial_kernel):
+    """
+    Wrap a prange kernel and its serial twin into one step_all-style function
+    
+    The returned function runs parallel_kernel(*args), or serial_kernel(*args)
+    when parallel=False or when numba cannot start its threading layer (it
+    raises ValueError then, e.g. without TBB/OpenMP/workqueue support).
+    """
+    def step_all(*args, parallel: bool = True):
+        if parallel:
+            try:
+                return parallel_kernel(*args)
+            except ValueError:  # no usable threading layer
+                pass
+        return serial_kernel(*args)
+    
+    step_all.__doc__ = serial_kernel.__doc__
+    return step_all
+
+
+def array_field(array_name: str, index: int, doc: Optional[str] = None) -> property:
+    """
+    Typed float attribute backed by element `index` of the ndarray attribute `array_name`
+    
+    The agents keep their state in one vector for the step kernels (and declare
+    __slots__); array_field exposes each entry under its state key name.
+    """
+    def fget(self) -> float:
+        return float(getattr(self, array_name)[index])
+    
+    def fset(self, value: float):
+        getattr(self, array_name)[index] = value
+    
+    return property(fget, fset, doc=doc)
 
 
 class RuleBasedController:
@@ -0,0 +1,108 @@
+"""
+Test script to verify that the twins' batch API reports the same values as their scalar call
+"""
+import os
+import importlib.util
+
+import numpy as np
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+digital_twin_dir = os.path.join(parent_dir, "Digital_Twin")
+
+
+def load_twin(module_name, *path):
+    """Load a twin module from its file below Digital_Twin/"""
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(digital_twin_dir, *path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def random_inputs(rng, ranges, n):
+    """n random 2-decimal values per input key (the precision of the reported values)"""
+    return {key: np.round(rng.uniform(lo, hi, n), 2) for key, (lo, hi) in ranges.items()}
+
+
+def assert_batch_matches_scalar(twin, inputs, **batch_kwargs):
+    """Every batch output equals the scalar call on the same row"""
+    batch = twin.simulate_batch(inputs, **batch_kwargs)
+    n = len(next(iter(inputs.values())))
+    for i in range(n):
+        row = {key: float(values[i]) for key, values in inputs.items()}
+        expected = twin(row)
+        got = {key: float(values[i]) for key, values in batch.items()}
+        assert got == expected, (row, expected, got)
+
+
+def test_bof_batch_matches_scalar():
+    bof_module = load_twin("BOF_Twin", "BOF", "BOF_Twin.py")
+    bof_twin = bof_module.BOFTwin()
+    rng = np.random.default_rng(0)
+    inputs = random_inputs(rng, {
+        "pig_iron [t/h]": (0, 120),
+        "scrap_steel [t/h]": (0, 40),
+        "oxygen [Nm³/h]": (0, 60000),
+        "lime [t/h]": (0, 10),
+        "power [kWh/h]": (0, 8000),
+    }, 5000)
+    # A near-tie that np.round (half-to-even) and round() used to report differently
+    inputs = {key: np.append(values, value) for (key, values), value in
+              zip(inputs.items(), (3.85, 32.85, 50000, 5, 5000))}
+    assert_batch_matches_scalar(bof_twin, inputs)
+    assert_batch_matches_scalar(bof_twin, inputs, parallel=True)
+
+
+def test_coke_oven_batch_matches_scalar():
+    coke_oven_module = load_twin("Coke_Oven_Twin", "Coke Oven", "Coke_Oven_Twin.py")
+    coke_oven_twin = coke_oven_module.CokeOvenTwin()
+    rng = np.random.default_rng(0)
+    inputs = random_inputs(rng, {
+        "coal_input [t/h]": (0, 150),
+        "heating_gas [Nm³/h]": (0, 30000),
+        "heating_gas_calorific_value [MJ/Nm³]": (0, 20),
+        "steam [t/h]": (0, 4),
+        "power [kWh/h]": (0, 5000),
+    }, 5000)
+    # A near-tie that np.round (half-to-even) and round() used to report differently
+    inputs = {key: np.append(values, value) for (key, values), value in
+              zip(inputs.items(), (52.32, 4159.32, 15.43, 0.53, 1245.4))}
+    assert_batch_matches_scalar(coke_oven_twin, inputs)
+
+
+def test_bf_batch_matches_scalar():
+    bf_module = load_twin("BlastFurnaceTwin", "Blast Furnace", "Blast_Furnace_Twin_to_share.py")
+    bf_twin = bf_module.BlastFurnaceTwin()
+    rng = np.random.default_rng(0)
+    n = 2000
+    inputs = random_inputs(rng, {
+        "ore [t/h]": (0, 100),
+        "pellets [t/h]": (0, 150),
+        "sinter [t/h]": (0, 150),
+        "coke_mass_flow_bf4 [t/h]": (0, 150),
+        "coke_gas_coke_plant_bf4 [m³/h]": (0, 50000),
+        "calorific_value_coke_gas_bf4 [MJ/m³]": (0, 25),
+        "power [kWh/h]": (0, 80000),
+        "wind_volume [Nm³/min]": (2000, 5000),
+        "oxygen_enrichment [Nm³/h]": (0, 5000),
+    }, n)
+    split = {
+        "intern BF_GAS_PERCENTAGE [%]": 50,
+        "power plant BF_GAS_PERCENTAGE [%]": 20,
+        "slab heat furnace BF_GAS_PERCENTAGE [%]": 20,
+        "coke plant BF_GAS_PERCENTAGE [%]": 10,
+    }
+    inputs.update({key: np.full(n, value, dtype=float) for key, value in split.items()})
+    # An invalid gas split with power 0 (all outputs 0, no division by zero in the batch)
+    inputs["power [kWh/h]"][0] = 0
+    inputs["coke plant BF_GAS_PERCENTAGE [%]"][0] = 15
+    assert_batch_matches_scalar(bf_twin, inputs)
+
+
+if __name__ == "__main__":
+    print("=" * 80)
+    print(" Twin Batch vs Scalar Tests")
+    print("=" * 80)
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")